@@ -1,47 +1,169 @@
 import os
 import logging
+import threading
 
+import click
 from flask import Flask
+from flask.cli import with_appcontext
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_login import LoginManager
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+from utils.blob_store import BlobStore
+from utils.cache import TTLCache
+from utils.metrics import instrument_app, registry
+from utils.session_store import ServerSessionInterface, SQLiteSessionStore
+
+# Configure logging; DEBUG logs every SQL statement and request, so it is
+# opt-in rather than the default
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 
 class Base(DeclarativeBase):
     pass
 
-# Initialize Flask extensions
+# Initialize Flask extensions; create_app configures these for its app, and
+# models and utilities import them from here
 db = SQLAlchemy(model_class=Base)
 login_manager = LoginManager()
+blob_store = BlobStore(None)
+user_cache = TTLCache(ttl=60, maxsize=10000)
+
+def create_app():
+    """
+    Create and configure the app from environment variables
+    
+    With AUTO_MIGRATE off the app never touches the schema on startup, so
+    deployments run `flask --app main init-db` once before starting workers.
+    
+    Returns:
+        Flask: The configured app with all routes registered
+    """
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+    
+    # Configure the database
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///assistant.db")
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Logged-in user identities are cached for this many seconds between requests
+    app.config["USER_CACHE_TTL"] = int(os.environ.get("USER_CACHE_TTL", 60))
+    app.config["USER_CACHE_SIZE"] = int(os.environ.get("USER_CACHE_SIZE", 10000))
+    # "sqlite" keeps sessions server-side in SESSION_DB_PATH, cached in each
+    # process for SESSION_CACHE_TTL seconds; "cookie" keeps Flask's signed cookies
+    app.config["SESSION_BACKEND"] = os.environ.get("SESSION_BACKEND", "sqlite")
+    app.config["SESSION_DB_PATH"] = os.environ.get("SESSION_DB_PATH", os.path.join(app.instance_path, "sessions.db"))
+    app.config["SESSION_CACHE_TTL"] = int(os.environ.get("SESSION_CACHE_TTL", 10))
+    app.config["SESSION_CACHE_SIZE"] = int(os.environ.get("SESSION_CACHE_SIZE", 10000))
+    app.config["MAX_BATCH_COMMANDS"] = int(os.environ.get("MAX_BATCH_COMMANDS", 100))
+    app.config["MAX_BULK_TASKS"] = int(os.environ.get("MAX_BULK_TASKS", 1000))
+    app.config["REMINDER_RESYNC_INTERVAL"] = int(os.environ.get("REMINDER_RESYNC_INTERVAL", 300))
+    app.config["REMINDER_STREAM_TIMEOUT"] = int(os.environ.get("REMINDER_STREAM_TIMEOUT", 300))
+    # Reminder streams each hold a worker thread, so at most this many are
+    # open per process; others are told to reconnect after the busy retry
+    app.config["REMINDER_STREAM_SLOTS"] = int(os.environ.get("REMINDER_STREAM_SLOTS", 8))
+    app.config["REMINDER_STREAM_BUSY_RETRY"] = int(os.environ.get("REMINDER_STREAM_BUSY_RETRY", 30))
+    app.config["TOMBSTONE_RETENTION_DAYS"] = int(os.environ.get("TOMBSTONE_RETENTION_DAYS", 30))
+    app.config["SYNC_CURSOR_OVERLAP"] = int(os.environ.get("SYNC_CURSOR_OVERLAP", 2))
+    app.config["DEFAULT_PAGE_SIZE"] = int(os.environ.get("DEFAULT_PAGE_SIZE", 50))
+    app.config["MAX_PAGE_SIZE"] = int(os.environ.get("MAX_PAGE_SIZE", 200))
+    app.config["STREAM_CHUNK_ROWS"] = int(os.environ.get("STREAM_CHUNK_ROWS", 500))
+    app.config["MAX_UPLOAD_BYTES"] = int(os.environ.get("MAX_UPLOAD_BYTES", 16 * 1024 * 1024))
+    # Reject oversized requests from Content-Length before reading the body;
+    # the slack covers multipart framing around the file
+    app.config["MAX_CONTENT_LENGTH"] = app.config["MAX_UPLOAD_BYTES"] + 64 * 1024
+    # Text uploads larger than this are extracted in the background, like PDFs
+    app.config["INLINE_EXTRACT_BYTES"] = int(os.environ.get("INLINE_EXTRACT_BYTES", 1024 * 1024))
+    app.config["UPLOAD_SPOOL_DIR"] = os.environ.get("UPLOAD_SPOOL_DIR", os.path.join(app.instance_path, "uploads"))
+    # Uploads still pending, and spooled files still present, after this many
+    # seconds were left by a worker that stopped mid-extraction
+    app.config["STALE_EXTRACTION_SECONDS"] = int(os.environ.get("STALE_EXTRACTION_SECONDS", 3600))
+    app.config["FILE_INDEX_CACHE_SIZE"] = int(os.environ.get("FILE_INDEX_CACHE_SIZE", 256))
+    # Extracted upload text lives outside the database; 0 stores it uncompressed
+    app.config["BLOB_STORE_DIR"] = os.environ.get("BLOB_STORE_DIR", os.path.join(app.instance_path, "blobs"))
+    app.config["BLOB_COMPRESSION_LEVEL"] = int(os.environ.get("BLOB_COMPRESSION_LEVEL", 0))
+    app.config["VECTOR_INDEX_DIR"] = os.environ.get("VECTOR_INDEX_DIR", os.path.join(app.instance_path, "vectors"))
+    # Users whose semantic search matrices are kept memory-mapped per worker
+    app.config["VECTOR_STORE_MAX_OPEN"] = int(os.environ.get("VECTOR_STORE_MAX_OPEN", 64))
+    # Fraction of requests run under cProfile, reported at /metrics/profile;
+    # 0 turns profiling off
+    app.config["PROFILE_SAMPLE_RATE"] = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+    app.config["PROFILE_TOP_N"] = int(os.environ.get("PROFILE_TOP_N", 30))
+    # /metrics and /metrics/profile are refused unless the request carries
+    # this bearer token or comes from one of these comma-separated addresses
+    # or networks (e.g. "127.0.0.1,10.0.0.0/8")
+    app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN", "")
+    app.config["METRICS_ALLOWED_NETWORKS"] = [
+        network.strip() for network in os.environ.get("METRICS_ALLOWED_NETWORKS", "").split(",") if network.strip()
+    ]
+    # Create and upgrade the schema on startup; turn off once init-db has run
+    app.config["AUTO_MIGRATE"] = os.environ.get("AUTO_MIGRATE", "1") not in ("0", "false", "no")
+    
+    # Initialize extensions with the app
+    db.init_app(app)
+    login_manager.init_app(app)
+    login_manager.login_view = "main.login"
+    
+    blob_store.directory = app.config["BLOB_STORE_DIR"]
+    blob_store.compression_level = app.config["BLOB_COMPRESSION_LEVEL"]
+    user_cache.ttl = app.config["USER_CACHE_TTL"]
+    user_cache.maxsize = app.config["USER_CACHE_SIZE"]
+    
+    if app.config["SESSION_BACKEND"] == "sqlite":
+        app.session_interface = ServerSessionInterface(
+            SQLiteSessionStore(app.config["SESSION_DB_PATH"]),
+            cache_ttl=app.config["SESSION_CACHE_TTL"],
+            cache_size=app.config["SESSION_CACHE_SIZE"]
+        )
+        registry.register_cache("session", app.session_interface.cache)
+    elif app.config["SESSION_BACKEND"] != "cookie":
+        raise ValueError(f"Unknown SESSION_BACKEND: {app.config['SESSION_BACKEND']}")
+    
+    # Request, SQL and external API metrics, served at /metrics
+    instrument_app(app, app.config["PROFILE_SAMPLE_RATE"], app.config["PROFILE_TOP_N"],
+                   app.config["METRICS_TOKEN"], app.config["METRICS_ALLOWED_NETWORKS"])
+    registry.register_cache("user", user_cache)
+    
+    from routes import bp, recover_stale_uploads
+    app.register_blueprint(bp)
+    app.cli.add_command(init_db_command)
+    
+    if app.config["AUTO_MIGRATE"]:
+        with app.app_context():
+            init_db()
+    
+    # In the background, so it doesn't delay the first response
+    threading.Thread(target=recover_stale_uploads, args=(app,), name='recover-uploads', daemon=True).start()
+    
+    return app
 
-# Create the app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
-
-# Configure the database
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///assistant.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
-# Initialize extensions with the app
-db.init_app(app)
-login_manager.init_app(app)
-login_manager.login_view = "login"
-
-with app.app_context():
-    # Import models to ensure tables are created
-    import models
+def init_db():
+    """Create missing tables and bring existing ones up to date with the models"""
+    # Import models so their tables are registered
+    import models  # noqa: F401
+    from migrations import upgrade_schema
     db.create_all()
+    
+    # Add columns introduced since the database was created
+    upgrade_schema()
+
+@click.command("init-db")
+@with_appcontext
+def init_db_command():
+    """Create or upgrade the database schema."""
+    from migrations import drop_legacy_columns
+    init_db()
+    drop_legacy_columns()
+    click.echo("Database schema is up to date.")
 
-# Load user from user_id for login_manager
+# Load user from user_id for login_manager; identities are cached so
+# authenticated API calls don't each query the user table
 @login_manager.user_loader
 def load_user(user_id):
-    from models import User
-    return User.query.get(int(user_id))
+    from models import load_user_identity
+    user_id = int(user_id)
+    return user_cache.get_or_load(user_id, lambda: load_user_identity(user_id))
@@ -0,0 +1 @@
+"""Benchmarks for the assistant. Run modules with ``python -m benchmarks.<name>``."""
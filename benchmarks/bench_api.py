@@ -0,0 +1,348 @@
+"""
+End-to-end benchmark and load test of the Flask API
+
+Seeds a scratch assistant.db, points the weather and news clients at a
+local StubServer, then drives every route in routes.py in two phases:
+through the Flask test client from one thread, and through a real threaded
+WSGI server with concurrent clients, each logged in as its own seeded user
+over keep-alive connections. Prints request throughput and p50/p95/p99
+latency per route as JSON, so runs can be compared over time.
+
+/api/reminders/stream is left out, since it holds its connection open for
+REMINDER_STREAM_TIMEOUT seconds by design. Setup requests a route needs,
+such as creating the task a DELETE removes, are not timed.
+
+Usage:
+    python -m benchmarks.bench_api [--tasks N] [--repeat N] [--clients N] [--rounds N] [--output FILE]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmarks.bench_text_index import generate_document
+from benchmarks.stub_server import StubServer
+
+# Size of the text file uploaded by setup and by the upload route
+UPLOAD_MEGABYTES = 0.02
+
+COMMANDS = {
+    'add_task': 'add task renew the car insurance by tomorrow',
+    'add_reminder': 'remind me to call the dentist at 5 pm',
+    'question': 'what time is it',
+    'weather': "what's the weather in London",
+    'news': 'latest news about technology',
+    'unknown': 'play some music'
+}
+
+class TestClientCaller:
+    """Sends requests through the Flask test client"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.client = app.test_client()
+    
+    def __call__(self, method, path, json=None, data=None, content_type=None):
+        # buffered reads and closes the body like a server would
+        response = self.client.open(path, method=method, json=json, data=data,
+                                    content_type=content_type, buffered=True)
+        return response.status_code, response.get_data()
+    
+    def fresh(self):
+        return TestClientCaller(self.app)
+
+class HTTPCaller:
+    """Sends requests to a running server over a keep-alive session"""
+    
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.session = requests.Session()
+    
+    def __call__(self, method, path, json=None, data=None, content_type=None):
+        headers = {'Content-Type': content_type} if content_type else None
+        response = self.session.request(method, self.base_url + path, json=json, data=data,
+                                        headers=headers, allow_redirects=False, timeout=60)
+        return response.status_code, response.content
+    
+    def fresh(self):
+        return HTTPCaller(self.base_url)
+
+class Context:
+    """A logged-in client and the ids its scenarios refer to"""
+    
+    def __init__(self, caller, username, password, document, vocabulary, rng):
+        self.caller = caller
+        self.username = username
+        self.password = password
+        self.document = document
+        self.vocabulary = vocabulary
+        self.rng = rng
+        self.ids = {}
+    
+    def call_json(self, method, path, **kwargs):
+        """Send an untimed setup request and return its JSON body"""
+        status, body = self.caller(method, path, **kwargs)
+        if status >= 400:
+            raise RuntimeError(f'{method} {path} failed during setup: {status} {body[:200]!r}')
+        return json.loads(body)
+    
+    def query(self):
+        return ' '.join(self.rng.choice(self.vocabulary) for _ in range(self.rng.randint(1, 3)))
+    
+    def setup(self):
+        self.caller('POST', '/login', data={'username': self.username, 'password': self.password})
+        page = self.call_json('GET', '/api/tasks?limit=1')
+        self.ids['task_id'] = page['tasks'][0]['id']
+        self.ids['cursor'] = self.call_json('GET', '/api/tasks')['cursor']
+        upload = self.call_json('POST', '/api/upload?filename=setup.txt',
+                                data=self.document.encode(), content_type='text/plain')
+        self.ids['file_id'] = upload['file_id']
+    
+    def new_task_ids(self, count):
+        tasks = [{'title': f'Load test {n}', 'deadline': 'friday'} for n in range(count)]
+        return [t['id'] for t in self.call_json('POST', '/api/tasks/bulk', json={'tasks': tasks})['tasks']]
+
+def fixed(method, path, **kwargs):
+    """A scenario that sends the same request each time; path may use {ids}"""
+    return lambda ctx: (ctx.caller, method, path.format(**ctx.ids), kwargs)
+
+def create_then(method, path, create):
+    """A scenario that first creates the record it acts on, untimed"""
+    def scenario(ctx):
+        return ctx.caller, method, path.format(id=create(ctx)), {}
+    return scenario
+
+def bulk_ids(method, **kwargs):
+    def scenario(ctx):
+        return ctx.caller, method, '/api/tasks/bulk', {'json': dict(kwargs, ids=ctx.new_task_ids(20))}
+    return scenario
+
+def search(path, mode):
+    return lambda ctx: (ctx.caller, 'POST', path.format(**ctx.ids), {'json': {'query': ctx.query(), 'mode': mode}})
+
+def login(ctx):
+    # A logged-in client is redirected before its password is checked
+    return ctx.caller.fresh(), 'POST', '/login', {'data': {'username': ctx.username, 'password': ctx.password}}
+
+def upload(ctx):
+    return ctx.caller, 'POST', '/api/upload?filename=notes.txt', {'data': ctx.document.encode(), 'content_type': 'text/plain'}
+
+def import_tasks(ctx):
+    tasks = [{'title': f'Imported {n}', 'deadline': ctx.rng.choice(['tomorrow', 'at 5 pm', 'may 15th', None])}
+             for n in range(100)]
+    return ctx.caller, 'POST', '/api/tasks/bulk', {'json': {'tasks': tasks}}
+
+def create_task(ctx):
+    return ctx.call_json('POST', '/api/tasks', json={'title': 'Load test task'})['task']['id']
+
+def create_reminder(ctx):
+    return ctx.call_json('POST', '/api/reminders', json={
+        'title': 'Load test reminder', 'reminder_time': '2030-01-01T09:00:00'
+    })['reminder']['id']
+
+SCENARIOS = [
+    ('GET /', fixed('GET', '/')),
+    ('POST /login', login),
+    ('GET /api/tasks', fixed('GET', '/api/tasks')),
+    ('GET /api/tasks?since', fixed('GET', '/api/tasks?since={cursor}')),
+    ('GET /api/tasks?completed&limit', fixed('GET', '/api/tasks?completed=false&limit=50')),
+    ('POST /api/tasks', fixed('POST', '/api/tasks', json={'title': 'Load test task', 'deadline': '2030-01-01T09:00:00'})),
+    ('PUT /api/tasks/<id>', fixed('PUT', '/api/tasks/{task_id}', json={'completed': True})),
+    ('DELETE /api/tasks/<id>', create_then('DELETE', '/api/tasks/{id}', create_task)),
+    ('POST /api/tasks/bulk', import_tasks),
+    ('PATCH /api/tasks/bulk', bulk_ids('PATCH', changes={'completed': True})),
+    ('DELETE /api/tasks/bulk', bulk_ids('DELETE')),
+    ('GET /api/reminders', fixed('GET', '/api/reminders')),
+    ('POST /api/reminders', fixed('POST', '/api/reminders', json={
+        'title': 'Load test reminder', 'reminder_time': '2030-01-01T09:00:00'
+    })),
+    ('DELETE /api/reminders/<id>', create_then('DELETE', '/api/reminders/{id}', create_reminder)),
+    *((f'POST /api/process-command {intent}', fixed('POST', '/api/process-command', json={'command': command}))
+      for intent, command in COMMANDS.items()),
+    ('POST /api/process-commands', fixed('POST', '/api/process-commands', json={'commands': list(COMMANDS.values())})),
+    ('GET /api/weather', fixed('GET', '/api/weather?location=London')),
+    ('GET /api/news', fixed('GET', '/api/news?topic=technology')),
+    ('POST /api/news/refresh', fixed('POST', '/api/news/refresh?topic=general')),
+    ('GET /api/dashboard', fixed('GET', '/api/dashboard?location=London&topics=general,technology')),
+    ('POST /api/upload', upload),
+    ('GET /api/files', fixed('GET', '/api/files')),
+    ('GET /api/files/<id>', fixed('GET', '/api/files/{file_id}')),
+    ('POST /api/files/<id>/query keyword', search('/api/files/{file_id}/query', 'keyword')),
+    ('POST /api/files/<id>/query semantic', search('/api/files/{file_id}/query', 'semantic')),
+    ('POST /api/files/search keyword', search('/api/files/search', 'keyword')),
+    ('POST /api/files/search semantic', search('/api/files/search', 'semantic')),
+]
+
+def run_scenarios(ctx, order, samples, errors):
+    """Time each named scenario in order, appending milliseconds to samples"""
+    scenarios = dict(SCENARIOS)
+    for name in order:
+        caller, method, path, kwargs = scenarios[name](ctx)
+        start = time.perf_counter()
+        status, _ = caller(method, path, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+        samples.setdefault(name, []).append(elapsed)
+        if status >= 400:
+            errors[name] = errors.get(name, 0) + 1
+
+def summarize(samples, errors, seconds):
+    """Return throughput and latency percentiles for one phase"""
+    routes = {}
+    for name, _ in SCENARIOS:
+        times = sorted(samples.get(name, []))
+        if not times:
+            continue
+        cuts = statistics.quantiles(times, n=100, method='inclusive') if len(times) > 1 else times * 99
+        routes[name] = {
+            'count': len(times),
+            'errors': errors.get(name, 0),
+            'mean_ms': round(statistics.fmean(times), 3),
+            'p50_ms': round(cuts[49], 3),
+            'p95_ms': round(cuts[94], 3),
+            'p99_ms': round(cuts[98], 3)
+        }
+    total = sum(len(times) for times in samples.values())
+    return {
+        'requests': total,
+        'errors': sum(errors.values()),
+        'seconds': round(seconds, 3),
+        'requests_per_second': round(total / seconds, 1) if seconds else None,
+        'routes': routes
+    }
+
+def test_client_phase(app, password, document, vocabulary, repeat, seed):
+    """Run every scenario repeat times through the test client as user1"""
+    ctx = Context(TestClientCaller(app), 'user1', password, document, vocabulary, random.Random(seed))
+    ctx.setup()
+    samples, errors = {}, {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run_scenarios(ctx, [name for name, _ in SCENARIOS], samples, errors)
+    return summarize(samples, errors, time.perf_counter() - start)
+
+def server_phase(app, password, document, vocabulary, clients, rounds, seed):
+    """Run every scenario rounds times from each of clients threads, in shuffled order"""
+    from werkzeug.serving import make_server
+    
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    try:
+        contexts = [Context(HTTPCaller(base_url), f'user{n + 1}', password, document, vocabulary,
+                            random.Random(seed + n)) for n in range(clients)]
+        for ctx in contexts:
+            ctx.setup()
+        
+        results = [({}, {}) for _ in contexts]
+        failures = []
+        ready = threading.Barrier(clients + 1)
+        
+        def client(ctx, samples, errors):
+            order = [name for name, _ in SCENARIOS] * rounds
+            ctx.rng.shuffle(order)
+            ready.wait()
+            try:
+                run_scenarios(ctx, order, samples, errors)
+            except Exception as e:
+                failures.append(e)
+        
+        threads = [threading.Thread(target=client, args=(ctx, *result)) for ctx, result in zip(contexts, results)]
+        for t in threads:
+            t.start()
+        ready.wait()
+        start = time.perf_counter()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        if failures:
+            raise failures[0]
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    samples, errors = {}, {}
+    for thread_samples, thread_errors in results:
+        for name, times in thread_samples.items():
+            samples.setdefault(name, []).extend(times)
+        for name, count in thread_errors.items():
+            errors[name] = errors.get(name, 0) + count
+    summary = summarize(samples, errors, elapsed)
+    summary['clients'] = clients
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--reminders', type=int, default=2000)
+    parser.add_argument('--uploads', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20, help='passes over the routes through the test client')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent clients against the server')
+    parser.add_argument('--rounds', type=int, default=5, help='passes over the routes per server client')
+    parser.add_argument('--stub-delay', type=float, default=0.0, help='seconds the stub APIs take to respond')
+    parser.add_argument('--directory', help='empty directory for assistant.db and its files (default: a temp dir)')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.users < args.clients:
+        parser.error('--users must be at least --clients, so each client has its own user')
+    
+    directory = args.directory or tempfile.mkdtemp()
+    with StubServer(args.stub_delay) as stub:
+        # The app reads its settings at import, so configure it before
+        # importing anything that imports it
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(os.path.abspath(directory), 'assistant.db')}"
+        for name, subdirectory in (('BLOB_STORE_DIR', 'blobs'), ('VECTOR_INDEX_DIR', 'vectors'),
+                                   ('UPLOAD_SPOOL_DIR', 'uploads')):
+            os.environ[name] = os.path.join(directory, subdirectory)
+        os.environ['SESSION_DB_PATH'] = os.path.join(directory, 'sessions.db')
+        os.environ['WEATHER_API_URL'] = stub.url
+        os.environ['NEWS_API_URL'] = stub.url
+        os.environ['GNEWS_API_KEY'] = 'stub'
+        # Every timed POST /api/news/refresh repeats the same topic, so turn
+        # off its throttle to time the refresh itself rather than 429s
+        os.environ['NEWS_MANUAL_REFRESH_INTERVAL'] = '0'
+        logging.disable(logging.INFO)
+        
+        from benchmarks.seed import seed_database, SEED_PASSWORD
+        from main import app
+        
+        seed_seconds = seed_database(args.users, args.tasks, args.reminders, args.uploads, args.seed)
+        document, vocabulary = generate_document(UPLOAD_MEGABYTES, vocabulary_size=500, seed=args.seed)
+        
+        report = {
+            'config': {
+                'users': args.users, 'tasks': args.tasks, 'reminders': args.reminders, 'uploads': args.uploads,
+                'repeat': args.repeat, 'clients': args.clients, 'rounds': args.rounds,
+                'stub_delay': args.stub_delay, 'seed': args.seed,
+                'python': platform.python_version(), 'platform': platform.platform()
+            },
+            'seed_seconds': {table: round(seconds, 3) for table, seconds in seed_seconds.items()},
+            'test_client': test_client_phase(app, SEED_PASSWORD, document, vocabulary, args.repeat, args.seed),
+            'wsgi_server': server_phase(app, SEED_PASSWORD, document, vocabulary, args.clients, args.rounds, args.seed),
+            'stub_requests': stub.request_count
+        }
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    for phase in ('test_client', 'wsgi_server'):
+        summary = report[phase]
+        print(f"{phase}: {summary['requests']:,} requests, {summary['requests_per_second']:,} req/sec, "
+              f"{summary['errors']} errors", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
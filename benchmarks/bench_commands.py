@@ -0,0 +1,285 @@
+"""
+Microbenchmarks for the command-processing utilities, with a baseline check
+
+Generates a realistic corpus of commands (tasks with and without deadlines,
+reminders, weather, news, questions and unrecognized input) and of date/time
+phrases, then measures throughput and allocations per intent and per phrase
+type for process_natural_language_command, answer_question and
+parse_datetime_from_text. Allocations are measured with tracemalloc as the
+peak and retained bytes per call.
+
+Each timed run is bracketed by runs of a fixed calibration workload, and
+throughput is also reported relative to it, which cancels out most of the
+difference between machines. Interference on a busy machine only ever
+slows a run down, so both are taken from the fastest of several runs.
+Results are compared with a baseline file, and the run fails if any
+group's relative throughput drops, or its peak allocation grows, by more
+than the threshold. Groups whose calls take under a microsecond are timed
+mostly as loop overhead, so their throughput gets a wider threshold.
+Regenerate the baseline with --update-baseline after an intended change.
+
+Usage:
+    python -m benchmarks.bench_commands [--commands N] [--phrases N] [--threshold F] [--update-baseline]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+from utils.datetime_parser import parse_datetime_from_text
+from utils.nlp_processor import process_natural_language_command, answer_question
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'bench_commands.json')
+
+# Peak allocations below this many bytes per call never count as a regression
+ALLOCATION_SLACK = 64
+
+# Throughput is the best of this many timed runs of at least this long
+TIMED_RUNS = 7
+MIN_RUN_SECONDS = 0.1
+
+# Groups faster than this per call in the baseline have their throughput
+# threshold multiplied by FAST_GROUP_THRESHOLD_FACTOR
+FAST_CALL_SECONDS = 1e-6
+FAST_GROUP_THRESHOLD_FACTOR = 2
+
+# Plain string, regex and dict work that throughput is measured relative to
+_CALIBRATION_REGEX = re.compile(r"\w+")
+_CALIBRATION_TEXTS = [f"Calibration text number {n} with some words in it" for n in range(200)]
+
+def _calibration(text):
+    return {word: len(word) for word in _CALIBRATION_REGEX.findall(text.lower())}
+
+CHORES = ["buy groceries", "finish the quarterly report", "call the plumber", "renew my passport",
+          "water the plants", "review pull requests", "pay the electricity bill", "book flights to rome",
+          "pick up the dry cleaning", "prepare slides for monday's meeting", "email the landlord"]
+LOCATIONS = ["london", "new york", "paris", "tokyo", "san francisco", "berlin", "sydney", "rio de janeiro"]
+TOPICS = ["technology", "business", "health", "sports", "science", "entertainment", "politics"]
+QUESTIONS = {
+    'time_question': ["what time is it", "What day is it?", "what date is it today", "hey, what time is it"],
+    'known_question': ["who are you", "What can you do?", "how do you work", "so who are you exactly"],
+    'other_question': ["why is the sky blue", "when is the next full moon", "where is my phone",
+                       "can you tell me a joke", "is it a holiday tomorrow", "does the store open early"]
+}
+UNKNOWN = ["play some music", "turn off the lights", "hello", "thanks", "order a pizza", "open the garage",
+           "lorem ipsum dolor sit amet", ""]
+
+# Date/time phrases by the parser rule they exercise
+PHRASES = {
+    'keyword': ["today", "tomorrow", "now", "by tomorrow", "today please"],
+    'relative': ["in {n} minutes", "in {n} hours", "in {n} days", "in {n} weeks", "in 1 hour"],
+    'weekday': ["monday", "on friday", "next tuesday", "by sunday", "saturday morning"],
+    'time': ["at {h} pm", "at {h}:30 am", "at {H}:{m}", "{h} pm", "{h}:15 am"],
+    'date': ["may {d}th", "3rd june", "december {d}", "{d} march", "jan {d}st"],
+    'no_match': ["someday", "whenever you can", "after lunch", "soon", "later this year"]
+}
+
+# Reminder times follow "at" or "on" in a command
+REMINDER_TIMES = ["{h} pm", "{h}:30 am", "{H}:{m}", "friday", "monday", "may {d}th", "{d} june"]
+
+def _fill(template, rng):
+    return template.format(n=rng.randint(1, 90), h=rng.randint(1, 12), H=rng.randint(0, 23),
+                           m=f'{rng.randint(0, 59):02d}', d=rng.randint(1, 28))
+
+def generate_commands(count, seed=0):
+    """Return commands of every kind in realistic proportions"""
+    rng = random.Random(seed)
+    deadlines = [p for group in ('keyword', 'weekday', 'date') for p in PHRASES[group]]
+    generators = [
+        (30, 'add_task', lambda: rng.choice(["add task {}", "create a task to {}", "add a task called {}",
+                                             "I need to {}"]).format(rng.choice(CHORES))),
+        (20, 'add_task_deadline', lambda: rng.choice(["add task {} by {}", "create a task to {} due {}",
+                                                      "I need to {} by {}"]).format(
+            rng.choice(CHORES), _fill(rng.choice(deadlines), rng))),
+        (20, 'add_reminder', lambda: rng.choice(["remind me about {} at {}", "set a reminder for {} on {}",
+                                                 "set reminder to {} at {}", "remind me {} on {}"]).format(
+            rng.choice(CHORES), _fill(rng.choice(REMINDER_TIMES), rng))),
+        (10, 'weather', lambda: rng.choice(["what's the weather in {}", "weather in {}", "show the weather for {}",
+                                            "what is the weather"]).format(rng.choice(LOCATIONS))),
+        (8, 'news', lambda: rng.choice(["what's the news about {}", "get news on {}", "latest news",
+                                        "tell me the news about {}"]).format(rng.choice(TOPICS))),
+        (7, 'question', lambda: rng.choice([q for group in QUESTIONS.values() for q in group])),
+        (5, 'unknown', lambda: rng.choice(UNKNOWN)),
+    ]
+    weights = [weight for weight, _, _ in generators]
+    commands = []
+    for _ in range(count):
+        generate = rng.choices(generators, weights)[0][2]
+        command = generate()
+        if rng.random() < 0.2:
+            command = command.capitalize()
+        commands.append(command)
+    return commands
+
+def intent_groups(commands):
+    """Group commands by the intent they are classified as, with tasks split by whether they have a deadline"""
+    groups = {}
+    for command in commands:
+        result = process_natural_language_command(command)
+        group = result['intent'] + ('_deadline' if result.get('deadline') else '')
+        groups.setdefault(group, []).append(command)
+    return groups
+
+def generate_phrases(count, seed=0):
+    """Return (phrase type, phrase) pairs, an equal share of each type"""
+    rng = random.Random(seed)
+    types = list(PHRASES)
+    return [(kind, _fill(rng.choice(PHRASES[kind]), rng)) for kind in (types[n % len(types)] for n in range(count))]
+
+def _group(pairs):
+    groups = {}
+    for name, text in pairs:
+        groups.setdefault(name, []).append(text)
+    return groups
+
+def _rate(func, inputs):
+    """Calls per second over one run of at least MIN_RUN_SECONDS"""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for text in inputs:
+            func(text)
+        calls += len(inputs)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_RUN_SECONDS:
+            return calls / elapsed
+
+def measure(func, inputs):
+    """
+    Measure a function over a list of inputs
+    
+    Returns:
+        dict: Best calls per second over TIMED_RUNS runs and its ratio to
+            the best calibration rate, and tracemalloc's peak and retained
+            bytes per call for one pass over the inputs
+    """
+    for text in inputs:
+        func(text)
+    
+    rates, calibrations = [], []
+    gc.disable()
+    try:
+        for _ in range(TIMED_RUNS):
+            calibrations.append(_rate(_calibration, _CALIBRATION_TEXTS))
+            rates.append(_rate(func, inputs))
+        calibrations.append(_rate(_calibration, _CALIBRATION_TEXTS))
+    finally:
+        gc.enable()
+    
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        results = [func(text) for text in inputs]
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del results
+    return {
+        'calls_per_second': round(max(rates)),
+        'relative_speed': round(max(rates) / max(calibrations), 4),
+        'peak_bytes_per_call': round((peak - before) / len(inputs), 1),
+        'retained_bytes_per_call': round((current - before) / len(inputs), 1)
+    }
+
+def run_benchmarks(commands, phrases):
+    """Return results by function, then by intent or phrase type"""
+    by_intent = intent_groups(commands)
+    questions = _group((kind, q) for kind, group in QUESTIONS.items() for q in group)
+    by_type = _group(phrases)
+    return {
+        'process_natural_language_command': {
+            intent: measure(process_natural_language_command, texts) for intent, texts in sorted(by_intent.items())
+        },
+        'answer_question': {
+            kind: measure(answer_question, texts) for kind, texts in sorted(questions.items())
+        },
+        'parse_datetime_from_text': {
+            kind: measure(parse_datetime_from_text, texts) for kind, texts in sorted(by_type.items())
+        }
+    }
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline
+    
+    Returns:
+        list: (function, group, message) for every regression beyond threshold
+    """
+    regressions = []
+    for function, groups in baseline.items():
+        for group, expected in groups.items():
+            actual = results.get(function, {}).get(group)
+            if actual is None:
+                continue
+            speed_threshold = threshold
+            if expected['calls_per_second'] * FAST_CALL_SECONDS > 1:
+                speed_threshold *= FAST_GROUP_THRESHOLD_FACTOR
+            if actual['relative_speed'] < expected['relative_speed'] * (1 - speed_threshold):
+                regressions.append((function, group, f"relative throughput {expected['relative_speed']} -> "
+                                                     f"{actual['relative_speed']} ({actual['calls_per_second']:,} calls/sec)"))
+            limit = max(expected['peak_bytes_per_call'] * (1 + threshold), ALLOCATION_SLACK)
+            if actual['peak_bytes_per_call'] > limit:
+                regressions.append((function, group, f"peak allocation {expected['peak_bytes_per_call']:,} -> "
+                                                     f"{actual['peak_bytes_per_call']:,} bytes/call"))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--commands', type=int, default=5000, help='size of the generated command corpus')
+    parser.add_argument('--phrases', type=int, default=3000, help='size of the generated date/time corpus')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='fractional slowdown or allocation growth that fails the check')
+    parser.add_argument('--update-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--output', help='also write the results as JSON here')
+    args = parser.parse_args()
+    
+    results = run_benchmarks(generate_commands(args.commands, args.seed),
+                             generate_phrases(args.phrases, args.seed))
+    
+    print(f"{'function':34} {'group':18} {'calls/sec':>12} {'relative':>9} {'peak B/call':>12} {'kept B/call':>12}")
+    for function, groups in results.items():
+        for group, r in groups.items():
+            print(f"{function:34} {group:18} {r['calls_per_second']:12,} {r['relative_speed']:9.4f} "
+                  f"{r['peak_bytes_per_call']:12,.1f} {r['retained_bytes_per_call']:12,.1f}")
+    
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'commands': args.commands, 'phrases': args.phrases, 'seed': args.seed},
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"baseline written to {args.baseline}")
+        return
+    
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update-baseline to create one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['results'], args.threshold)
+    for function, group, message in regressions:
+        print(f"REGRESSION {function} [{group}]: {message}")
+    if regressions:
+        sys.exit(1)
+    print(f"no regressions beyond {args.threshold:.0%} against {args.baseline} "
+          f"(recorded on Python {baseline.get('python')})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""
+Microbenchmark for utils.datetime_parser.parse_datetime_from_text
+
+Generates a random corpus of date/time phrases and checks that the memoized
+parser returns exactly what the original sequential parser (kept below as
+the reference implementation) returns, including the exceptions it raises,
+for a spread of anchor times, and that the bulk parser agrees with it.
+Then compares throughput on a realistic mix of repeated phrases, and an
+import-sized batch parsed line by line against one bulk call.
+
+Usage:
+    python -m benchmarks.bench_datetime_parser [--phrases N] [--repeat N] [--seed N]
+"""
+import argparse
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+from utils.datetime_parser import parse_datetime_from_text, parse_datetimes_from_texts, DAYS_OF_WEEK, MONTHS
+
+# Phrases that commands commonly produce, for the throughput comparison
+COMMON_PHRASES = [
+    "tomorrow", "today", "at 5 pm", "at 9 am", "at 18:30", "friday", "monday",
+    "in 10 minutes", "in 2 hours", "may 15th", "3rd june", "next week", "",
+]
+
+ANCHORS = [
+    datetime(2024, 2, 28, 23, 59, 59),
+    datetime(2024, 2, 29, 12, 0, 0),
+    datetime(2024, 12, 31, 23, 30, 0),
+    datetime(2025, 1, 1, 0, 0, 0),
+    datetime(2025, 6, 15, 9, 0, 0),
+    datetime(2025, 3, 31, 8, 15, 30, 123456),
+] + [datetime(2025, 9, 1, 10, 0, 0) + timedelta(days=n) for n in range(7)]
+
+def legacy_parse_datetime_from_text(text, now):
+    """The original sequential parser, used as the reference implementation"""
+    if not text:
+        return None
+    
+    text = text.lower()
+    
+    if "now" in text:
+        return now
+    
+    if "today" in text:
+        return datetime(now.year, now.month, now.day, 23, 59, 59)
+    
+    if "tomorrow" in text:
+        tomorrow = now + timedelta(days=1)
+        return datetime(tomorrow.year, tomorrow.month, tomorrow.day, 23, 59, 59)
+    
+    in_pattern = r"in (\d+) (minute|minutes|hour|hours|day|days|week|weeks)"
+    in_match = re.search(in_pattern, text)
+    if in_match:
+        amount = int(in_match.group(1))
+        unit = in_match.group(2)
+        
+        if unit in ["minute", "minutes"]:
+            return now + timedelta(minutes=amount)
+        elif unit in ["hour", "hours"]:
+            return now + timedelta(hours=amount)
+        elif unit in ["day", "days"]:
+            return now + timedelta(days=amount)
+        elif unit in ["week", "weeks"]:
+            return now + timedelta(weeks=amount)
+    
+    days_of_week = {
+        "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+        "friday": 4, "saturday": 5, "sunday": 6
+    }
+    
+    for day, day_num in days_of_week.items():
+        if day in text:
+            days_ahead = day_num - now.weekday()
+            if days_ahead <= 0:
+                days_ahead += 7
+            
+            target_date = now + timedelta(days=days_ahead)
+            return datetime(target_date.year, target_date.month, target_date.day, 9, 0, 0)
+    
+    time_patterns = [
+        r"at (\d+)(?::(\d+))?\s*(am|pm)?",
+        r"(\d+)(?::(\d+))?\s*(am|pm)"
+    ]
+    
+    for pattern in time_patterns:
+        time_match = re.search(pattern, text)
+        if time_match:
+            hour = int(time_match.group(1))
+            minute = int(time_match.group(2)) if time_match.group(2) else 0
+            am_pm = time_match.group(3)
+            
+            if am_pm and am_pm.lower() == 'pm' and hour < 12:
+                hour += 12
+            
+            if am_pm and am_pm.lower() == 'am' and hour == 12:
+                hour = 0
+            
+            return datetime(now.year, now.month, now.day, hour, minute, 0)
+    
+    months = {
+        "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+        "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+        "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8,
+        "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12
+    }
+    
+    month_day_pattern = r"(\w+)\s+(\d+)(?:st|nd|rd|th)?"
+    month_day_match = re.search(month_day_pattern, text)
+    
+    if month_day_match:
+        month_name = month_day_match.group(1).lower()
+        day = int(month_day_match.group(2))
+        
+        if month_name in months:
+            month = months[month_name]
+            year = now.year
+            
+            if month < now.month or (month == now.month and day < now.day):
+                year += 1
+            
+            try:
+                return datetime(year, month, day, 9, 0, 0)
+            except ValueError:
+                return None
+    
+    day_month_pattern = r"(\d+)(?:st|nd|rd|th)?\s+(\w+)"
+    day_month_match = re.search(day_month_pattern, text)
+    
+    if day_month_match:
+        day = int(day_month_match.group(1))
+        month_name = day_month_match.group(2).lower()
+        
+        if month_name in months:
+            month = months[month_name]
+            year = now.year
+            
+            if month < now.month or (month == now.month and day < now.day):
+                year += 1
+            
+            try:
+                return datetime(year, month, day, 9, 0, 0)
+            except ValueError:
+                return None
+    
+    return None
+
+def generate_phrases(count, seed=0):
+    """Return random phrases mixing every rule the parser knows with near misses"""
+    rng = random.Random(seed)
+    words = ["remind me", "meeting", "call mom", "know", "snow", "at", "in", "the", "pay rent",
+             "maybe", "mayday", "sat", "sundae", "montage", "todays", "nowhere", "row", "y", ""]
+    units = ["minute", "minutes", "hour", "hours", "day", "days", "week", "weeks", "months", "secs"]
+    keywords = ["now", "today", "tomorrow"] + list(DAYS_OF_WEEK)
+    
+    def number():
+        return str(rng.choice([0, 1, 2, 3, 5, 9, 11, 12, 13, 15, 23, 24, 28, 29, 30, 31, 32, 59, 60, 99,
+                               rng.randint(0, 10 ** rng.randint(1, 12))]))
+    
+    fragments = [
+        lambda: rng.choice(keywords),
+        lambda: rng.choice(keywords) + rng.choice(keywords),
+        lambda: f"in {number()} {rng.choice(units)}",
+        lambda: f"at {number()}" + rng.choice(["", f":{number()}"]) + rng.choice(["", " ", "  "]) + rng.choice(["", "am", "pm"]),
+        lambda: number() + rng.choice(["", f":{number()}"]) + rng.choice(["", " "]) + rng.choice(["am", "pm", "a.m."]),
+        lambda: rng.choice(list(MONTHS) + words) + rng.choice([" ", "  ", "\t"]) + number() + rng.choice(["", "st", "nd", "rd", "th"]),
+        lambda: number() + rng.choice(["", "st", "nd", "rd", "th"]) + rng.choice([" ", "  "]) + rng.choice(list(MONTHS) + words),
+        lambda: rng.choice(words),
+        lambda: number(),
+    ]
+    phrases = []
+    for _ in range(count):
+        phrase = ' '.join(rng.choice(fragments)() for _ in range(rng.randint(1, 4)))
+        if rng.random() < 0.2:
+            phrase = phrase.upper()
+        elif rng.random() < 0.2:
+            phrase = phrase.title()
+        phrases.append(phrase)
+    return phrases
+
+def _outcome(func, text, now):
+    try:
+        return func(text, now)
+    except Exception as e:
+        return type(e)
+
+def check_equivalence(phrases, anchors=ANCHORS):
+    """Raise AssertionError if the two implementations disagree on any phrase and anchor"""
+    for now in anchors:
+        for text in phrases:
+            expected = _outcome(legacy_parse_datetime_from_text, text, now)
+            actual = _outcome(parse_datetime_from_text, text, now)
+            assert actual == expected, f"{text!r} at {now}: expected {expected}, got {actual}"
+
+def check_bulk_equivalence(phrases, anchors=ANCHORS):
+    """Raise AssertionError if bulk parsing disagrees with parsing one text at a time"""
+    for now in anchors:
+        expected = [_outcome(parse_datetime_from_text, text, now) for text in phrases]
+        expected = [None if isinstance(e, type) else e for e in expected]
+        assert parse_datetimes_from_texts(phrases, now) == expected, f"bulk parse differs at {now}"
+
+def phrases_per_second(func, phrases, repeat):
+    now = datetime.now()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in phrases:
+            _outcome(func, text, now)
+    elapsed = time.perf_counter() - start
+    return repeat * len(phrases) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--phrases', type=int, default=20000, help='size of the generated corpus')
+    parser.add_argument('--repeat', type=int, default=2000, help='passes over the common phrases')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    phrases = generate_phrases(args.phrases, args.seed)
+    check_equivalence(phrases + COMMON_PHRASES)
+    check_bulk_equivalence(phrases + COMMON_PHRASES)
+    print(f"equivalent on {len(phrases) + len(COMMON_PHRASES):,} phrases x {len(ANCHORS)} anchor times")
+    
+    before = phrases_per_second(legacy_parse_datetime_from_text, COMMON_PHRASES, args.repeat)
+    after = phrases_per_second(parse_datetime_from_text, COMMON_PHRASES, args.repeat)
+    print(f"sequential parser: {before:12,.0f} phrases/sec")
+    print(f"memoized parser:   {after:12,.0f} phrases/sec")
+    print(f"speedup: {after / before:.2f}x")
+    
+    # Unique phrases never hit the memo, so this measures the compiled rules alone
+    unique = generate_phrases(args.phrases, args.seed + 1)
+    before = phrases_per_second(legacy_parse_datetime_from_text, unique, 1)
+    after = phrases_per_second(parse_datetime_from_text, unique, 1)
+    print(f"uncached: {before:,.0f} -> {after:,.0f} phrases/sec ({after / before:.2f}x)")
+    
+    # An import batch: mostly repeated phrases, one line per imported task
+    rng = random.Random(args.seed)
+    batch = [rng.choice(COMMON_PHRASES) if rng.random() < 0.9 else rng.choice(unique) for _ in range(10000)]
+    start = time.perf_counter()
+    for text in batch:
+        _outcome(lambda text, now: parse_datetime_from_text(text), text, None)
+    one_by_one = time.perf_counter() - start
+    start = time.perf_counter()
+    parse_datetimes_from_texts(batch)
+    bulk = time.perf_counter() - start
+    print(f"10,000-line import: {one_by_one * 1000:.1f} ms one by one, {bulk * 1000:.1f} ms in bulk")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmark pooled vs unpooled HTTP requests against a local stub server
+
+Compares module-level requests.get (a new connection per call) with the
+shared keep-alive session from utils.http_client, from several threads.
+
+Usage:
+    python -m benchmarks.bench_http_client [--requests N] [--threads N]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.stub_server import StubServer
+from utils.http_client import http_get
+
+def run(get, url, total, threads):
+    """Issue total GETs from a thread pool and return (requests/sec, connections)"""
+    with StubServer() as server:
+        target = f'{server.url}/{url}'
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            for response in executor.map(lambda _: get(target), range(total)):
+                response.raise_for_status()
+        elapsed = time.perf_counter() - start
+        return total / elapsed, server.connection_count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000, help='requests per run')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent client threads')
+    args = parser.parse_args()
+    
+    unpooled = run(lambda url: requests.get(url, timeout=10), 'London?format=j1', args.requests, args.threads)
+    pooled = run(http_get, 'London?format=j1', args.requests, args.threads)
+    print(f"unpooled requests.get: {unpooled[0]:10,.0f} req/sec, {unpooled[1]} connections")
+    print(f"pooled session:        {pooled[0]:10,.0f} req/sec, {pooled[1]} connections")
+    print(f"speedup: {pooled[0] / unpooled[0]:.2f}x")
+
+if __name__ == '__main__':
+    main()
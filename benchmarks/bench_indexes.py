@@ -0,0 +1,83 @@
+"""
+Measure per-user route latency on a large seeded database, with and without
+the composite indexes declared in models.py
+
+Seeds a scratch SQLite database (1M tasks by default), then times the
+listing and lookup routes through the Flask test client while logged in as
+one user, first with the model indexes and then with them dropped.
+
+Usage:
+    python -m benchmarks.bench_indexes [--tasks N] [--users N] [--repeat N]
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=1000000)
+    parser.add_argument('--reminders', type=int, default=200000)
+    parser.add_argument('--uploads', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20, help='requests per route')
+    args = parser.parse_args()
+    
+    # The app reads DATABASE_URL at import, so point it at a scratch file first
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    logging.disable(logging.INFO)
+    
+    from benchmarks.seed import seed_database, SEED_PASSWORD
+    from app import db
+    from main import app
+    
+    print(f"seeding {args.tasks:,} tasks, {args.reminders:,} reminders, {args.uploads:,} uploads...")
+    seed_database(args.users, args.tasks, args.reminders, args.uploads)
+    
+    client = app.test_client()
+    client.post('/login', data={'username': 'user1', 'password': SEED_PASSWORD})
+    with app.app_context():
+        from models import Task
+        task_id = db.session.query(Task.id).filter_by(user_id=1).first()[0]
+    
+    # The listings stream their bodies, so buffered reads and closes each
+    # body within the timing, like a server would
+    routes_to_time = [
+        ('GET /api/tasks', lambda: client.get('/api/tasks', buffered=True)),
+        ('GET /api/tasks?since', lambda: client.get('/api/tasks?since=' + since, buffered=True)),
+        ('PUT /api/tasks/<id>', lambda: client.put(f'/api/tasks/{task_id}', json={'completed': True}, buffered=True)),
+        ('GET /api/reminders', lambda: client.get('/api/reminders', buffered=True)),
+        ('GET /api/files', lambda: client.get('/api/files', buffered=True)),
+    ]
+    since = client.get('/api/tasks', buffered=True).get_json()['cursor']
+    
+    def measure():
+        results = {}
+        for name, request in routes_to_time:
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                response = request()
+                samples.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, (name, response.status_code)
+            results[name] = statistics.median(samples)
+        return results
+    
+    indexed = measure()
+    with app.app_context():
+        indexes = [index for table in db.metadata.sorted_tables for index in table.indexes]
+        with db.engine.begin() as connection:
+            for index in indexes:
+                index.drop(connection)
+            connection.exec_driver_sql('ANALYZE')
+    unindexed = measure()
+    
+    print(f"{'route':24} {'no indexes':>12} {'indexed':>12}")
+    for name, _ in routes_to_time:
+        print(f"{name:24} {unindexed[name]:10.2f}ms {indexed[name]:10.2f}ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Microbenchmark for utils.nlp_processor.process_natural_language_command
+
+Compares the compiled single-pass intent classifier against the original
+sequential re.search cascade (kept below as the reference implementation),
+after checking that both return identical results for the whole corpus.
+
+Usage:
+    python -m benchmarks.bench_nlp_processor [--repeat N]
+"""
+import argparse
+import re
+import time
+
+from utils.nlp_processor import process_natural_language_command
+
+COMMANDS = [
+    "Add task buy groceries",
+    "add a task to do finish the report by Friday",
+    "Create task called call the plumber due May 15th",
+    "create a task review pull requests on 3rd june",
+    "I need to renew my passport by tomorrow",
+    "remind me to water the plants at 18:30",
+    "Remind me about the dentist appointment on Monday",
+    "set a reminder for team standup at 9 am",
+    "remind me the meeting at 3 pm",
+    "What's the weather like in Paris",
+    "what is the weather",
+    "weather in new york",
+    "show the weather for London",
+    "what's the news about technology",
+    "get news on business",
+    "latest news",
+    "what time is it",
+    "who are you",
+    "how do you work",
+    "can you help me",
+    "does it rain much in seattle",
+    "is it going to be sunny",
+    "play some music",
+    "open the pod bay doors",
+    "turn off the lights in the kitchen",
+    "",
+]
+
+def legacy_process_natural_language_command(command):
+    """The original sequential cascade, used as the reference implementation"""
+    command = command.lower().strip()
+    
+    task_patterns = [
+        r"add (?:a )?task(?: to)?(?: do)?(?: called)? (.+)",
+        r"create (?:a )?task(?: called)? (.+)",
+        r"(?:i need to|remind me to) (.+)"
+    ]
+    
+    for pattern in task_patterns:
+        task_match = re.search(pattern, command)
+        if task_match:
+            task_title = task_match.group(1).strip()
+            deadline = None
+            deadline_patterns = [
+                r"(?:by|due|on|at) (\w+ \d+(?:st|nd|rd|th)?)",
+                r"(?:by|due|on|at) (\d+(?:st|nd|rd|th)? \w+)",
+                r"(?:by|due|on|at) (\w+day)",
+                r"(?:by|due|on|at) (\d+:\d+)"
+            ]
+            for d_pattern in deadline_patterns:
+                deadline_match = re.search(d_pattern, command)
+                if deadline_match:
+                    deadline = deadline_match.group(1)
+                    task_title = re.sub(d_pattern, "", task_title).strip()
+                    break
+            return {'intent': 'add_task', 'title': task_title, 'deadline': deadline}
+    
+    reminder_patterns = [
+        r"remind me (?:to|about) (.+?) (?:at|on) (.+)",
+        r"set (?:a )?reminder (?:to|for) (.+?) (?:at|on) (.+)",
+        r"remind me (.+?) (?:at|on) (.+)"
+    ]
+    for pattern in reminder_patterns:
+        reminder_match = re.search(pattern, command)
+        if reminder_match:
+            return {
+                'intent': 'add_reminder',
+                'title': reminder_match.group(1).strip(),
+                'time': reminder_match.group(2).strip()
+            }
+    
+    weather_patterns = [
+        r"(?:what's|what is|how's|how is) the weather(?: like)?(?: in (.+))?",
+        r"weather(?: for| in)? (.+)",
+        r"(?:get|show|tell me)(?: the)? weather(?: for| in)? (.+)"
+    ]
+    for pattern in weather_patterns:
+        weather_match = re.search(pattern, command)
+        if weather_match:
+            location = weather_match.group(1) if weather_match.groups() and weather_match.group(1) else "current location"
+            return {'intent': 'weather', 'location': location.strip()}
+    
+    news_patterns = [
+        r"(?:what's|what is) (?:the )?news(?: about| on)? (.+)?",
+        r"(?:show|get|tell me)(?: the)? news(?: about| on)? (.+)?",
+        r"(?:latest|recent) news(?: about| on)? (.+)?"
+    ]
+    for pattern in news_patterns:
+        news_match = re.search(pattern, command)
+        if news_match:
+            topic = news_match.group(1) if news_match.groups() and news_match.group(1) else "general"
+            return {'intent': 'news', 'topic': topic.strip()}
+    
+    question_starters = ["what", "how", "why", "when", "where", "who", "can you", "tell me", "is", "are", "do", "does"]
+    if any(command.startswith(starter) for starter in question_starters):
+        return {'intent': 'question', 'query': command}
+    
+    return {'intent': 'unknown', 'original_command': command}
+
+def check_equivalence(commands):
+    """Raise AssertionError if the two implementations disagree on any command"""
+    for command in commands:
+        expected = legacy_process_natural_language_command(command)
+        actual = process_natural_language_command(command)
+        assert actual == expected, f"{command!r}: expected {expected}, got {actual}"
+
+def commands_per_second(func, commands, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for command in commands:
+            func(command)
+    elapsed = time.perf_counter() - start
+    return repeat * len(commands) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000, help='passes over the command corpus')
+    args = parser.parse_args()
+    
+    check_equivalence(COMMANDS)
+    
+    before = commands_per_second(legacy_process_natural_language_command, COMMANDS, args.repeat)
+    after = commands_per_second(process_natural_language_command, COMMANDS, args.repeat)
+    print(f"sequential cascade: {before:12,.0f} commands/sec")
+    print(f"compiled classifier: {after:11,.0f} commands/sec")
+    print(f"speedup: {after / before:.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Cold start-to-first-response benchmark
+
+Starts the app in fresh Python processes against a scratch database made
+once with `flask --app main init-db`, and times how long each takes to
+answer its first request, with AUTO_MIGRATE on (the schema is checked and
+upgraded on every start) and off (the separate init-db command has
+already done it). Each start is measured two ways:
+
+- test_client: a process that imports main, so create_app runs, and sends
+  GET /login through the Flask test client, timing the import and the
+  first response separately
+- wsgi_server: a process serving main:app on a local port, timed from
+  spawning it to the first HTTP 200 on /login, which includes interpreter
+  startup
+
+The test client runs also record whether requests and numpy were imported
+before the first response, since they should only load once a route needs
+them. Prints median, min and max milliseconds per mode as JSON.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs N] [--output FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_PATH = '/login'
+
+# Modules that should not be imported before the first response
+LAZY_MODULES = ('requests', 'numpy')
+
+# Seconds to wait for a server to answer before giving up on it
+SERVER_TIMEOUT = 60
+
+def _environment(directory, auto_migrate):
+    """Environment for a child process, with every path under directory"""
+    env = dict(os.environ)
+    env['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'assistant.db')}"
+    for name, subdirectory in (('BLOB_STORE_DIR', 'blobs'), ('VECTOR_INDEX_DIR', 'vectors'),
+                               ('UPLOAD_SPOOL_DIR', 'uploads')):
+        env[name] = os.path.join(directory, subdirectory)
+    env['SESSION_DB_PATH'] = os.path.join(directory, 'sessions.db')
+    env['AUTO_MIGRATE'] = '1' if auto_migrate else '0'
+    env['LOG_LEVEL'] = 'WARNING'
+    return env
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def child_test_client():
+    """Run in a child process: import the app, send the first request and print the timings as JSON"""
+    start = time.perf_counter()
+    from main import app
+    imported = time.perf_counter()
+    response = app.test_client().get(FIRST_PATH)
+    responded = time.perf_counter()
+    print(json.dumps({
+        'status': response.status_code,
+        'import_ms': (imported - start) * 1000,
+        'first_response_ms': (responded - imported) * 1000,
+        'total_ms': (responded - start) * 1000,
+        'lazy_modules_loaded': [name for name in LAZY_MODULES if name in sys.modules]
+    }))
+
+def child_server(port):
+    """Run in a child process: serve the app on port until killed"""
+    from werkzeug.serving import make_server
+    from main import app
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+def time_test_client(env):
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.bench_startup', '--child', 'test_client'],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    if sample['status'] != 200:
+        raise RuntimeError(f"GET {FIRST_PATH} returned {sample['status']}")
+    return sample
+
+def time_server(env):
+    """Milliseconds from spawning a server process to its first 200 response"""
+    port = _free_port()
+    url = f'http://127.0.0.1:{port}{FIRST_PATH}'
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_startup', '--child', 'server',
+                                '--port', str(port)], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(url, timeout=SERVER_TIMEOUT) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with {process.returncode}: {process.stderr.read().decode()}")
+            if time.perf_counter() - start > SERVER_TIMEOUT:
+                raise RuntimeError(f"server did not answer within {SERVER_TIMEOUT} seconds")
+            time.sleep(0.005)
+    finally:
+        process.kill()
+        process.wait()
+        process.stderr.close()
+
+def summarize(values):
+    return {
+        'median_ms': round(statistics.median(values), 1),
+        'min_ms': round(min(values), 1),
+        'max_ms': round(max(values), 1)
+    }
+
+def run(directory, runs):
+    """
+    Create the schema with init-db, then time cold starts with AUTO_MIGRATE on and off
+    
+    Args:
+        directory (str): Empty directory for the database and its files
+        runs (int): Cold starts per mode and method
+        
+    Returns:
+        dict: The report
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'main', 'init-db'],
+                   cwd=ROOT, env=_environment(directory, auto_migrate=False), capture_output=True, check=True)
+    report = {'init_db_ms': round((time.perf_counter() - start) * 1000, 1)}
+    
+    for mode, auto_migrate in (('auto_migrate', True), ('no_migrate', False)):
+        env = _environment(directory, auto_migrate)
+        # One unmeasured start so every measured one finds bytecode and the database file cached
+        time_test_client(env)
+        samples = [time_test_client(env) for _ in range(runs)]
+        server = [time_server(env) for _ in range(runs)]
+        report[mode] = {
+            'test_client': {
+                key: summarize([s[key] for s in samples]) for key in ('import_ms', 'first_response_ms', 'total_ms')
+            },
+            'wsgi_server': summarize(server),
+            'lazy_modules_loaded': sorted({name for s in samples for name in s['lazy_modules_loaded']})
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='cold starts per mode and method')
+    parser.add_argument('--directory', help='empty directory for assistant.db and its files (default: a temp dir)')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--child', choices=('test_client', 'server'), help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child == 'test_client':
+        return child_test_client()
+    if args.child == 'server':
+        return child_server(args.port)
+    
+    directory = os.path.abspath(args.directory or tempfile.mkdtemp())
+    report = {
+        'config': {'runs': args.runs, 'path': FIRST_PATH,
+                   'python': platform.python_version(), 'platform': platform.platform()},
+        **run(directory, args.runs)
+    }
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    for mode in ('auto_migrate', 'no_migrate'):
+        print(f"{mode}: first response {report[mode]['test_client']['total_ms']['median_ms']} ms in process, "
+              f"{report[mode]['wsgi_server']['median_ms']} ms from spawn", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
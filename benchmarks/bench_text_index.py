@@ -0,0 +1,78 @@
+"""
+Benchmark the passage index behind /api/files/<id>/query
+
+Generates a synthetic multi-megabyte document with a Zipf-like vocabulary,
+then reports index build time, serialized size, load time, and BM25 query
+latency against a baseline that rescans the full text for every query.
+
+Usage:
+    python -m benchmarks.bench_text_index [--megabytes N] [--queries N]
+"""
+import argparse
+import gc
+import random
+import re
+import statistics
+import time
+
+from utils.text_index import build_index, serialize_index, deserialize_index, score_passages, tokenize
+
+def generate_document(megabytes, vocabulary_size=20000, seed=0):
+    """Return synthetic text of roughly the given size and its vocabulary"""
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 10)))
+                  for _ in range(vocabulary_size)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary_size)]
+    sentences = []
+    size = 0
+    while size < megabytes * 1024 * 1024:
+        words = rng.choices(vocabulary, weights, k=rng.randint(8, 20))
+        sentence = ' '.join(words).capitalize() + '. '
+        sentences.append(sentence)
+        size += len(sentence)
+    return ''.join(sentences), vocabulary
+
+def rescan(text, query, top_k=5):
+    """Baseline: split the text into passages and count query terms in each"""
+    terms = set(tokenize(query))
+    words = re.findall(r"\w+", text.lower())
+    scores = []
+    for number in range(0, len(words), 80):
+        passage = words[number:number + 80]
+        score = sum(1 for word in passage if word in terms)
+        if score:
+            scores.append((score, number // 80))
+    return sorted(scores, reverse=True)[:top_k]
+
+def timed(func, *args):
+    gc.collect()
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--megabytes', type=float, default=5)
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+    
+    text, vocabulary = generate_document(args.megabytes)
+    rng = random.Random(1)
+    # Mix of common and rare terms, as real queries would be
+    queries = [' '.join(rng.choice(vocabulary[:2000] if rng.random() < 0.5 else vocabulary)
+                        for _ in range(rng.randint(1, 4))) for _ in range(args.queries)]
+    
+    index, build_ms = timed(build_index, text)
+    data, serialize_ms = timed(serialize_index, index)
+    _, load_ms = timed(deserialize_index, data)
+    
+    indexed = [timed(score_passages, {1: index}, query)[1] for query in queries]
+    scanned = [timed(rescan, text, query)[1] for query in queries[:max(1, args.queries // 10)]]
+    
+    print(f"document: {len(text) / 1024 / 1024:.1f} MB, {len(index['passages']):,} passages, {len(index['postings']):,} terms")
+    print(f"build: {build_ms:,.0f} ms, serialize: {serialize_ms:,.0f} ms ({len(data) / 1024 / 1024:.1f} MB), load: {load_ms:,.0f} ms")
+    print(f"BM25 query:  p50 {statistics.median(indexed):8.2f} ms, max {max(indexed):8.2f} ms")
+    print(f"full rescan: p50 {statistics.median(scanned):8.2f} ms, max {max(scanned):8.2f} ms")
+
+if __name__ == '__main__':
+    main()
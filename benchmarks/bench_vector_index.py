@@ -0,0 +1,67 @@
+"""
+Benchmark the semantic passage search behind mode='semantic' file queries
+
+Embeds a synthetic corpus into a memory-mapped VectorStore, one file at a
+time, then reports embedding throughput, incremental append time against
+rewriting the whole matrix, and query latency of the batched matrix-vector
+product against scoring passages one at a time in Python.
+
+Usage:
+    python -m benchmarks.bench_vector_index [--files N] [--megabytes N] [--queries N]
+"""
+import argparse
+import random
+import statistics
+import tempfile
+
+import numpy as np
+
+from benchmarks.bench_text_index import generate_document, timed
+from utils.text_index import build_index
+from utils.vector_index import VectorStore, embed_passages, embed_texts
+
+def python_search(vectors, query_vector, top_k=5):
+    """Baseline: score each passage with a Python dot product"""
+    query = query_vector.tolist()
+    scores = [(sum(a * b for a, b in zip(row, query)), i) for i, row in enumerate(vectors.tolist())]
+    return sorted(scores, reverse=True)[:top_k]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=10)
+    parser.add_argument('--megabytes', type=float, default=1)
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        store = VectorStore(directory)
+        embed_ms, append_ms, rewrite_ms = [], [], []
+        vocabulary = []
+        matrices = []
+        for file_id in range(1, args.files + 1):
+            text, vocabulary = generate_document(args.megabytes, seed=file_id)
+            passages = build_index(text)['passages']
+            vectors, ms = timed(embed_passages, text, passages)
+            embed_ms.append(ms)
+            append_ms.append(timed(store.append, 1, file_id, vectors, passages)[1])
+            # Baseline: rebuild the whole matrix for every upload
+            matrices.append(vectors)
+            rewrite_ms.append(timed(np.save, f'{directory}/rebuilt.npy', np.concatenate(matrices))[1])
+        
+        rng = random.Random(1)
+        queries = [' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4))) for _ in range(args.queries)]
+        query_vectors = embed_texts(queries)
+        searched = [timed(store.search, 1, q)[1] for q in query_vectors]
+        all_vectors = np.concatenate(matrices)
+        looped = [timed(python_search, all_vectors, q)[1] for q in query_vectors[:max(1, args.queries // 25)]]
+    
+    passages = len(all_vectors)
+    print(f"corpus: {args.files} files x {args.megabytes:g} MB, {passages:,} passages, "
+          f"{all_vectors.nbytes / 1024 / 1024:.1f} MB of vectors")
+    print(f"embed: {sum(embed_ms) / 1000 / (args.files * args.megabytes):,.2f} s per MB")
+    print(f"append: last {append_ms[-1]:8.2f} ms, rewrite whole matrix: last {rewrite_ms[-1]:8.2f} ms")
+    print(f"mmap matvec query:  p50 {statistics.median(searched):8.2f} ms, max {max(searched):8.2f} ms")
+    print(f"python loop query:  p50 {statistics.median(looped):8.2f} ms, max {max(looped):8.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Seed the configured database with synthetic users, tasks, reminders and
+uploads for benchmarking
+
+Every seeded user has the username ``user<n>`` and the password SEED_PASSWORD.
+Rows are spread evenly over the users and inserted in batches with Core
+inserts. Import this only after DATABASE_URL points at a scratch database.
+
+Usage:
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.seed --tasks 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app import db, blob_store
+from main import app
+from models import User, Task, Reminder, FileUpload
+
+SEED_PASSWORD = 'benchmark'
+BATCH_SIZE = 10000
+
+def _insert(model, rows):
+    """Insert rows from an iterable in batches"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            db.session.execute(db.insert(model), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(model), batch)
+
+def seed_database(users=100, tasks=10000, reminders=2000, uploads=500, seed=0):
+    """
+    Create the schema and insert synthetic rows
+    
+    Args:
+        users (int): Number of users
+        tasks (int): Total number of tasks
+        reminders (int): Total number of reminders
+        uploads (int): Total number of file uploads
+        seed (int): Random seed, so runs are reproducible
+        
+    Returns:
+        dict: Seconds taken, by table
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    password_hash = generate_password_hash(SEED_PASSWORD)
+    timings = {}
+    
+    def when(days):
+        return now + timedelta(seconds=rng.randint(-days * 86400, days * 86400))
+    
+    def ago(days):
+        return now - timedelta(seconds=rng.randint(0, days * 86400))
+    
+    with app.app_context():
+        db.create_all()
+        
+        start = time.perf_counter()
+        _insert(User, ({
+            'id': n, 'username': f'user{n}', 'email': f'user{n}@example.com', 'password_hash': password_hash
+        } for n in range(1, users + 1)))
+        timings['user'] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        _insert(Task, ({
+            'title': f'Task {n}',
+            'description': 'Seeded task',
+            'deadline': when(60) if rng.random() < 0.7 else None,
+            'completed': rng.random() < 0.6,
+            'created_at': ago(365),
+            'updated_at': ago(365),
+            'user_id': n % users + 1
+        } for n in range(tasks)))
+        timings['task'] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        _insert(Reminder, ({
+            'title': f'Reminder {n}',
+            'description': 'Seeded reminder',
+            'reminder_time': when(30),
+            'created_at': ago(365),
+            'updated_at': ago(365),
+            'user_id': n % users + 1
+        } for n in range(reminders)))
+        timings['reminder'] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        _insert(FileUpload, ({
+            'filename': f'notes-{n}.txt',
+            'content_type': 'text/plain',
+            'content_hash': blob_store.put(f'Seeded upload {n}. ' * 20),
+            'uploaded_at': ago(365),
+            'user_id': n % users + 1
+        } for n in range(uploads)))
+        timings['file_upload'] = time.perf_counter() - start
+        
+        db.session.commit()
+    return timings
+
+def add_arguments(parser):
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--reminders', type=int, default=2000)
+    parser.add_argument('--uploads', type=int, default=500)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser)
+    args = parser.parse_args()
+    timings = seed_database(args.users, args.tasks, args.reminders, args.uploads)
+    for table, seconds in timings.items():
+        print(f"{table:12} {seconds:8.2f}s")
+
+if __name__ == '__main__':
+    main()
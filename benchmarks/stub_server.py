@@ -0,0 +1,87 @@
+"""
+Local stand-ins for the external APIs used by utils.external_apis
+
+StubServer serves a canned wttr.in ``format=j1`` payload for any path except
+``/api/v4/...``, which gets a canned GNews top-headlines payload. It speaks
+HTTP/1.1 so clients can keep connections alive, and can add a fixed delay to
+every response to simulate upstream latency. Setting ``status`` to an error
+code makes every response fail with it instead. Request paths are recorded
+in ``paths``.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WEATHER_PAYLOAD = {
+    'current_condition': [{
+        'temp_C': '18', 'temp_F': '64', 'humidity': '60', 'precipMM': '0.0',
+        'windspeedKmph': '11', 'winddir16Point': 'WSW',
+        'weatherDesc': [{'value': 'Partly cloudy'}],
+        'weatherIconUrl': [{'value': ''}]
+    }],
+    'nearest_area': [{'areaName': [{'value': 'Stubville'}]}],
+    'weather': [{
+        'date': f'2024-01-0{day}', 'maxtempC': '20', 'mintempC': '9',
+        'hourly': [{'weatherDesc': [{'value': 'Sunny'}], 'chanceofrain': '0'}] * 8
+    } for day in range(1, 4)]
+}
+
+NEWS_PAYLOAD = {
+    'articles': [{
+        'title': f'Stub headline {n}',
+        'description': 'Served by the local stub server.',
+        'url': '#',
+        'publishedAt': '2024-01-01T00:00:00Z'
+    } for n in range(10)]
+}
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        self.server.request_count += 1
+        self.server.paths.append(self.path)
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        payload = NEWS_PAYLOAD if self.path.startswith('/api/v4/') else WEATHER_PAYLOAD
+        body = self.server.bodies[id(payload)] if self.server.status == 200 else b'{}'
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self, delay=0.0):
+        super().__init__(('127.0.0.1', 0), _StubHandler)
+        self.delay = delay
+        self.status = 200
+        self.request_count = 0
+        self.paths = []
+        self.connection_count = 0
+        self.bodies = {id(p): json.dumps(p).encode() for p in (WEATHER_PAYLOAD, NEWS_PAYLOAD)}
+        self._thread = None
+    
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}'
+    
+    def process_request(self, request, client_address):
+        self.connection_count += 1
+        super().process_request(request, client_address)
+    
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,105 @@
+import logging
+
+from sqlalchemy import inspect, text
+
+from app import db, blob_store
+
+logger = logging.getLogger(__name__)
+
+# Statements run after a column is added to an existing table, keyed by
+# (table, column), to fill it in for rows that predate it
+BACKFILLS = {
+    ('reminder', 'updated_at'): "UPDATE reminder SET updated_at = created_at WHERE updated_at IS NULL",
+    ('file_upload', 'status'): "UPDATE file_upload SET status = 'ready' WHERE status IS NULL",
+}
+
+# Rows moved per transaction when migrating upload text to the blob store
+MOVE_BATCH_SIZE = 500
+
+def upgrade_schema():
+    """
+    Bring an existing database up to date with the models
+    
+    db.create_all only creates missing tables, so this adds any model
+    columns missing from existing tables (new columns must be nullable or
+    have a server default), runs their backfills, and creates any missing
+    indexes, then moves data out of columns the models no longer have. It is
+    safe to run on every startup; the emptied columns are dropped separately
+    by drop_legacy_columns.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                logger.info(f"Adding column {table.name}.{column.name}")
+                connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+                backfill = BACKFILLS.get((table.name, column.name))
+                if backfill:
+                    connection.execute(text(backfill))
+            
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    logger.info(f"Creating index {index.name}")
+                    index.create(connection)
+    
+    _move_file_contents(inspector)
+
+def _move_file_contents(inspector):
+    """
+    Move upload text from the legacy file_upload.text_content column into the
+    blob store, leaving the emptied column for drop_legacy_columns
+    """
+    if 'file_upload' not in inspector.get_table_names():
+        return
+    if 'text_content' not in {column['name'] for column in inspector.get_columns('file_upload')}:
+        return
+    
+    select = text(
+        "SELECT id, text_content FROM file_upload "
+        "WHERE text_content IS NOT NULL AND content_hash IS NULL LIMIT :limit"
+    )
+    update = text("UPDATE file_upload SET content_hash = :content_hash, text_content = NULL WHERE id = :id")
+    moved = 0
+    while True:
+        with db.engine.begin() as connection:
+            rows = connection.execute(select, {'limit': MOVE_BATCH_SIZE}).all()
+            if not rows:
+                break
+            connection.execute(update, [
+                {'id': row.id, 'content_hash': blob_store.put(row.text_content)} for row in rows
+            ])
+            moved += len(rows)
+    if moved:
+        logger.info(f"Moved {moved} uploads to the blob store")
+
+def drop_legacy_columns():
+    """
+    Drop columns the models no longer have, once upgrade_schema has moved
+    their data
+    
+    Dropping a column rewrites the whole table under an exclusive lock, so
+    this only runs from the init-db command, never on worker startup.
+    """
+    inspector = inspect(db.engine)
+    if 'file_upload' not in inspector.get_table_names():
+        return
+    if 'text_content' not in {column['name'] for column in inspector.get_columns('file_upload')}:
+        return
+    
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE file_upload DROP COLUMN text_content'))
+    except Exception as e:
+        # Older SQLite versions cannot drop columns; the emptied column is harmless
+        logger.warning(f"Could not drop file_upload.text_content: {str(e)}")
@@ -1,7 +1,8 @@
 from datetime import datetime
-from app import db
+from sqlalchemy import event
+from app import db, blob_store, user_cache
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.passwords import hash_password, verify_password
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -12,14 +13,49 @@ class User(UserMixin, db.Model):
     reminders = db.relationship('Reminder', backref='owner', lazy='dynamic')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """
+        Check a password, replacing the stored hash if it was made with an
+        outdated PASSWORD_HASH_METHOD; the caller commits the change
+        """
+        valid, new_hash = verify_password(self.password_hash, password)
+        if new_hash:
+            self.password_hash = new_hash
+        return valid
     
     def __repr__(self):
         return f'<User {self.username}>'
 
+class UserIdentity(UserMixin):
+    """
+    The User fields that requests read, cached between requests by
+    app.load_user in place of a full ORM object
+    """
+    
+    def __init__(self, id, username, email):
+        self.id = id
+        self.username = username
+        self.email = email
+    
+    def __repr__(self):
+        return f'<UserIdentity {self.username}>'
+
+def load_user_identity(user_id):
+    """Return the UserIdentity for a user id, or None if there is no such user"""
+    row = db.session.execute(
+        db.select(User.id, User.username, User.email).where(User.id == user_id)
+    ).first()
+    return UserIdentity(row.id, row.username, row.email) if row else None
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user_identity(mapper, connection, target):
+    # Email, username or password changes take effect on the next request;
+    # Core UPDATEs bypass this and wait for USER_CACHE_TTL instead
+    user_cache.invalidate(target.id)
+
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -30,18 +66,35 @@ class Task(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
+    __table_args__ = (
+        db.Index('ix_task_user_completed_deadline', 'user_id', 'completed', 'deadline'),
+        db.Index('ix_task_user_updated', 'user_id', 'updated_at'),
+        # Page sort orders; see keyset_page
+        db.Index('ix_task_user_id', 'user_id', 'id'),
+        db.Index('ix_task_user_deadline', 'user_id', 'deadline'),
+        db.Index('ix_task_user_created', 'user_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Task {self.title}>'
     
+    # Columns read by serialize, for column-level selects in list responses
+    DICT_COLUMNS = ('id', 'title', 'description', 'deadline', 'completed', 'created_at', 'updated_at')
+    
     def to_dict(self):
+        return self.serialize(self)
+    
+    @staticmethod
+    def serialize(row):
+        """Convert an instance or a row of DICT_COLUMNS to a dict"""
         return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'deadline': self.deadline.isoformat() if self.deadline else None,
-            'completed': self.completed,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'id': row.id,
+            'title': row.title,
+            'description': row.description,
+            'deadline': row.deadline.isoformat() if row.deadline else None,
+            'completed': row.completed,
+            'created_at': row.created_at.isoformat(),
+            'updated_at': row.updated_at.isoformat()
         }
 
 class Reminder(db.Model):
@@ -50,28 +103,108 @@ class Reminder(db.Model):
     description = db.Column(db.Text, nullable=True)
     reminder_time = db.Column(db.DateTime, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
+    __table_args__ = (
+        db.Index('ix_reminder_user_time', 'user_id', 'reminder_time'),
+        db.Index('ix_reminder_time', 'reminder_time'),
+        db.Index('ix_reminder_user_updated', 'user_id', 'updated_at'),
+        # Page sort orders; see keyset_page
+        db.Index('ix_reminder_user_id', 'user_id', 'id'),
+        db.Index('ix_reminder_user_created', 'user_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Reminder {self.title}>'
     
+    # Columns read by serialize, for column-level selects in list responses
+    DICT_COLUMNS = ('id', 'title', 'description', 'reminder_time', 'created_at', 'updated_at')
+    
     def to_dict(self):
+        return self.serialize(self)
+    
+    @staticmethod
+    def serialize(row):
+        """Convert an instance or a row of DICT_COLUMNS to a dict"""
         return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'reminder_time': self.reminder_time.isoformat(),
-            'created_at': self.created_at.isoformat()
+            'id': row.id,
+            'title': row.title,
+            'description': row.description,
+            'reminder_time': row.reminder_time.isoformat(),
+            'created_at': row.created_at.isoformat(),
+            'updated_at': row.updated_at.isoformat() if row.updated_at else None
         }
 
 class FileUpload(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
     content_type = db.Column(db.String(100), nullable=False)
-    text_content = db.Column(db.Text, nullable=True)
+    # Key of the extracted text in the blob store; bodies are kept off this table
+    content_hash = db.Column(db.String(64), nullable=True)
+    # Text extraction state: pending, ready or failed
+    status = db.Column(db.String(20), default='ready')
+    error = db.Column(db.Text, nullable=True)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     user = db.relationship('User', backref=db.backref('uploads', lazy=True))
+    index = db.relationship('FileIndex', uselist=False, lazy='select')
+    
+    __table_args__ = (
+        db.Index('ix_file_upload_user_uploaded', 'user_id', 'uploaded_at'),
+        db.Index('ix_file_upload_user_id', 'user_id', 'id'),
+    )
     
     def __repr__(self):
         return f'<FileUpload {self.filename}>'
+    
+    @property
+    def text_content(self):
+        """The extracted text, read from the blob store on each access"""
+        return blob_store.read(self.content_hash) if self.content_hash else None
+    
+    @text_content.setter
+    def text_content(self, text):
+        self.content_hash = blob_store.put(text) if text else None
+    
+    # Columns read by serialize, for column-level selects in list responses
+    DICT_COLUMNS = ('id', 'filename', 'content_type', 'status', 'error', 'uploaded_at')
+    
+    def to_dict(self):
+        return self.serialize(self)
+    
+    @staticmethod
+    def serialize(row):
+        """Convert an instance or a row of DICT_COLUMNS to a dict"""
+        return {
+            'id': row.id,
+            'filename': row.filename,
+            'content_type': row.content_type,
+            'status': row.status or 'ready',
+            'error': row.error,
+            'uploaded_at': row.uploaded_at.isoformat()
+        }
+
+class FileIndex(db.Model):
+    """Serialized inverted index of a FileUpload's text, kept off the uploads table"""
+    file_id = db.Column(db.Integer, db.ForeignKey('file_upload.id'), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<FileIndex {self.file_id}>'
+
+class Tombstone(db.Model):
+    """Record of a deleted task or reminder, for incremental sync"""
+    id = db.Column(db.Integer, primary_key=True)
+    record_type = db.Column(db.String(20), nullable=False)
+    record_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_tombstone_user_type_deleted', 'user_id', 'record_type', 'deleted_at'),
+    )
+    
+    def __repr__(self):
+        return f'<Tombstone {self.record_type} {self.record_id}>'
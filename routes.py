@@ -1,48 +1,93 @@
 import json
 import os
-from datetime import datetime
-from flask import render_template, redirect, url_for, request, flash, jsonify, session
+from datetime import datetime, timedelta
+from functools import partial
+from flask import (Blueprint, current_app, render_template, redirect, url_for, request, flash, jsonify, session,
+                   Response, stream_with_context)
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash
 from werkzeug.utils import secure_filename
 import io
-import tempfile
+import queue
+import threading
+import time
 
-from app import app, db
-from models import User, Task, Reminder, FileUpload
+from app import db, blob_store
+from models import User, Task, Reminder, FileUpload, FileIndex, Tombstone
 from utils.nlp_processor import process_natural_language_command, answer_question
-from utils.datetime_parser import parse_datetime_from_text
-from utils.external_apis import get_weather_data, get_news_data
+from utils.datetime_parser import parse_datetime_from_text, parse_datetimes_from_texts
+from utils.reminder_scheduler import ReminderScheduler
+from utils.pagination import encode_cursor, decode_cursor, keyset_page
+from utils.json_stream import stream_json_object
+from utils.text_index import INDEX_VERSION, build_index, serialize_index, deserialize_index, score_passages
+from utils.cache import TTLCache
+from utils.passwords import HashingBusy
+from utils.metrics import registry
 
-@app.route('/')
+# The external API clients (requests), upload extraction and vector search
+# (numpy) are imported where they are first used, so workers don't pay for
+# them before serving anything
+
+bp = Blueprint('main', __name__)
+
+def _load_upcoming_reminders(app, since):
+    with app.app_context():
+        reminders = Reminder.query.filter(Reminder.reminder_time >= since).all()
+        return [(r.id, r.user_id, r.reminder_time, r.to_dict()) for r in reminders]
+
+# Decoded file indexes, which never change once built
+file_index_cache = TTLCache(ttl=3600, maxsize=256)
+registry.register_cache('file_index', file_index_cache)
+
+@bp.record_once
+def _init_app(state):
+    app = state.app
+    app.extensions['reminder_scheduler'] = ReminderScheduler(
+        partial(_load_upcoming_reminders, app),
+        resync_interval=app.config['REMINDER_RESYNC_INTERVAL']
+    )
+    app.extensions['reminder_stream_slots'] = threading.BoundedSemaphore(app.config['REMINDER_STREAM_SLOTS'])
+    file_index_cache.maxsize = app.config['FILE_INDEX_CACHE_SIZE']
+
+def _reminder_scheduler():
+    return current_app.extensions['reminder_scheduler']
+
+@bp.route('/')
 def index():
     if current_user.is_authenticated:
         return render_template('index.html', now=datetime.now())
-    return redirect(url_for('login'))
+    return redirect(url_for('.login'))
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('.index'))
     
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
         
         user = User.query.filter_by(username=username).first()
-        if user is None or not user.check_password(password):
+        try:
+            valid = user is not None and user.check_password(password)
+        except HashingBusy:
+            flash('The server is busy, please try again in a moment')
+            return redirect(url_for('.login'))
+        if not valid:
             flash('Invalid username or password')
-            return redirect(url_for('login'))
+            return redirect(url_for('.login'))
         
+        # Saves the password hash if check_password upgraded it
+        db.session.commit()
         login_user(user, remember=True)
-        return redirect(url_for('index'))
+        return redirect(url_for('.index'))
     
     return render_template('login.html', now=datetime.now())
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('.index'))
     
     if request.method == 'POST':
         username = request.form.get('username')
@@ -51,32 +96,36 @@ def register():
         
         if User.query.filter_by(username=username).first():
             flash('Username already taken')
-            return redirect(url_for('register'))
+            return redirect(url_for('.register'))
         
         if User.query.filter_by(email=email).first():
             flash('Email already registered')
-            return redirect(url_for('register'))
+            return redirect(url_for('.register'))
         
         user = User(username=username, email=email)
-        user.set_password(password)
+        try:
+            user.set_password(password)
+        except HashingBusy:
+            flash('The server is busy, please try again in a moment')
+            return redirect(url_for('.register'))
         
         db.session.add(user)
         db.session.commit()
         
         flash('Registration successful! Please log in.')
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
     
     return render_template('register.html', now=datetime.now())
 
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     logout_user()
-    return redirect(url_for('login'))
+    return redirect(url_for('.login'))
 
 # API ROUTES
 
-@app.route('/api/process-command', methods=['POST'])
+@bp.route('/api/process-command', methods=['POST'])
 @login_required
 def process_command():
     data = request.get_json()
@@ -116,6 +165,7 @@ def process_command():
         )
         db.session.add(reminder)
         db.session.commit()
+        _reminder_scheduler().add(reminder)
         return jsonify({
             'success': True,
             'message': 'Reminder set successfully',
@@ -133,8 +183,9 @@ def process_command():
     
     elif result['intent'] == 'weather':
         # Fetch weather data
+        from utils.async_apis import fetch_external_data
         location = result.get('location', 'New York')
-        weather_data = get_weather_data(location)
+        weather_data = fetch_external_data(locations=[location])[0][location]
         return jsonify({
             'success': True,
             'message': 'Weather retrieved',
@@ -143,8 +194,9 @@ def process_command():
     
     elif result['intent'] == 'news':
         # Fetch news data
+        from utils.async_apis import fetch_news_payload
         topic = result.get('topic', 'general')
-        news_data = get_news_data(topic)
+        news_data, _ = fetch_news_payload(topic)
         return jsonify({
             'success': True,
             'message': 'News retrieved',
@@ -157,16 +209,292 @@ def process_command():
             'message': 'I didn\'t understand that command'
         })
 
-@app.route('/api/tasks', methods=['GET'])
+@bp.route('/api/process-commands', methods=['POST'])
 @login_required
-def get_tasks():
-    tasks = Task.query.filter_by(user_id=current_user.id).all()
+def process_commands():
+    data = request.get_json()
+    if not data or not isinstance(data.get('commands'), list):
+        return jsonify({'error': 'No commands provided'}), 400
+    
+    commands = data['commands']
+    if len(commands) > current_app.config['MAX_BATCH_COMMANDS']:
+        return jsonify({'error': f"At most {current_app.config['MAX_BATCH_COMMANDS']} commands per batch"}), 400
+    
+    results = [None] * len(commands)
+    # New tasks/reminders are inserted with one statement per table and committed once
+    pending = []
+    # Weather and news lookups are deduplicated and fetched concurrently
+    lookups = []
+    
+    parsed = [process_natural_language_command(c) if isinstance(c, str) else None for c in commands]
+    # Deadlines and reminder times are parsed together against one reference time
+    times = parse_datetimes_from_texts([
+        result.get('deadline' if result['intent'] == 'add_task' else 'time', '') if result else ''
+        for result in parsed
+    ])
+    
+    for index, (command, result) in enumerate(zip(commands, parsed)):
+        if result is None:
+            results[index] = {'error': 'No command provided'}
+            continue
+        
+        if result['intent'] == 'add_task':
+            pending.append((index, Task, {
+                'title': result['title'],
+                'description': result.get('description', ''),
+                'deadline': times[index],
+                'user_id': current_user.id
+            }))
+        
+        elif result['intent'] == 'add_reminder':
+            reminder_time = times[index]
+            if not reminder_time:
+                results[index] = {'error': 'Could not parse reminder time'}
+                continue
+            
+            pending.append((index, Reminder, {
+                'title': result['title'],
+                'description': result.get('description', ''),
+                'reminder_time': reminder_time,
+                'user_id': current_user.id
+            }))
+        
+        elif result['intent'] == 'question':
+            results[index] = {
+                'success': True,
+                'message': 'Question answered',
+                'answer': answer_question(command)
+            }
+        
+        elif result['intent'] == 'weather':
+            lookups.append((index, 'weather', result.get('location', 'New York')))
+        
+        elif result['intent'] == 'news':
+            lookups.append((index, 'news', result.get('topic', 'general')))
+        
+        else:
+            results[index] = {
+                'success': False,
+                'message': 'I didn\'t understand that command'
+            }
+    
+    created = {}
+    if pending:
+        # One multi-row INSERT ... RETURNING per table; ids follow input
+        # order, while the order of RETURNING rows is unspecified
+        for model in (Task, Reminder):
+            batch = [(index, values) for index, kind, values in pending if kind is model]
+            if not batch:
+                continue
+            rows = db.session.scalars(db.insert(model).returning(model), [values for _, values in batch]).all()
+            for (index, _), row in zip(batch, sorted(rows, key=lambda row: row.id)):
+                # Detached, so the commit doesn't expire them and to_dict()
+                # doesn't reload each row
+                db.session.expunge(row)
+                created[index] = row
+        db.session.commit()
+    
+    if lookups:
+        from utils.async_apis import fetch_external_data
+        weather_by_location, news_by_topic = fetch_external_data(
+            locations=[key for _, kind, key in lookups if kind == 'weather'],
+            topics=[key for _, kind, key in lookups if kind == 'news']
+        )
+        for index, kind, key in lookups:
+            if kind == 'weather':
+                results[index] = {
+                    'success': True,
+                    'message': 'Weather retrieved',
+                    'weather': weather_by_location[key]
+                }
+            else:
+                results[index] = {
+                    'success': True,
+                    'message': 'News retrieved',
+                    'news': news_by_topic[key]
+                }
+    
+    for index, kind, _ in pending:
+        row = created[index]
+        if kind is Task:
+            results[index] = {
+                'success': True,
+                'message': 'Task added successfully',
+                'task': row.to_dict()
+            }
+        else:
+            _reminder_scheduler().add(row)
+            results[index] = {
+                'success': True,
+                'message': 'Reminder set successfully',
+                'reminder': row.to_dict()
+            }
+    
     return jsonify({
         'success': True,
-        'tasks': [task.to_dict() for task in tasks]
+        'results': results
     })
 
-@app.route('/api/tasks', methods=['POST'])
+def _parse_sync_cursor():
+    """
+    Return the datetime from the ?since= cursor, None for a full listing, or
+    False if the cursor is invalid or older than the tombstone retention
+    period (the client must then do a full listing)
+    """
+    since = request.args.get('since')
+    if not since:
+        return None
+    try:
+        since = datetime.fromisoformat(since)
+    except ValueError:
+        return False
+    if since < datetime.utcnow() - timedelta(days=current_app.config['TOMBSTONE_RETENTION_DAYS']):
+        return False
+    return since
+
+def _stream_list(fields, key, model, *criteria):
+    """
+    Stream a JSON list of model rows matching criteria
+    
+    Only the model's DICT_COLUMNS are selected and rows are fetched
+    STREAM_CHUNK_ROWS at a time, so memory use does not grow with the number
+    of rows and the response starts before the query finishes.
+    """
+    columns = [getattr(model, name) for name in model.DICT_COLUMNS]
+    statement = db.select(*columns).where(*criteria).execution_options(yield_per=current_app.config['STREAM_CHUNK_ROWS'])
+    
+    def generate():
+        rows = db.session.execute(statement)
+        yield from stream_json_object(fields, key, (model.serialize(row) for row in rows),
+                                      chunk_size=current_app.config['STREAM_CHUNK_ROWS'])
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def _sync_response(key, model, record_type):
+    """
+    List the user's rows of model, or with ?since= only the rows changed and
+    the ids deleted since that cursor
+    
+    The returned cursor is taken before querying and rows are matched with a
+    small overlap, so a row may be sent twice but never missed; clients
+    apply changes by id.
+    """
+    since = _parse_sync_cursor()
+    if since is False:
+        return jsonify({'error': 'Invalid or expired sync cursor'}), 400
+    
+    cursor = datetime.utcnow()
+    query = model.query.filter_by(user_id=current_user.id)
+    response = {'success': True, 'full': since is None, 'cursor': cursor.isoformat()}
+    
+    if since is None:
+        return _stream_list(response, key, model, model.user_id == current_user.id)
+    
+    since -= timedelta(seconds=current_app.config['SYNC_CURSOR_OVERLAP'])
+    response[key] = [row.to_dict() for row in query.filter(model.updated_at >= since).all()]
+    response['deleted'] = [
+        record_id for (record_id,) in db.session.query(Tombstone.record_id).filter(
+            Tombstone.user_id == current_user.id,
+            Tombstone.record_type == record_type,
+            Tombstone.deleted_at >= since
+        )
+    ]
+    return jsonify(response)
+
+# Query parameters that switch a listing route to paginated mode
+PAGE_ARGS = ('limit', 'after', 'sort', 'order')
+
+# Strings accepted for true and false, in query arguments and JSON bodies
+TRUE_STRINGS = ('1', 'true', 'yes')
+FALSE_STRINGS = ('0', 'false', 'no')
+
+def _parse_bool(value):
+    """
+    Return a JSON boolean, 0 or 1, or one of TRUE_STRINGS or FALSE_STRINGS
+    as a bool; raises ValueError for anything else, since bool('false') is True
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.lower() in TRUE_STRINGS + FALSE_STRINGS:
+        return value.lower() in TRUE_STRINGS
+    raise ValueError(f'Expected true or false, got {value!r}')
+
+def _parse_datetime_arg(name):
+    """Return the ISO datetime query parameter name, or None; raises ValueError"""
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
+def _page_response(key, query, model, sort_columns, default_sort):
+    """
+    Return one page of a query using keyset pagination
+    
+    Reads ?sort= (one of sort_columns), ?order=asc|desc, ?limit= (capped at
+    MAX_PAGE_SIZE) and ?after=, the next_page token from the previous page.
+    """
+    sort = request.args.get('sort', default_sort)
+    order = request.args.get('order', 'asc')
+    if sort not in sort_columns or order not in ('asc', 'desc'):
+        return jsonify({'error': f"Sort must be one of {', '.join(sort_columns)} and order asc or desc"}), 400
+    
+    try:
+        limit = int(request.args.get('limit', current_app.config['DEFAULT_PAGE_SIZE']))
+        after = request.args.get('after')
+        cursor = decode_cursor(after) if after else None
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or page cursor'}), 400
+    limit = max(1, min(limit, current_app.config['MAX_PAGE_SIZE']))
+    
+    column = getattr(model, sort)
+    rows = keyset_page(query, column, model.id, limit + 1, cursor, descending=order == 'desc')
+    
+    next_page = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_page = encode_cursor(getattr(rows[-1], sort), rows[-1].id)
+    
+    return jsonify({
+        'success': True,
+        key: [row.to_dict() for row in rows],
+        'next_page': next_page
+    })
+
+def _add_tombstones(record_type, record_ids):
+    """Record deletions for incremental sync and prune expired tombstones"""
+    db.session.execute(db.insert(Tombstone), [
+        {'record_type': record_type, 'record_id': record_id, 'user_id': current_user.id}
+        for record_id in record_ids
+    ])
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config['TOMBSTONE_RETENTION_DAYS'])
+    Tombstone.query.filter(Tombstone.user_id == current_user.id, Tombstone.deleted_at < cutoff).delete()
+
+@bp.route('/api/tasks', methods=['GET'])
+@login_required
+def get_tasks():
+    filters = ('completed', 'deadline_from', 'deadline_to')
+    if 'since' in request.args or not any(arg in request.args for arg in PAGE_ARGS + filters):
+        return _sync_response('tasks', Task, 'task')
+    
+    query = Task.query.filter_by(user_id=current_user.id)
+    if 'completed' in request.args:
+        try:
+            query = query.filter(Task.completed == _parse_bool(request.args['completed']))
+        except ValueError:
+            return jsonify({'error': 'completed must be true or false'}), 400
+    try:
+        deadline_from = _parse_datetime_arg('deadline_from')
+        deadline_to = _parse_datetime_arg('deadline_to')
+    except ValueError:
+        return jsonify({'error': 'Invalid deadline format'}), 400
+    if deadline_from:
+        query = query.filter(Task.deadline >= deadline_from)
+    if deadline_to:
+        query = query.filter(Task.deadline <= deadline_to)
+    
+    return _page_response('tasks', query, Task, ('deadline', 'created_at', 'updated_at', 'id'), 'id')
+
+@bp.route('/api/tasks', methods=['POST'])
 @login_required
 def create_task():
     data = request.get_json()
@@ -198,7 +526,205 @@ def create_task():
         'task': task.to_dict()
     })
 
-@app.route('/api/tasks/<int:task_id>', methods=['PUT'])
+@bp.route('/api/tasks/bulk', methods=['POST'])
+@login_required
+def import_tasks():
+    data = request.get_json()
+    if not data or not isinstance(data.get('tasks'), list):
+        return jsonify({'error': 'No tasks provided'}), 400
+    
+    items = data['tasks']
+    if len(items) > current_app.config['MAX_BULK_TASKS']:
+        return jsonify({'error': f"At most {current_app.config['MAX_BULK_TASKS']} tasks per import"}), 400
+    
+    rows = {}
+    errors = []
+    # Deadlines that are not ISO timestamps ("tomorrow", "May 15") are
+    # parsed together against one reference time
+    natural = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('title'), str):
+            errors.append({'index': index, 'error': 'Title is required'})
+            continue
+        deadline = item.get('deadline')
+        if deadline is not None and not isinstance(deadline, str):
+            errors.append({'index': index, 'error': 'Invalid deadline format'})
+            continue
+        try:
+            completed = _parse_bool(item.get('completed', False))
+        except ValueError:
+            errors.append({'index': index, 'error': 'completed must be true or false'})
+            continue
+        
+        rows[index] = {
+            'title': item['title'],
+            'description': item.get('description', ''),
+            'deadline': None,
+            'completed': completed,
+            'user_id': current_user.id
+        }
+        if deadline:
+            try:
+                rows[index]['deadline'] = datetime.fromisoformat(deadline)
+            except ValueError:
+                natural.append((index, deadline))
+    
+    for (index, _), deadline in zip(natural, parse_datetimes_from_texts([text for _, text in natural])):
+        if deadline is None:
+            del rows[index]
+            errors.append({'index': index, 'error': 'Invalid deadline format'})
+        else:
+            rows[index]['deadline'] = deadline
+    errors.sort(key=lambda error: error['index'])
+    
+    tasks = []
+    if rows:
+        # One multi-row INSERT ... RETURNING instead of a flush per task; ids
+        # follow input order, while the order of RETURNING rows is unspecified
+        created = db.session.scalars(db.insert(Task).returning(Task), list(rows.values())).all()
+        tasks = [task.to_dict() for task in sorted(created, key=lambda task: task.id)]
+        db.session.commit()
+    
+    return jsonify({
+        'success': True,
+        'message': f'Imported {len(tasks)} tasks',
+        'tasks': tasks,
+        'errors': errors
+    })
+
+# Keys accepted in the filter of a bulk task operation
+BULK_FILTER_KEYS = ('completed', 'deadline_from', 'deadline_to')
+
+def _bulk_task_criteria(data):
+    """
+    Return the WHERE criteria for a bulk task operation on the current user's
+    tasks, selected by {'ids': [...]} or {'filter': {...}}
+    
+    Args:
+        data (dict): The request body
+        
+    Returns:
+        tuple: (criteria list, requested ids or None for a filter); raises
+            ValueError with a message for the client if the selection is invalid
+    """
+    criteria = [Task.user_id == current_user.id]
+    ids = data.get('ids')
+    if ids is not None:
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+            raise ValueError('ids must be a non-empty list of task ids')
+        if len(ids) > current_app.config['MAX_BULK_TASKS']:
+            raise ValueError(f"At most {current_app.config['MAX_BULK_TASKS']} tasks per request")
+        criteria.append(Task.id.in_(ids))
+        return criteria, ids
+    
+    filters = data.get('filter')
+    if not isinstance(filters, dict) or not filters:
+        raise ValueError('No tasks selected')
+    # A misspelt key must not leave only the user_id criterion behind
+    unknown = sorted(set(filters) - set(BULK_FILTER_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown filter keys: {', '.join(unknown)}")
+    if 'completed' in filters:
+        try:
+            criteria.append(Task.completed == _parse_bool(filters['completed']))
+        except ValueError:
+            raise ValueError('completed must be true or false')
+    try:
+        if filters.get('deadline_from'):
+            criteria.append(Task.deadline >= datetime.fromisoformat(filters['deadline_from']))
+        if filters.get('deadline_to'):
+            criteria.append(Task.deadline <= datetime.fromisoformat(filters['deadline_to']))
+    except (TypeError, ValueError):
+        raise ValueError('Invalid deadline format')
+    if len(criteria) == 1:
+        raise ValueError('No tasks selected')
+    return criteria, None
+
+def _bulk_results(ids, found):
+    """
+    Per-item results in request order, or one per affected task when tasks
+    were selected by a filter; found maps affected ids to extra result fields
+    """
+    return [
+        {'id': i, 'success': True, **found[i]} if i in found else {'id': i, 'error': 'Task not found'}
+        for i in (found if ids is None else ids)
+    ]
+
+@bp.route('/api/tasks/bulk', methods=['PATCH'])
+@login_required
+def update_tasks():
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No tasks selected'}), 400
+    try:
+        criteria, ids = _bulk_task_criteria(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    changes = data.get('changes')
+    if not isinstance(changes, dict):
+        return jsonify({'error': 'No changes provided'}), 400
+    for key in ('title', 'description'):
+        if key in changes and not isinstance(changes[key], str):
+            return jsonify({'error': f'{key} must be a string'}), 400
+    if 'title' in changes and not changes['title'].strip():
+        return jsonify({'error': 'Title is required'}), 400
+    values = {key: changes[key] for key in ('title', 'description') if key in changes}
+    if 'deadline' in changes:
+        try:
+            values['deadline'] = datetime.fromisoformat(changes['deadline']) if changes['deadline'] else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid deadline format'}), 400
+    if 'completed' in changes:
+        try:
+            values['completed'] = _parse_bool(changes['completed'])
+        except ValueError:
+            return jsonify({'error': 'completed must be true or false'}), 400
+    if not values:
+        return jsonify({'error': 'No changes provided'}), 400
+    
+    # One UPDATE ... RETURNING for every selected task, and one commit
+    columns = [getattr(Task, name) for name in Task.DICT_COLUMNS]
+    rows = db.session.execute(
+        db.update(Task).where(*criteria).values(**values).returning(*columns),
+        execution_options={'synchronize_session': False}
+    ).all()
+    db.session.commit()
+    
+    tasks = [Task.serialize(row) for row in rows]
+    return jsonify({
+        'success': True,
+        'message': f'Updated {len(tasks)} tasks',
+        'results': _bulk_results(ids, {task['id']: {'task': task} for task in tasks})
+    })
+
+@bp.route('/api/tasks/bulk', methods=['DELETE'])
+@login_required
+def delete_tasks():
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No tasks selected'}), 400
+    try:
+        criteria, ids = _bulk_task_criteria(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # One DELETE ... RETURNING, one tombstone insert, and one commit
+    deleted = db.session.scalars(
+        db.delete(Task).where(*criteria).returning(Task.id),
+        execution_options={'synchronize_session': False}
+    ).all()
+    if deleted:
+        _add_tombstones('task', deleted)
+    db.session.commit()
+    
+    return jsonify({
+        'success': True,
+        'message': f'Deleted {len(deleted)} tasks',
+        'results': _bulk_results(ids, {i: {} for i in deleted})
+    })
+
+@bp.route('/api/tasks/<int:task_id>', methods=['PUT'])
 @login_required
 def update_task(task_id):
     task = Task.query.filter_by(id=task_id, user_id=current_user.id).first()
@@ -234,7 +760,7 @@ def update_task(task_id):
         'task': task.to_dict()
     })
 
-@app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
+@bp.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 @login_required
 def delete_task(task_id):
     task = Task.query.filter_by(id=task_id, user_id=current_user.id).first()
@@ -243,6 +769,7 @@ def delete_task(task_id):
         return jsonify({'error': 'Task not found'}), 404
     
     db.session.delete(task)
+    _add_tombstones('task', [task_id])
     db.session.commit()
     
     return jsonify({
@@ -250,16 +777,27 @@ def delete_task(task_id):
         'message': 'Task deleted successfully'
     })
 
-@app.route('/api/reminders', methods=['GET'])
+@bp.route('/api/reminders', methods=['GET'])
 @login_required
 def get_reminders():
-    reminders = Reminder.query.filter_by(user_id=current_user.id).all()
-    return jsonify({
-        'success': True,
-        'reminders': [reminder.to_dict() for reminder in reminders]
-    })
+    filters = ('from', 'to')
+    if 'since' in request.args or not any(arg in request.args for arg in PAGE_ARGS + filters):
+        return _sync_response('reminders', Reminder, 'reminder')
+    
+    query = Reminder.query.filter_by(user_id=current_user.id)
+    try:
+        time_from = _parse_datetime_arg('from')
+        time_to = _parse_datetime_arg('to')
+    except ValueError:
+        return jsonify({'error': 'Invalid reminder time format'}), 400
+    if time_from:
+        query = query.filter(Reminder.reminder_time >= time_from)
+    if time_to:
+        query = query.filter(Reminder.reminder_time <= time_to)
+    
+    return _page_response('reminders', query, Reminder, ('reminder_time', 'created_at', 'updated_at', 'id'), 'reminder_time')
 
-@app.route('/api/reminders', methods=['POST'])
+@bp.route('/api/reminders', methods=['POST'])
 @login_required
 def create_reminder():
     data = request.get_json()
@@ -281,6 +819,7 @@ def create_reminder():
     
     db.session.add(reminder)
     db.session.commit()
+    _reminder_scheduler().add(reminder)
     
     return jsonify({
         'success': True,
@@ -288,7 +827,7 @@ def create_reminder():
         'reminder': reminder.to_dict()
     })
 
-@app.route('/api/reminders/<int:reminder_id>', methods=['DELETE'])
+@bp.route('/api/reminders/<int:reminder_id>', methods=['DELETE'])
 @login_required
 def delete_reminder(reminder_id):
     reminder = Reminder.query.filter_by(id=reminder_id, user_id=current_user.id).first()
@@ -297,103 +836,445 @@ def delete_reminder(reminder_id):
         return jsonify({'error': 'Reminder not found'}), 404
     
     db.session.delete(reminder)
+    _add_tombstones('reminder', [reminder_id])
     db.session.commit()
+    _reminder_scheduler().remove(reminder_id)
     
     return jsonify({
         'success': True,
         'message': 'Reminder deleted successfully'
     })
 
-@app.route('/api/weather', methods=['GET'])
+# Reminders replayed to a reconnecting stream at most
+MAX_REPLAYED_REMINDERS = 100
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+}
+
+def _stream_cursor(now):
+    """
+    The time up to which a reconnecting stream has received reminders, from
+    the Last-Event-ID header EventSource resends, or now for a new stream
+    """
+    try:
+        return min(datetime.fromisoformat(request.headers['Last-Event-ID']), now)
+    except (KeyError, ValueError):
+        return now
+
+def _missed_reminders(user_id, after, until):
+    """(reminder_time, JSON payload) for the user's reminders due after one time and by another"""
+    reminders = Reminder.query.filter(
+        Reminder.user_id == user_id, Reminder.reminder_time > after, Reminder.reminder_time <= until
+    ).order_by(Reminder.reminder_time).limit(MAX_REPLAYED_REMINDERS).all()
+    return [(r.reminder_time, json.dumps(r.to_dict())) for r in reminders]
+
+@bp.route('/api/reminders/stream', methods=['GET'])
+@login_required
+def stream_reminders():
+    user_id = current_user.id
+    now = datetime.now()
+    cursor = _stream_cursor(now)
+    slots = current_app.extensions['reminder_stream_slots']
+    if not slots.acquire(blocking=False):
+        # Every stream slot is busy; have EventSource come back later, and
+        # keep its cursor so it is sent what it missed then
+        retry = current_app.config['REMINDER_STREAM_BUSY_RETRY'] * 1000
+        return Response(f'retry: {retry}\nid: {cursor.isoformat()}\n\n', mimetype='text/event-stream',
+                        headers=SSE_HEADERS)
+    
+    scheduler = _reminder_scheduler()
+    try:
+        subscription = scheduler.subscribe(user_id)
+        # Reminders that fell due while the stream was disconnected
+        missed = _missed_reminders(user_id, cursor, now + scheduler.lead_time)
+    except BaseException:
+        slots.release()
+        raise
+    # Don't keep a pooled connection checked out while the stream is open
+    db.session.remove()
+    # Close the stream periodically; EventSource reconnects on its own
+    deadline = time.monotonic() + current_app.config['REMINDER_STREAM_TIMEOUT']
+    
+    def events(cursor):
+        yield f'retry: 5000\nid: {cursor.isoformat()}\n\n'
+        for reminder_time, message in missed:
+            cursor = reminder_time
+            yield f'id: {cursor.isoformat()}\nevent: reminder\ndata: {message}\n\n'
+        while True:
+            # Wake for the deadline too, so the stream never outlives it
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                reminder_time, message = subscription.get(timeout=min(15, remaining))
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            # Already sent, from the replay or an earlier connection
+            if reminder_time <= cursor:
+                continue
+            cursor = reminder_time
+            yield f'id: {cursor.isoformat()}\nevent: reminder\ndata: {message}\n\n'
+    
+    def close():
+        scheduler.unsubscribe(user_id, subscription)
+        slots.release()
+    
+    # Runs when the server closes the response, even if the client left
+    # before the body was started
+    response = Response(events(cursor), mimetype='text/event-stream', headers=SSE_HEADERS)
+    response.call_on_close(close)
+    return response
+
+@bp.route('/api/weather', methods=['GET'])
 @login_required
 def fetch_weather():
+    from utils.async_apis import fetch_external_data
     location = request.args.get('location', 'New York')
-    weather_data = get_weather_data(location)
+    weather_data = fetch_external_data(locations=[location])[0][location]
     return jsonify({
         'success': True,
         'location': location,
         'weather': weather_data
     })
 
-@app.route('/api/news', methods=['GET'])
+@bp.route('/api/news', methods=['GET'])
 @login_required
 def fetch_news():
+    from utils.async_apis import fetch_news_payload
     topic = request.args.get('topic', 'general')
-    news_data = get_news_data(topic)
+    # The articles are cached already serialized, so splice them in as-is
+    _, news_json = fetch_news_payload(topic)
+    body = f'{{"success": true, "topic": {json.dumps(topic)}, "news": {news_json}}}'
+    return current_app.response_class(body, mimetype='application/json')
+
+@bp.route('/api/news/refresh', methods=['POST'])
+@login_required
+def refresh_news_cache():
+    from utils.external_apis import refresh_news_now, normalize_news_topic, news_cache
+    topic = request.args.get('topic')
+    if topic is not None:
+        topic = normalize_news_topic(topic)
+        if topic is None:
+            return jsonify({'error': 'Unknown news topic'}), 400
+    
+    # Every user shares the cache, so refreshes are throttled per topic
+    retry_after = refresh_news_now(topic)
+    if retry_after:
+        return jsonify({'error': 'News was refreshed recently'}), 429, {'Retry-After': str(retry_after)}
     return jsonify({
         'success': True,
-        'topic': topic,
-        'news': news_data
+        'message': 'News refreshed',
+        'cache': news_cache.stats()
     })
 
-@app.route('/api/upload', methods=['POST'])
+@bp.route('/api/dashboard', methods=['GET'])
+@login_required
+def fetch_dashboard():
+    from utils.async_apis import fetch_external_data
+    location = request.args.get('location', 'New York')
+    topics = [t.strip() for t in request.args.get('topics', 'general').split(',') if t.strip()]
+    weather_data, news_by_topic = fetch_external_data(locations=[location], topics=topics)
+    return jsonify({
+        'success': True,
+        'location': location,
+        'weather': weather_data[location],
+        'news': news_by_topic
+    })
+
+@bp.route('/api/upload', methods=['POST'])
 @login_required
 def upload_file():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file part'}), 400
+    from utils.file_processor import extract_text, spool_upload, UploadTooLarge
+    from utils.vector_index import embed_passages
+    from utils.extraction_pool import submit_extraction
     
-    file = request.files['file']
+    # Browsers send the file as the raw request body (?filename=...), which is
+    # read straight from the socket. Multipart form uploads are still accepted.
+    if request.mimetype == 'multipart/form-data':
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file part'}), 400
+        file = request.files['file']
+        filename, content_type, stream = file.filename, file.content_type, file.stream
+    else:
+        filename = request.args.get('filename', '')
+        content_type, stream = request.mimetype, request.stream
     
-    if file.filename == '':
+    if not filename:
         return jsonify({'error': 'No selected file'}), 400
     
-    if file:
-        filename = secure_filename(file.filename)
-        content_type = file.content_type
-        
-        # Extract text content from file
-        text_content = ''
-        if content_type == 'text/plain':
-            text_content = file.read().decode('utf-8')
-            file.seek(0)  # Reset file pointer
-        elif content_type == 'application/pdf':
-            # In a real app, we'd use PyMuPDF or similar to extract text
-            # For now, we'll just store a placeholder message
-            text_content = "PDF content extracted (simulated)"
+    filename = secure_filename(filename)
+    max_bytes = current_app.config['MAX_UPLOAD_BYTES']
+    file_upload = FileUpload(
+        filename=filename,
+        content_type=content_type,
+        user_id=current_user.id
+    )
+    
+    # Small text files are decoded inline; PDFs and large text files are
+    # spooled to disk and extracted in the process pool
+    inline = content_type != 'application/pdf' and (
+        content_type != 'text/plain'
+        or (request.content_length or max_bytes + 1) <= current_app.config['INLINE_EXTRACT_BYTES']
+    )
+    try:
+        if inline:
+            text = extract_text(stream, content_type, max_bytes)
+            file_upload.text_content = text
+            file_upload.status = 'ready'
+        else:
+            spool_path = spool_upload(stream, current_app.config['UPLOAD_SPOOL_DIR'], max_bytes)
+            file_upload.status = 'pending'
+    except UploadTooLarge:
+        return jsonify({'error': 'File is too large'}), 413
+    except UnicodeDecodeError:
+        return jsonify({'error': 'File is not valid UTF-8 text'}), 400
+    
+    # Store file metadata in the database
+    db.session.add(file_upload)
+    if inline and text:
+        index = build_index(text)
+        file_upload.index = FileIndex(data=serialize_index(index))
+    db.session.commit()
+    if inline and text:
+        file_index_cache.put(file_upload.id, index)
+        _store_vectors(file_upload, index, embed_passages(text, index['passages']))
+    
+    if not inline:
+        file_id = file_upload.id
+        app = current_app._get_current_object()
+        try:
+            submit_extraction(spool_path, content_type, max_bytes, blob_store,
+                              lambda future: _finish_extraction(app, file_id, spool_path, future))
+        except Exception as e:
+            current_app.logger.error(f"Error starting extraction of file {file_id}: {str(e)}")
+            os.unlink(spool_path)
+            file_upload.status = 'failed'
+            file_upload.error = 'Could not start processing the file'
+            db.session.commit()
+            return jsonify({'error': 'Could not start processing the file'}), 503
+    
+    return jsonify({
+        'success': True,
+        'message': 'File uploaded successfully',
+        'file_id': file_upload.id,
+        'filename': filename,
+        'status': file_upload.status
+    }), 200 if inline else 202
+
+def recover_stale_uploads(app):
+    """
+    Fail uploads left pending, and delete spooled files left behind, by a
+    worker that stopped before their extraction finished
+    
+    Only uploads and files older than STALE_EXTRACTION_SECONDS are touched,
+    so extractions other workers still have running are left alone.
+    """
+    max_age = app.config['STALE_EXTRACTION_SECONDS']
+    spool_dir = app.config['UPLOAD_SPOOL_DIR']
+    try:
+        with app.app_context():
+            failed = FileUpload.query.filter(
+                FileUpload.status == 'pending',
+                FileUpload.uploaded_at < datetime.utcnow() - timedelta(seconds=max_age)
+            ).update({'status': 'failed', 'error': 'Processing was interrupted'}, synchronize_session=False)
+            db.session.commit()
         
-        # Create a temporary file for processing if needed
-        with tempfile.NamedTemporaryFile(delete=False) as temp:
-            file.save(temp.name)
-            
-            # Process the file as needed
-            # In a real implementation, this would involve file parsing
-            
-            # Store file metadata in the database
-            file_upload = FileUpload(
-                filename=filename,
-                content_type=content_type,
-                text_content=text_content,
-                user_id=current_user.id
-            )
-            
-            db.session.add(file_upload)
+        removed = 0
+        if os.path.isdir(spool_dir):
+            for entry in os.scandir(spool_dir):
+                if entry.is_file() and entry.stat().st_mtime < time.time() - max_age:
+                    os.unlink(entry.path)
+                    removed += 1
+    except Exception as e:
+        app.logger.error(f"Error recovering stale uploads: {str(e)}")
+        return
+    if failed or removed:
+        app.logger.warning(f"Marked {failed} interrupted uploads failed and removed {removed} spooled files")
+
+def _finish_extraction(app, file_id, spool_path, future):
+    """Store the result of a background extraction and remove the spooled file"""
+    try:
+        with app.app_context():
+            file_upload = db.session.get(FileUpload, file_id)
+            if file_upload is None:
+                return
+            vectors = None
+            try:
+                file_upload.content_hash, index_data, vectors = future.result()
+                file_upload.index = FileIndex(data=index_data)
+                file_upload.status = 'ready'
+            except UnicodeDecodeError:
+                file_upload.status = 'failed'
+                file_upload.error = 'File is not valid UTF-8 text'
+            except Exception as e:
+                app.logger.error(f"Error extracting file {file_id}: {str(e)}")
+                file_upload.status = 'failed'
+                file_upload.error = str(e)
             db.session.commit()
             
-            # Clean up the temporary file
-            os.unlink(temp.name)
-        
-        return jsonify({
-            'success': True,
-            'message': 'File uploaded successfully',
-            'file_id': file_upload.id,
-            'filename': filename
-        })
+            if vectors is not None:
+                index = deserialize_index(index_data)
+                file_index_cache.put(file_id, index)
+                _store_vectors(file_upload, index, vectors)
+    finally:
+        os.unlink(spool_path)
 
-@app.route('/api/files', methods=['GET'])
+@bp.route('/api/files/<int:file_id>', methods=['GET'])
 @login_required
-def get_files():
-    files = FileUpload.query.filter_by(user_id=current_user.id).all()
+def get_file(file_id):
+    file_upload = FileUpload.query.filter_by(id=file_id, user_id=current_user.id).first()
+    
+    if not file_upload:
+        return jsonify({'error': 'File not found'}), 404
+    
     return jsonify({
         'success': True,
-        'files': [{
-            'id': f.id,
-            'filename': f.filename,
-            'content_type': f.content_type,
-            'uploaded_at': f.uploaded_at.isoformat()
-        } for f in files]
+        'file': file_upload.to_dict()
     })
 
-@app.route('/api/files/<int:file_id>/query', methods=['POST'])
+@bp.route('/api/files', methods=['GET'])
+@login_required
+def get_files():
+    filters = ('from', 'to')
+    if not any(arg in request.args for arg in PAGE_ARGS + filters):
+        return _stream_list({'success': True}, 'files', FileUpload, FileUpload.user_id == current_user.id)
+    
+    query = FileUpload.query.filter_by(user_id=current_user.id)
+    
+    try:
+        uploaded_from = _parse_datetime_arg('from')
+        uploaded_to = _parse_datetime_arg('to')
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+    if uploaded_from:
+        query = query.filter(FileUpload.uploaded_at >= uploaded_from)
+    if uploaded_to:
+        query = query.filter(FileUpload.uploaded_at <= uploaded_to)
+    
+    return _page_response('files', query, FileUpload, ('uploaded_at', 'id'), 'uploaded_at')
+
+def _vector_store():
+    """Passage vectors for semantic search, one memory-mapped matrix per user"""
+    store = current_app.extensions.get('vector_store')
+    if store is None:
+        from utils.vector_index import VectorStore
+        store = current_app.extensions.setdefault('vector_store', VectorStore(
+            current_app.config['VECTOR_INDEX_DIR'], max_open=current_app.config['VECTOR_STORE_MAX_OPEN']
+        ))
+    return store
+
+SEARCH_MODES = ('keyword', 'semantic')
+
+def _load_file_indexes(file_uploads):
+    """
+    Return file id -> decoded index for the given uploads, building and
+    storing indexes for ready files that predate indexing or whose index is
+    from an older INDEX_VERSION
+    """
+    indexes = {}
+    missing = []
+    for f in file_uploads:
+        index = file_index_cache.get(f.id)
+        if index is None:
+            missing.append(f)
+        else:
+            indexes[f.id] = index
+    if not missing:
+        return indexes
+    
+    stored = dict(db.session.query(FileIndex.file_id, FileIndex.data).filter(
+        FileIndex.file_id.in_([f.id for f in missing])
+    ))
+    built = False
+    for f in missing:
+        index = deserialize_index(stored[f.id]) if f.id in stored else None
+        if index is None or index['version'] != INDEX_VERSION:
+            if f.status not in (None, 'ready') or not f.content_hash:
+                continue
+            index = build_index(f.text_content)
+            db.session.merge(FileIndex(file_id=f.id, data=serialize_index(index)))
+            built = True
+        file_index_cache.put(f.id, index)
+        indexes[f.id] = index
+    if built:
+        db.session.commit()
+    return indexes
+
+def _store_vectors(file_upload, index, vectors):
+    """Append a file's passage vectors to its owner's semantic search matrix"""
+    if index['passages']:
+        _vector_store().append(file_upload.user_id, file_upload.id, vectors, index['passages'])
+
+def _rank_passages(file_uploads, query, limit, mode):
+    """
+    Rank passages of the given uploads against a query
+    
+    Args:
+        file_uploads (list): The current user's uploads to search
+        query (str): The query text
+        limit (int): Maximum number of passages to return
+        mode (str): 'keyword' for BM25 or 'semantic' for vector similarity
+        
+    Returns:
+        list: (score, file id, passage number, start, end) tuples, best first
+    """
+    if mode == 'semantic':
+        from utils.vector_index import embed_passages, embed_texts
+        # Files uploaded before semantic search existed are embedded on first use
+        stored = _vector_store().file_ids(current_user.id)
+        missing = [f for f in file_uploads if f.id not in stored]
+        indexes = _load_file_indexes(missing)
+        for f in missing:
+            if f.id in indexes:
+                _store_vectors(f, indexes[f.id], embed_passages(f.text_content, indexes[f.id]['passages']))
+        results = _vector_store().search(current_user.id, embed_texts([query])[0], top_k=limit,
+                                         file_ids=[f.id for f in file_uploads])
+        # Offsets come from the keyword index, since vectors stored before
+        # INDEX_VERSION 2 carry character offsets
+        result_ids = {file_id for _, file_id, _, _, _ in results}
+        indexes = _load_file_indexes([f for f in file_uploads if f.id in result_ids])
+        return [(score, file_id, number, *indexes[file_id]['passages'][number][:2])
+                for score, file_id, number, _, _ in results if file_id in indexes]
+    
+    indexes = _load_file_indexes(file_uploads)
+    return [(score, file_id, number, *indexes[file_id]['passages'][number][:2])
+            for score, file_id, number in score_passages(indexes, query, top_k=limit)]
+
+def _passage_results(results, file_uploads):
+    """Fetch the text of ranked passages, decoding only their byte ranges of each matching document's blob"""
+    ranges = {}
+    for _, file_id, _, start, end in results:
+        ranges.setdefault(file_id, []).append((start, end))
+    texts = {}
+    for file_id, spans in ranges.items():
+        content_hash = file_uploads[file_id].content_hash
+        texts[file_id] = iter(blob_store.read_ranges(content_hash, spans) if content_hash else [''] * len(spans))
+    
+    passages = []
+    for score, file_id, number, start, end in results:
+        passages.append({
+            'file_id': file_id,
+            'filename': file_uploads[file_id].filename,
+            'passage': number,
+            'score': round(score, 4),
+            'text': next(texts[file_id])
+        })
+    return passages
+
+def _search_mode(data):
+    mode = data.get('mode', 'keyword')
+    return mode if mode in SEARCH_MODES else None
+
+def _query_limit(data):
+    try:
+        return max(1, min(int(data.get('limit', 5)), current_app.config['MAX_PAGE_SIZE']))
+    except (TypeError, ValueError):
+        return 5
+
+@bp.route('/api/files/<int:file_id>/query', methods=['POST'])
 @login_required
 def query_file(file_id):
     file_upload = FileUpload.query.filter_by(id=file_id, user_id=current_user.id).first()
@@ -405,14 +1286,49 @@ def query_file(file_id):
     if not data or 'query' not in data:
         return jsonify({'error': 'No query provided'}), 400
     
+    mode = _search_mode(data)
+    if not mode:
+        return jsonify({'error': 'Invalid search mode'}), 400
+    
+    if file_upload.status == 'pending':
+        return jsonify({'error': 'File is still being processed'}), 409
+    
     query = data['query']
+    results = _rank_passages([file_upload], query, _query_limit(data), mode)
+    passages = _passage_results(results, {file_upload.id: file_upload})
     
-    # In a real implementation, we would process the query against the file content
-    # using NLP techniques. For now, we'll return a placeholder response.
-    response = f"This is a simulated response to your query: '{query}' about the file: '{file_upload.filename}'"
+    if passages:
+        response = passages[0]['text']
+    else:
+        response = f"I couldn't find anything about '{query}' in the file: '{file_upload.filename}'"
+    
+    return jsonify({
+        'success': True,
+        'query': query,
+        'mode': mode,
+        'response': response,
+        'passages': passages
+    })
+
+@bp.route('/api/files/search', methods=['POST'])
+@login_required
+def search_files():
+    data = request.get_json()
+    if not data or 'query' not in data:
+        return jsonify({'error': 'No query provided'}), 400
+    
+    mode = _search_mode(data)
+    if not mode:
+        return jsonify({'error': 'Invalid search mode'}), 400
+    
+    query = data['query']
+    file_uploads = FileUpload.query.filter_by(user_id=current_user.id).all()
+    results = _rank_passages(file_uploads, query, _query_limit(data), mode)
+    passages = _passage_results(results, {f.id: f for f in file_uploads})
     
     return jsonify({
         'success': True,
         'query': query,
-        'response': response
+        'mode': mode,
+        'results': passages
     })
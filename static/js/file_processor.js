@@ -64,14 +64,11 @@ async function uploadFile(file) {
             fileUploadArea.innerHTML = '<div class="text-center"><i class="fas fa-spinner fa-spin"></i> Uploading...</div>';
         }
         
-        // Create form data for file upload
-        const formData = new FormData();
-        formData.append('file', file);
-        
-        // Upload the file
-        const response = await fetch('/api/upload', {
+        // Upload the file as the raw request body so the server can stream it
+        const response = await fetch(`/api/upload?filename=${encodeURIComponent(file.name)}`, {
             method: 'POST',
-            body: formData
+            headers: { 'Content-Type': file.type },
+            body: file
         });
         
         // Reset upload area
@@ -95,6 +92,11 @@ async function uploadFile(file) {
             showNotification('Success', 'File uploaded successfully', 'success');
             // Refresh the file list
             loadFiles();
+            
+            // Large files are processed in the background
+            if (data.status === 'pending') {
+                waitForFileProcessing(data.file_id);
+            }
         } else {
             console.error('Error uploading file:', data.message);
             showNotification('Error', data.message || 'File upload failed', 'error');
@@ -117,6 +119,32 @@ async function uploadFile(file) {
     }
 }
 
+// Poll a file until its text extraction has finished
+async function waitForFileProcessing(fileId) {
+    try {
+        const response = await fetch(`/api/files/${fileId}`);
+        if (!response.ok) {
+            throw new Error('Failed to check file status');
+        }
+        
+        const data = await response.json();
+        
+        if (data.file.status === 'pending') {
+            setTimeout(() => waitForFileProcessing(fileId), 2000);
+            return;
+        }
+        
+        if (data.file.status === 'failed') {
+            showNotification('Error', `Could not process ${data.file.filename}: ${data.file.error}`, 'error');
+        } else {
+            showNotification('Success', `${data.file.filename} is ready`, 'success');
+        }
+        loadFiles();
+    } catch (error) {
+        console.error('Error checking file status:', error);
+    }
+}
+
 // Load files from the server
 async function loadFiles() {
     const fileList = document.getElementById('fileList');
@@ -33,6 +33,28 @@ async function checkPendingReminders() {
     setTimeout(checkPendingReminders, 60000);
 }
 
+// Listen for reminders pushed by the server as they fall due
+function subscribeToReminders() {
+    // Fall back to polling in browsers without Server-Sent Events
+    if (!window.EventSource) {
+        checkPendingReminders();
+        return;
+    }
+    
+    const source = new EventSource('/api/reminders/stream');
+    source.addEventListener('reminder', event => {
+        try {
+            showReminderNotification(JSON.parse(event.data));
+        } catch (error) {
+            console.error('Error handling reminder:', error);
+        }
+    });
+    // EventSource reconnects by itself after errors and server timeouts
+    source.onerror = function() {
+        console.log('Reminder stream disconnected, reconnecting...');
+    };
+}
+
 // Show a notification for a due reminder
 function showReminderNotification(reminder) {
     // Check if the browser supports notifications
@@ -128,6 +150,6 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
-    // Start checking for reminders
-    checkPendingReminders();
+    // Start listening for reminders
+    subscribeToReminders();
 });
@@ -9,10 +9,20 @@ function initReminders() {
     setupReminderEventListeners();
 }
 
+// Client-side copy of the reminders, kept current with incremental sync
+const reminderStore = new Map();
+let reminderSyncCursor = null;
+
 // Load reminders from the server
 async function loadReminders() {
     try {
-        const response = await fetch('/api/reminders');
+        const query = reminderSyncCursor ? `?since=${encodeURIComponent(reminderSyncCursor)}` : '';
+        const response = await fetch(`/api/reminders${query}`);
+        if (response.status === 400 && reminderSyncCursor) {
+            // The cursor expired; start over with a full listing
+            reminderSyncCursor = null;
+            return loadReminders();
+        }
         if (!response.ok) {
             throw new Error('Failed to load reminders');
         }
@@ -21,7 +31,14 @@ async function loadReminders() {
         
         if (data.success) {
             // Render reminders
-            renderReminders(data.reminders);
+            if (data.full) {
+                reminderStore.clear();
+            }
+            data.reminders.forEach(reminder => reminderStore.set(reminder.id, reminder));
+            (data.deleted || []).forEach(id => reminderStore.delete(id));
+            reminderSyncCursor = data.cursor;
+            
+            renderReminders(Array.from(reminderStore.values()));
         } else {
             console.error('Error loading reminders:', data.message);
         }
@@ -9,10 +9,20 @@ function initTasks() {
     setupTaskEventListeners();
 }
 
+// Client-side copy of the tasks, kept current with incremental sync
+const taskStore = new Map();
+let taskSyncCursor = null;
+
 // Load tasks from the server
 async function loadTasks() {
     try {
-        const response = await fetch('/api/tasks');
+        const query = taskSyncCursor ? `?since=${encodeURIComponent(taskSyncCursor)}` : '';
+        const response = await fetch(`/api/tasks${query}`);
+        if (response.status === 400 && taskSyncCursor) {
+            // The cursor expired; start over with a full listing
+            taskSyncCursor = null;
+            return loadTasks();
+        }
         if (!response.ok) {
             throw new Error('Failed to load tasks');
         }
@@ -21,7 +31,14 @@ async function loadTasks() {
         
         if (data.success) {
             // Render tasks
-            renderTasks(data.tasks);
+            if (data.full) {
+                taskStore.clear();
+            }
+            data.tasks.forEach(task => taskStore.set(task.id, task));
+            (data.deleted || []).forEach(id => taskStore.delete(id));
+            taskSyncCursor = data.cursor;
+            
+            renderTasks(Array.from(taskStore.values()));
         } else {
             console.error('Error loading tasks:', data.message);
         }
@@ -456,6 +473,39 @@ async function deleteTask(taskId) {
     }
 }
 
+// Delete all completed tasks in one request
+async function clearCompletedTasks() {
+    if (!confirm('Delete all completed tasks?')) {
+        return;
+    }
+    
+    try {
+        const response = await fetch('/api/tasks/bulk', {
+            method: 'DELETE',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ filter: { completed: true } })
+        });
+        
+        if (!response.ok) {
+            throw new Error('Failed to clear completed tasks');
+        }
+        
+        const data = await response.json();
+        
+        if (data.success) {
+            showNotification('Success', data.message, 'success');
+            loadTasks();
+        } else {
+            showNotification('Error', data.message || 'Could not clear completed tasks', 'error');
+        }
+    } catch (error) {
+        console.error('Error clearing completed tasks:', error);
+        showNotification('Error', 'Could not clear completed tasks. Please try again.', 'error');
+    }
+}
+
 // Create a new task
 async function createTask(taskData) {
     try {
@@ -496,6 +546,12 @@ function refreshTasks() {
 
 // Setup event listeners for task operations
 function setupTaskEventListeners() {
+    // Clear completed tasks button
+    const clearCompletedBtn = document.getElementById('clearCompletedTasksBtn');
+    if (clearCompletedBtn) {
+        clearCompletedBtn.addEventListener('click', clearCompletedTasks);
+    }
+    
     // Add task button
     const addTaskBtn = document.getElementById('addTaskBtn');
     if (addTaskBtn) {
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from utils.cache import TTLCache
+
+class Counter:
+    """A loader that counts its calls and can be made to fail or wait"""
+    
+    def __init__(self, delay=0):
+        self.calls = 0
+        self.delay = delay
+        self.error = None
+    
+    def __call__(self):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f'value {self.calls}'
+
+def test_hit_serves_cached_value():
+    cache = TTLCache(ttl=60, maxsize=10)
+    loader = Counter()
+    
+    assert cache.get_or_load('k', loader) == 'value 1'
+    assert cache.get_or_load('k', loader) == 'value 1'
+    assert loader.calls == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_expired_value_is_reloaded():
+    cache = TTLCache(ttl=0.05, maxsize=10)
+    loader = Counter()
+    
+    cache.get_or_load('k', loader)
+    time.sleep(0.1)
+    assert cache.get('k') is None
+    assert cache.get_or_load('k', loader) == 'value 2'
+    assert loader.calls == 2
+
+def test_least_recently_used_key_is_evicted():
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    
+    assert cache.keys() == ['a', 'c']
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache(ttl=60, maxsize=10)
+    loader = Counter(delay=0.2)
+    start = threading.Barrier(8)
+    results = []
+    
+    def worker():
+        start.wait()
+        results.append(cache.get_or_load('k', loader))
+    
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    assert loader.calls == 1
+    assert results == ['value 1'] * 8
+    assert cache.stats()['coalesced'] == 7
+
+def test_failed_reload_serves_stale_value_and_logs(caplog):
+    cache = TTLCache(ttl=0.05, maxsize=10)
+    loader = Counter()
+    cache.get_or_load('k', loader)
+    time.sleep(0.1)
+    
+    loader.error = RuntimeError('upstream down')
+    with caplog.at_level('WARNING', logger='utils.cache'):
+        assert cache.get_or_load('k', loader) == 'value 1'
+    assert cache.stats()['stale'] == 1
+    assert 'upstream down' in caplog.text
+
+def test_failed_load_without_stale_value_raises():
+    cache = TTLCache(ttl=60, maxsize=10)
+    loader = Counter()
+    loader.error = RuntimeError('upstream down')
+    
+    with pytest.raises(RuntimeError):
+        cache.get_or_load('k', loader)
+    assert cache.get('k') is None
@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.stub_server import StubServer
+from utils import async_apis, external_apis, http_client
+from utils.cache import TTLCache
+
+@pytest.fixture
+def stub(monkeypatch):
+    """A local fake wttr.in, with a fresh weather cache and no retries"""
+    with StubServer() as server:
+        monkeypatch.setattr(external_apis, 'WEATHER_API_URL', server.url)
+        monkeypatch.setattr(external_apis, 'weather_cache', TTLCache(ttl=60, maxsize=16))
+        monkeypatch.setattr(http_client, 'MAX_RETRIES', 0)
+        yield server
+
+def test_repeated_lookups_hit_the_cache(stub):
+    first = external_apis.get_weather_data('London')
+    second = external_apis.get_weather_data('  london ')
+    
+    assert first['location'] == 'Stubville'
+    assert second == first
+    assert stub.request_count == 1
+
+def test_expired_lookup_goes_upstream_again(stub, monkeypatch):
+    monkeypatch.setattr(external_apis, 'weather_cache', TTLCache(ttl=0.05, maxsize=16))
+    external_apis.get_weather_data('London')
+    time.sleep(0.1)
+    external_apis.get_weather_data('London')
+    
+    assert stub.request_count == 2
+
+def test_concurrent_lookups_make_one_upstream_call(stub):
+    stub.delay = 0.2
+    start = threading.Barrier(8)
+    results = []
+    
+    def worker():
+        start.wait()
+        results.append(external_apis.get_weather_data('Paris'))
+    
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    assert stub.request_count == 1
+    assert len(results) == 8 and all(r['location'] == 'Stubville' for r in results)
+
+def test_failing_upstream_serves_stale_data(stub, monkeypatch, caplog):
+    monkeypatch.setattr(external_apis, 'weather_cache', TTLCache(ttl=0.05, maxsize=16))
+    fresh = external_apis.get_weather_data('Tokyo')
+    time.sleep(0.1)
+    
+    stub.status = 503
+    with caplog.at_level('WARNING', logger='utils.cache'):
+        stale = external_apis.get_weather_data('Tokyo')
+    
+    assert stale == fresh
+    assert stub.request_count == 2
+    assert '503' in caplog.text
+
+def test_failing_upstream_without_cached_data_reports_error(stub):
+    stub.status = 503
+    result = external_apis.get_weather_data('Berlin')
+    
+    assert result['error'] == 'Could not retrieve weather data'
+
+def test_slow_lookup_past_deadline_serves_stale_data(stub, monkeypatch):
+    monkeypatch.setattr(external_apis, 'weather_cache', TTLCache(ttl=0.05, maxsize=16))
+    fresh = external_apis.get_weather_data('Oslo')
+    time.sleep(0.1)
+    
+    stub.delay = 1
+    start = time.monotonic()
+    weather, _ = async_apis.fetch_external_data(locations=['Oslo'], deadline=0.2)
+    
+    assert time.monotonic() - start < 0.8
+    assert weather['Oslo'] == fresh
+
+def test_slow_lookup_past_deadline_without_cached_data_reports_error(stub):
+    stub.delay = 1
+    weather, _ = async_apis.fetch_external_data(locations=['Lima'], deadline=0.2)
+    
+    assert weather['Lima']['error'] == 'Could not retrieve weather data'
+    assert 'No response within' in weather['Lima']['message']
+
+@pytest.fixture
+def news_stub(monkeypatch):
+    """A local fake GNews with an API key set, a fresh news cache and no background refresher"""
+    with StubServer() as server:
+        monkeypatch.setenv('GNEWS_API_KEY', 'test-key')
+        monkeypatch.setattr(external_apis, 'NEWS_API_URL', server.url)
+        monkeypatch.setattr(external_apis, 'NEWS_REFRESH_INTERVAL', 0)
+        monkeypatch.setattr(external_apis, 'news_cache', TTLCache(ttl=60, maxsize=16))
+        monkeypatch.setattr(external_apis, '_news_requested', {})
+        monkeypatch.setattr(external_apis, '_news_manual_refreshes', {})
+        monkeypatch.setattr(http_client, 'MAX_RETRIES', 0)
+        yield server
+
+def test_news_topics_are_validated_before_reaching_upstream(news_stub):
+    external_apis.get_news_payload(' Technology ')
+    external_apis.get_news_payload('sports&max=100')
+    
+    assert 'category=technology&' in news_stub.paths[0]
+    assert 'category=general&' in news_stub.paths[1]
+    assert 'max=10&' in news_stub.paths[1]
+
+def test_background_refresh_skips_idle_topics(news_stub):
+    external_apis.get_news_payload('business')
+    external_apis.get_news_payload('science')
+    external_apis._news_requested['business'] -= external_apis.news_cache.ttl + 1
+    
+    external_apis.refresh_news()
+    
+    assert len(news_stub.paths) == 3
+    assert 'category=science&' in news_stub.paths[2]
+    assert 'business' not in external_apis._news_requested
+
+def test_manual_refresh_is_throttled_per_topic(news_stub):
+    assert external_apis.refresh_news_now('health') == 0
+    assert external_apis.refresh_news_now('health') > 0
+    assert external_apis.refresh_news_now('world') == 0
+
+@pytest.mark.parametrize('api_key', ['', 'test-key'])
+def test_news_articles_are_copies(news_stub, monkeypatch, api_key):
+    monkeypatch.setenv('GNEWS_API_KEY', api_key)
+    articles, _ = external_apis.get_news_payload('general')
+    articles[0]['title'] = 'changed'
+    articles.clear()
+    
+    articles, _ = external_apis.get_news_payload('general')
+    assert articles and articles[0]['title'] != 'changed'
@@ -0,0 +1,24 @@
+from utils.blob_store import BlobStore
+from utils.text_index import INDEX_VERSION, build_index, deserialize_index, serialize_index
+
+TEXT = 'Café crème brûlée — naïve façade. ' * 30 + 'Plain ASCII words at the end.'
+
+def test_passage_offsets_are_utf8_byte_ranges():
+    index = build_index(TEXT, passage_words=7)
+    data = TEXT.encode('utf-8')
+    
+    passages = [str(data[start:end], 'utf-8') for start, end, _ in index['passages']]
+    assert passages[0] == 'Café crème brûlée — naïve façade. Café crème'
+    assert passages[-1] == 'the end'
+    assert deserialize_index(serialize_index(index))['version'] == INDEX_VERSION
+
+def test_blob_ranges_match_passages(tmp_path):
+    index = build_index(TEXT, passage_words=7)
+    ranges = [(start, end) for start, end, _ in index['passages']]
+    
+    for level in (0, 6):
+        store = BlobStore(str(tmp_path / str(level)), compression_level=level)
+        key = store.put(TEXT)
+        assert store.read_ranges(key, ranges) == [
+            str(TEXT.encode('utf-8')[start:end], 'utf-8') for start, end in ranges
+        ]
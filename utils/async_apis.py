@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.external_apis import (
+    get_weather_data, get_news_data, get_news_payload, cached_weather_data, cached_news_payload
+)
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of concurrent calls to each upstream, shared by all requests
+WEATHER_MAX_CONCURRENCY = int(os.environ.get('WEATHER_MAX_CONCURRENCY', 8))
+NEWS_MAX_CONCURRENCY = int(os.environ.get('NEWS_MAX_CONCURRENCY', 8))
+
+# Seconds a request waits for all of its external lookups. Lookups still
+# running after that are answered from stale cached data or an error, and
+# finish in the background to refresh the cache.
+EXTERNAL_DEADLINE = float(os.environ.get('EXTERNAL_DEADLINE', 5))
+
+# Each upstream gets its own bounded pool, so a slow upstream can only tie
+# up its own threads and never the callers of the other one
+_weather_executor = ThreadPoolExecutor(max_workers=WEATHER_MAX_CONCURRENCY, thread_name_prefix='weather-api')
+_news_executor = ThreadPoolExecutor(max_workers=NEWS_MAX_CONCURRENCY, thread_name_prefix='news-api')
+
+async def get_weather_data_async(location):
+    """
+    Get weather data for a location without blocking the event loop
+    
+    Args:
+        location (str): The location to get weather for
+        
+    Returns:
+        dict: Weather data for the location, as from get_weather_data
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_weather_executor, get_weather_data, location)
+
+async def get_news_data_async(topic='general'):
+    """
+    Get news for a topic without blocking the event loop
+    
+    Args:
+        topic (str): The topic to get news for
+        
+    Returns:
+        list: News articles for the topic, as from get_news_data
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_news_executor, get_news_data, topic)
+
+async def get_news_payload_async(topic='general'):
+    """
+    Get news for a topic with its pre-serialized JSON without blocking the event loop
+    
+    Args:
+        topic (str): The topic to get news for
+        
+    Returns:
+        tuple: (list of articles, JSON array of the articles as a str), as
+        from get_news_payload
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_news_executor, get_news_payload, topic)
+
+async def _within_deadline(lookup, deadline, fallback):
+    """Await a lookup for at most deadline seconds, then call fallback(message) instead"""
+    try:
+        return await asyncio.wait_for(lookup, deadline)
+    except asyncio.TimeoutError:
+        message = f'No response within {deadline:g} seconds'
+        logger.warning(f"External lookup timed out, serving cached data: {message}")
+        return fallback(message)
+
+async def gather_external_data(locations=(), topics=(), deadline=None):
+    """
+    Fetch weather for several locations and news for several topics
+    concurrently
+    
+    Args:
+        locations (iterable): Locations to get weather for
+        topics (iterable): Topics to get news for
+        deadline (float): Seconds to wait for all lookups, EXTERNAL_DEADLINE
+            by default. Slower lookups get stale data or an error.
+            
+    Returns:
+        tuple: (dict of location -> weather data, dict of topic -> articles)
+    """
+    if deadline is None:
+        deadline = EXTERNAL_DEADLINE
+    locations = list(dict.fromkeys(locations))
+    topics = list(dict.fromkeys(topics))
+    # Every lookup starts now, so each waiting deadline seconds bounds the whole batch
+    results = await asyncio.gather(
+        *(_within_deadline(get_weather_data_async(location), deadline,
+                           lambda message, location=location: cached_weather_data(location, message))
+          for location in locations),
+        *(_within_deadline(get_news_payload_async(topic), deadline,
+                           lambda message, topic=topic: cached_news_payload(topic, message))
+          for topic in topics)
+    )
+    weather = dict(zip(locations, results[:len(locations)]))
+    news = {topic: payload[0] for topic, payload in zip(topics, results[len(locations):])}
+    return weather, news
+
+def fetch_external_data(locations=(), topics=(), deadline=None):
+    """Synchronous entry point to gather_external_data for WSGI views"""
+    return asyncio.run(gather_external_data(locations, topics, deadline))
+
+def fetch_news_payload(topic='general', deadline=None):
+    """
+    Get news for a topic with its pre-serialized JSON, waiting at most
+    deadline seconds (EXTERNAL_DEADLINE by default) before falling back to
+    stale headlines or an error, for WSGI views
+    
+    Args:
+        topic (str): The topic to get news for
+        deadline (float): Seconds to wait for the lookup
+        
+    Returns:
+        tuple: (list of articles, JSON array of the articles as a str)
+    """
+    if deadline is None:
+        deadline = EXTERNAL_DEADLINE
+    return asyncio.run(_within_deadline(get_news_payload_async(topic), deadline,
+                                        lambda message: cached_news_payload(topic, message)))
@@ -0,0 +1,108 @@
+import hashlib
+import mmap
+import os
+import tempfile
+import zlib
+
+# Suffix of blobs stored zlib-compressed
+COMPRESSED_SUFFIX = '.z'
+
+class BlobStore:
+    """
+    Content-addressed text storage on local disk
+    
+    Blobs are keyed by the SHA-256 of their UTF-8 bytes, so identical
+    documents are stored once however many uploads refer to them, and a blob
+    never changes once written. Uncompressed blobs are read through mmap;
+    compressed ones trade read time for disk space. Blobs written with either
+    setting remain readable after it changes.
+    """
+    
+    def __init__(self, directory, compression_level=0):
+        self.directory = directory
+        self.compression_level = compression_level
+    
+    def _path(self, key):
+        if len(key) != 64 or not all(c in '0123456789abcdef' for c in key):
+            raise ValueError(f'Invalid blob key: {key!r}')
+        return os.path.join(self.directory, key[:2], key)
+    
+    def put(self, text):
+        """
+        Store text, unless an identical blob already exists
+        
+        Args:
+            text (str): The text to store
+            
+        Returns:
+            str: The blob's key
+        """
+        data = text.encode('utf-8')
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if self.exists(key):
+            return key
+        
+        if self.compression_level:
+            data = zlib.compress(data, self.compression_level)
+            path += COMPRESSED_SUFFIX
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write under a temporary name so readers never see a partial blob
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return key
+    
+    def exists(self, key):
+        path = self._path(key)
+        return os.path.exists(path) or os.path.exists(path + COMPRESSED_SUFFIX)
+    
+    def read(self, key):
+        """
+        Return the text stored under a key
+        
+        Raises:
+            FileNotFoundError: If there is no blob for the key
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                if not os.fstat(f.fileno()).st_size:
+                    return ''
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return str(mapped, 'utf-8')
+        except FileNotFoundError:
+            with open(path + COMPRESSED_SUFFIX, 'rb') as f:
+                return zlib.decompress(f.read()).decode('utf-8')
+    
+    def read_ranges(self, key, ranges):
+        """
+        Return the text of byte ranges of a blob, decoding only those ranges
+        
+        Args:
+            key (str): The blob's key
+            ranges (list): (start, end) UTF-8 byte offsets, as in the passages
+                from text_index.build_index
+            
+        Returns:
+            list: The text of each range
+            
+        Raises:
+            FileNotFoundError: If there is no blob for the key
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                if not os.fstat(f.fileno()).st_size:
+                    return ['' for _ in ranges]
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return [str(mapped[start:end], 'utf-8') for start, end in ranges]
+        except FileNotFoundError:
+            with open(path + COMPRESSED_SUFFIX, 'rb') as f:
+                data = zlib.decompress(f.read())
+            return [str(data[start:end], 'utf-8') for start, end in ranges]
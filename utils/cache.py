@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a time-to-live and an LRU size bound
+    
+    Values are loaded through get_or_load, which coalesces concurrent misses
+    for the same key into a single call to the loader (single-flight). Expired
+    entries are kept until evicted so they can be served when a reload fails.
+    """
+    
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> _Flight
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.coalesced = 0
+        self.refreshes = 0
+    
+    def get_or_load(self, key, loader, force=False):
+        """
+        Return the cached value for key, calling loader() to refresh it if it
+        is missing or expired
+        
+        Args:
+            key: The cache key
+            loader (callable): Called with no arguments to load the value
+            force (bool): Reload even if the cached value is still fresh
+            
+        Returns:
+            The cached or freshly loaded value. If loader raises and an expired
+            value is cached, the expired value is returned instead.
+        """
+        leader = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and not force and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            
+            flight = self._inflight.get(key)
+            if flight:
+                self.coalesced += 1
+            else:
+                flight = self._inflight[key] = _Flight()
+                if force:
+                    self.refreshes += 1
+                else:
+                    self.misses += 1
+                leader = True
+        
+        if not leader:
+            return flight.wait()
+        
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                del self._inflight[key]
+                entry = self._entries.get(key)
+                if entry:
+                    self.stale += 1
+            if entry:
+                logger.warning(f"Loading {key!r} failed, serving the stale value: {str(e)}")
+                flight.resolve(entry[1])
+                return entry[1]
+            flight.fail(e)
+            raise
+        
+        self.put(key, value)
+        with self._lock:
+            del self._inflight[key]
+        flight.resolve(value)
+        return value
+    
+    def get(self, key, default=None):
+        """Return the value for key if it is cached and fresh, without loading"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            return default
+    
+    def get_stale(self, key, default=None):
+        """Return the value for key even if it has expired, without loading"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry else default
+    
+    def put(self, key, value):
+        """Store a value for key"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def keys(self):
+        """Return the cached keys, least recently used first"""
+        with self._lock:
+            return list(self._entries)
+    
+    def invalidate(self, key=None):
+        """Drop one key, or every key if none is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+    
+    def stats(self):
+        """Return the cache counters and current size"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'coalesced': self.coalesced,
+                'refreshes': self.refreshes,
+                'size': len(self._entries)
+            }
+
+class _Flight:
+    """A load in progress that other threads can wait on"""
+    
+    def __init__(self):
+        self._done = threading.Event()
+        self._value = None
+        self._error = None
+    
+    def resolve(self, value):
+        self._value = value
+        self._done.set()
+    
+    def fail(self, error):
+        self._error = error
+        self._done.set()
+    
+    def wait(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
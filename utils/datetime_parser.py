@@ -1,142 +1,193 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
+import os
 import re
 
-def parse_datetime_from_text(text):
+# Distinct phrases whose parse is memoized
+DATETIME_CACHE_SIZE = int(os.environ.get('DATETIME_CACHE_SIZE', 4096))
+
+DAYS_OF_WEEK = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+    "friday": 4, "saturday": 5, "sunday": 6
+}
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8,
+    "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12
+}
+
+# Every rule except the keywords needs a digit, so one scan for a digit
+# decides whether the number patterns run at all
+DIGIT_REGEX = re.compile(r"\d")
+
+# "in 5 minutes"
+IN_REGEX = re.compile(r"in (\d+) (minute|minutes|hour|hours|day|days|week|weeks)")
+
+# "at 3 PM", "at 3:30 PM" or "at 15:00"; then "3 PM" or "3:30 PM"
+TIME_REGEXES = (
+    re.compile(r"at (\d+)(?::(\d+))?\s*(am|pm)?"),
+    re.compile(r"(\d+)(?::(\d+))?\s*(am|pm)")
+)
+
+# "May 15"; then "15th May"
+MONTH_DAY_REGEX = re.compile(r"(\w+)\s+(\d+)(?:st|nd|rd|th)?")
+DAY_MONTH_REGEX = re.compile(r"(\d+)(?:st|nd|rd|th)?\s+(\w+)")
+
+UNIT_DELTAS = {
+    "minute": "minutes", "minutes": "minutes",
+    "hour": "hours", "hours": "hours",
+    "day": "days", "days": "days",
+    "week": "weeks", "weeks": "weeks"
+}
+
+def parse_datetime_from_text(text, now=None):
     """
     Parse a datetime from natural language text
     
     Args:
         text (str): The text containing a date/time reference
-        
+        now (datetime): Time that relative expressions are anchored to;
+            defaults to the current time
+            
     Returns:
         datetime: A datetime object, or None if parsing fails
     """
     if not text:
         return None
     
-    text = text.lower()
-    now = datetime.now()
+    plan = _plan(text.lower())
+    if plan is None:
+        return None
+    return _resolve(plan, now or datetime.now())
+
+@lru_cache(maxsize=DATETIME_CACHE_SIZE)
+def _plan(text):
+    """
+    Work out which rule matches a lowercased text and with what values
+    
+    The result does not depend on the current time, so it is memoized;
+    _resolve applies it to the anchor time on every call.
     
+    Returns:
+        tuple: (rule, *values), or None if nothing matches
+    """
     # Handle relative time expressions
     if "now" in text:
-        return now
-    
+        return ('now',)
     if "today" in text:
-        # Default to end of day if only "today" is specified
-        return datetime(now.year, now.month, now.day, 23, 59, 59)
-    
+        return ('end_of_day', 0)
     if "tomorrow" in text:
-        tomorrow = now + timedelta(days=1)
-        # Default to end of day
-        return datetime(tomorrow.year, tomorrow.month, tomorrow.day, 23, 59, 59)
+        return ('end_of_day', 1)
     
     # Handle "in X minutes/hours/days/weeks"
-    in_pattern = r"in (\d+) (minute|minutes|hour|hours|day|days|week|weeks)"
-    in_match = re.search(in_pattern, text)
-    if in_match:
-        amount = int(in_match.group(1))
-        unit = in_match.group(2)
-        
-        if unit in ["minute", "minutes"]:
-            return now + timedelta(minutes=amount)
-        elif unit in ["hour", "hours"]:
-            return now + timedelta(hours=amount)
-        elif unit in ["day", "days"]:
-            return now + timedelta(days=amount)
-        elif unit in ["week", "weeks"]:
-            return now + timedelta(weeks=amount)
+    has_digit = DIGIT_REGEX.search(text) is not None
+    if has_digit:
+        in_match = IN_REGEX.search(text)
+        if in_match:
+            return ('delta', timedelta(**{UNIT_DELTAS[in_match.group(2)]: int(in_match.group(1))}))
     
     # Handle day of week
-    days_of_week = {
-        "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
-        "friday": 4, "saturday": 5, "sunday": 6
-    }
-    
-    for day, day_num in days_of_week.items():
+    for day, day_num in DAYS_OF_WEEK.items():
         if day in text:
-            # Calculate days until the next occurrence of this day
-            days_ahead = day_num - now.weekday()
-            if days_ahead <= 0:  # Target day already happened this week
-                days_ahead += 7
-                
-            target_date = now + timedelta(days=days_ahead)
-            # Default to 9 AM if no time is specified
-            return datetime(target_date.year, target_date.month, target_date.day, 9, 0, 0)
+            return ('weekday', day_num)
     
-    # Handle time expressions like "at 3 PM" or "at 15:00"
-    time_patterns = [
-        r"at (\d+)(?::(\d+))?\s*(am|pm)?",  # "at 3 PM" or "at 3:30 PM"
-        r"(\d+)(?::(\d+))?\s*(am|pm)"       # "3 PM" or "3:30 PM"
-    ]
+    if not has_digit:
+        return None
     
-    for pattern in time_patterns:
-        time_match = re.search(pattern, text)
+    # Handle time expressions like "at 3 PM" or "at 15:00"
+    for regex in TIME_REGEXES:
+        time_match = regex.search(text)
         if time_match:
             hour = int(time_match.group(1))
             minute = int(time_match.group(2)) if time_match.group(2) else 0
             am_pm = time_match.group(3)
             
-            # Adjust hour for PM
-            if am_pm and am_pm.lower() == 'pm' and hour < 12:
+            if am_pm == 'pm' and hour < 12:
                 hour += 12
-            
-            # Adjust hour for AM
-            if am_pm and am_pm.lower() == 'am' and hour == 12:
+            if am_pm == 'am' and hour == 12:
                 hour = 0
-                
-            return datetime(now.year, now.month, now.day, hour, minute, 0)
+            return ('time', hour, minute)
     
     # Handle date expressions like "May 15" or "15th May"
-    months = {
-        "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
-        "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
-        "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8, 
-        "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12
-    }
-    
-    # Pattern for "Month day" format (e.g., "May 15")
-    month_day_pattern = r"(\w+)\s+(\d+)(?:st|nd|rd|th)?"
-    month_day_match = re.search(month_day_pattern, text)
-    
-    if month_day_match:
-        month_name = month_day_match.group(1).lower()
-        day = int(month_day_match.group(2))
-        
-        if month_name in months:
-            month = months[month_name]
-            year = now.year
-            
-            # If the date has already passed this year, assume next year
-            if month < now.month or (month == now.month and day < now.day):
-                year += 1
-                
-            try:
-                return datetime(year, month, day, 9, 0, 0)  # Default to 9 AM
-            except ValueError:
-                # Invalid date (e.g., February 30)
-                return None
-    
-    # Pattern for "day Month" format (e.g., "15th May")
-    day_month_pattern = r"(\d+)(?:st|nd|rd|th)?\s+(\w+)"
-    day_month_match = re.search(day_month_pattern, text)
-    
-    if day_month_match:
-        day = int(day_month_match.group(1))
-        month_name = day_month_match.group(2).lower()
-        
-        if month_name in months:
-            month = months[month_name]
-            year = now.year
-            
-            # If the date has already passed this year, assume next year
-            if month < now.month or (month == now.month and day < now.day):
-                year += 1
-                
-            try:
-                return datetime(year, month, day, 9, 0, 0)  # Default to 9 AM
-            except ValueError:
-                # Invalid date (e.g., February 30)
-                return None
+    month_day_match = MONTH_DAY_REGEX.search(text)
+    if month_day_match and month_day_match.group(1) in MONTHS:
+        return ('date', MONTHS[month_day_match.group(1)], int(month_day_match.group(2)))
+    
+    day_month_match = DAY_MONTH_REGEX.search(text)
+    if day_month_match and day_month_match.group(2) in MONTHS:
+        return ('date', MONTHS[day_month_match.group(2)], int(day_month_match.group(1)))
     
-    # If all parsing attempts fail, return None
     return None
+
+def _resolve(plan, now):
+    """Turn a plan from _plan into a datetime relative to now"""
+    rule = plan[0]
+    if rule == 'now':
+        return now
+    
+    if rule == 'end_of_day':
+        # Default to end of day if only "today" or "tomorrow" is specified
+        day = now + timedelta(days=plan[1])
+        return datetime(day.year, day.month, day.day, 23, 59, 59)
+    
+    if rule == 'delta':
+        return now + plan[1]
+    
+    if rule == 'weekday':
+        # Calculate days until the next occurrence of this day
+        days_ahead = plan[1] - now.weekday()
+        if days_ahead <= 0:  # Target day already happened this week
+            days_ahead += 7
+        target_date = now + timedelta(days=days_ahead)
+        # Default to 9 AM if no time is specified
+        return datetime(target_date.year, target_date.month, target_date.day, 9, 0, 0)
+    
+    if rule == 'time':
+        return datetime(now.year, now.month, now.day, plan[1], plan[2], 0)
+    
+    # rule == 'date'
+    _, month, day = plan
+    year = now.year
+    # If the date has already passed this year, assume next year
+    if month < now.month or (month == now.month and day < now.day):
+        year += 1
+    try:
+        return datetime(year, month, day, 9, 0, 0)  # Default to 9 AM
+    except ValueError:
+        # Invalid date (e.g., February 30)
+        return None
+
+def parse_datetimes_from_texts(texts, now=None):
+    """
+    Parse many date/time texts against a single reference time
+    
+    Identical texts are parsed once, and texts that reduce to the same rule
+    and values (such as "at 5pm" and "At 5 PM") are resolved once.
+    
+    Args:
+        texts (list): Texts containing date/time references
+        now (datetime): Time that relative expressions are anchored to;
+            defaults to the current time, read once for the whole batch
+            
+    Returns:
+        list: A datetime or None for each text, in order. Unlike
+            parse_datetime_from_text, out-of-range values such as "at 25"
+            give None instead of raising, so one bad line cannot fail a batch.
+    """
+    now = now or datetime.now()
+    by_text = {}
+    by_plan = {}
+    results = []
+    for text in texts:
+        if text not in by_text:
+            try:
+                plan = _plan(text.lower()) if text else None
+                if plan is not None and plan not in by_plan:
+                    by_plan[plan] = _resolve(plan, now)
+                by_text[text] = by_plan.get(plan)
+            except (ValueError, OverflowError):
+                by_text[text] = None
+        results.append(by_text[text])
+    return results
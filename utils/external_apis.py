@@ -1,15 +1,36 @@
-import requests
 import os
 import json
 import logging
+import math
+import threading
+import time
 from datetime import datetime
 
+from utils.cache import TTLCache
+from utils.http_client import http_get
+from utils.metrics import registry, timed_external
+
 logger = logging.getLogger(__name__)
 
+# Upstream base URL, overridable to point at a local server
+WEATHER_API_URL = os.environ.get('WEATHER_API_URL', 'https://wttr.in')
+NEWS_API_URL = os.environ.get('NEWS_API_URL', 'https://gnews.io')
+
+# Weather responses are cached per location; see get_weather_data
+weather_cache = TTLCache(
+    ttl=int(os.environ.get('WEATHER_CACHE_TTL', 300)),
+    maxsize=int(os.environ.get('WEATHER_CACHE_SIZE', 1024))
+)
+registry.register_cache('weather', weather_cache)
+
 def get_weather_data(location):
     """
     Get weather data for a specific location using wttr.in API
     
+    Responses are cached per normalized location for WEATHER_CACHE_TTL
+    seconds, concurrent requests for the same location share one upstream
+    call, and the last good response is served if the upstream fails.
+    
     Args:
         location (str): The location to get weather for
         
@@ -17,46 +38,119 @@ def get_weather_data(location):
         dict: Weather data for the location
     """
     try:
-        url = f"https://wttr.in/{location}?format=j1"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Extract relevant information
-        current_condition = data['current_condition'][0]
-        weather = {
-            'location': data.get('nearest_area', [{}])[0].get('areaName', [{}])[0].get('value', location),
-            'temperature_c': current_condition.get('temp_C'),
-            'temperature_f': current_condition.get('temp_F'),
-            'condition': current_condition.get('weatherDesc', [{}])[0].get('value', 'Unknown'),
-            'humidity': current_condition.get('humidity'),
-            'precipitation': current_condition.get('precipMM'),
-            'wind_speed': current_condition.get('windspeedKmph'),
-            'wind_direction': current_condition.get('winddir16Point'),
-            'icon': current_condition.get('weatherIconUrl', [{}])[0].get('value', '')
-        }
-        
-        # Add forecast data
-        weather['forecast'] = []
-        for day in data.get('weather', [])[:3]:  # Get 3-day forecast
-            forecast_day = {
-                'date': day.get('date'),
-                'max_temp_c': day.get('maxtempC'),
-                'min_temp_c': day.get('mintempC'),
-                'condition': day.get('hourly', [{}])[4].get('weatherDesc', [{}])[0].get('value', 'Unknown'),
-                'chance_of_rain': day.get('hourly', [{}])[4].get('chanceofrain', '0')
-            }
-            weather['forecast'].append(forecast_day)
-        
-        return weather
-    
+        return weather_cache.get_or_load(_weather_key(location), lambda: _fetch_weather_data(location))
     except Exception as e:
         logger.error(f"Error fetching weather data: {str(e)}")
-        return {
-            'location': location,
-            'error': 'Could not retrieve weather data',
-            'message': str(e)
+        return _weather_error(location, str(e))
+
+def cached_weather_data(location, message):
+    """
+    Get the last weather fetched for a location, even if it has expired,
+    without calling the upstream
+    
+    Args:
+        location (str): The location to get weather for
+        message (str): Why the upstream was not used, for the error response
+        
+    Returns:
+        dict: The cached weather data, or an error like get_weather_data's
+    """
+    return weather_cache.get_stale(_weather_key(location)) or _weather_error(location, message)
+
+def _weather_key(location):
+    return ' '.join(location.lower().split())
+
+def _weather_error(location, message):
+    return {
+        'location': location,
+        'error': 'Could not retrieve weather data',
+        'message': message
+    }
+
+@timed_external('weather')
+def _fetch_weather_data(location):
+    """Fetch and parse weather data from wttr.in, raising on failure"""
+    url = f"{WEATHER_API_URL}/{location}?format=j1"
+    response = http_get(url)
+    response.raise_for_status()
+    data = response.json()
+    
+    # Extract relevant information
+    current_condition = data['current_condition'][0]
+    weather = {
+        'location': data.get('nearest_area', [{}])[0].get('areaName', [{}])[0].get('value', location),
+        'temperature_c': current_condition.get('temp_C'),
+        'temperature_f': current_condition.get('temp_F'),
+        'condition': current_condition.get('weatherDesc', [{}])[0].get('value', 'Unknown'),
+        'humidity': current_condition.get('humidity'),
+        'precipitation': current_condition.get('precipMM'),
+        'wind_speed': current_condition.get('windspeedKmph'),
+        'wind_direction': current_condition.get('winddir16Point'),
+        'icon': current_condition.get('weatherIconUrl', [{}])[0].get('value', '')
+    }
+    
+    # Add forecast data
+    weather['forecast'] = []
+    for day in data.get('weather', [])[:3]:  # Get 3-day forecast
+        forecast_day = {
+            'date': day.get('date'),
+            'max_temp_c': day.get('maxtempC'),
+            'min_temp_c': day.get('mintempC'),
+            'condition': day.get('hourly', [{}])[4].get('weatherDesc', [{}])[0].get('value', 'Unknown'),
+            'chance_of_rain': day.get('hourly', [{}])[4].get('chanceofrain', '0')
         }
+        weather['forecast'].append(forecast_day)
+    
+    return weather
+
+# Headlines are cached per topic and refreshed ahead of expiry; see get_news_payload
+news_cache = TTLCache(
+    ttl=int(os.environ.get('NEWS_CACHE_TTL', 300)),
+    maxsize=int(os.environ.get('NEWS_CACHE_SIZE', 64))
+)
+registry.register_cache('news', news_cache)
+NEWS_REFRESH_INTERVAL = int(os.environ.get('NEWS_REFRESH_INTERVAL', 240))
+# Minimum seconds between refreshes of a topic requested through refresh_news_now
+NEWS_MANUAL_REFRESH_INTERVAL = int(os.environ.get('NEWS_MANUAL_REFRESH_INTERVAL', 60))
+_news_refresher = None
+_news_refresher_lock = threading.Lock()
+_news_requested = {}  # topic -> monotonic time it was last asked for
+_news_manual_refreshes = {}  # topic, or None for all, -> monotonic time of the last manual refresh
+_news_state_lock = threading.Lock()
+
+# Categories accepted by the GNews top-headlines endpoint
+NEWS_TOPICS = frozenset([
+    'general', 'world', 'nation', 'business', 'technology',
+    'entertainment', 'sports', 'science', 'health'
+])
+
+# Mock headlines used when no GNEWS_API_KEY is set, built and serialized once
+_MOCK_PUBLISHED_AT = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+MOCK_NEWS = {
+    'general': [
+        {'title': 'Global Leaders Meet to Discuss Climate Change', 'description': 'World leaders gathered to address urgent climate issues.', 'url': '#', 'publishedAt': _MOCK_PUBLISHED_AT},
+        {'title': 'Tech Company Launches New Smart Device', 'description': 'Innovative features promise to change how we interact with technology.', 'url': '#', 'publishedAt': _MOCK_PUBLISHED_AT},
+        {'title': 'Scientists Make Breakthrough in Cancer Research', 'description': 'New treatment approach shows promising results in clinical trials.', 'url': '#', 'publishedAt': _MOCK_PUBLISHED_AT}
+    ],
+    'technology': [
+        {'title': 'AI Development Reaches New Milestone', 'description': 'Recent advancements in machine learning are reshaping multiple industries.', 'url': '#', 'publishedAt': _MOCK_PUBLISHED_AT},
+        {'title': 'Cybersecurity Concerns Rise with Remote Work', 'description': 'Experts warn about new threats as work-from-home continues.', 'url': '#', 'publishedAt': _MOCK_PUBLISHED_AT},
+        {'title': 'New Programming Language Gains Popularity', 'description': 'Developers are switching to this language for its efficiency and flexibility.', 'url': '#', 'publishedAt': _MOCK_PUBLISHED_AT}
+    ],
+    'business': [
+        {'title': 'Stock Market Reaches All-Time High', 'description': 'Investors optimistic about economic recovery and growth.', 'url': '#', 'publishedAt': _MOCK_PUBLISHED_AT},
+        {'title': 'Major Merger Announced Between Industry Giants', 'description': 'The deal is expected to reshape the competitive landscape.', 'url': '#', 'publishedAt': _MOCK_PUBLISHED_AT},
+        {'title': 'Startup Secures Record Funding Round', 'description': 'Innovative business model attracts significant venture capital.', 'url': '#', 'publishedAt': _MOCK_PUBLISHED_AT}
+    ],
+    'health': [
+        {'title': 'New Study Reveals Benefits of Mediterranean Diet', 'description': 'Research confirms positive effects on heart health and longevity.', 'url': '#', 'publishedAt': _MOCK_PUBLISHED_AT},
+        {'title': 'Mental Health Awareness Campaigns Show Impact', 'description': 'More people seeking help as stigma decreases.', 'url': '#', 'publishedAt': _MOCK_PUBLISHED_AT},
+        {'title': 'Breakthrough in Vaccine Development', 'description': 'New technology could speed up response to future pandemics.', 'url': '#', 'publishedAt': _MOCK_PUBLISHED_AT}
+    ]
+}
+
+_MOCK_NEWS_JSON = {topic: json.dumps(articles) for topic, articles in MOCK_NEWS.items()}
 
 def get_news_data(topic='general'):
     """
@@ -68,67 +162,177 @@ def get_news_data(topic='general'):
     Returns:
         list: News articles for the topic
     """
-    try:
-        # Use GNews API (no key required for limited usage)
-        url = f"https://gnews.io/api/v4/top-headlines?category={topic}&lang=en&max=10&apikey={os.environ.get('GNEWS_API_KEY', '')}"
-        
-        # If no API key is provided, use a mock response
-        if os.environ.get('GNEWS_API_KEY', '') == '':
-            # Return a simulated response based on the topic
-            current_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Basic mock data
-            mock_news = {
-                'general': [
-                    {'title': 'Global Leaders Meet to Discuss Climate Change', 'description': 'World leaders gathered to address urgent climate issues.', 'url': '#', 'publishedAt': current_date},
-                    {'title': 'Tech Company Launches New Smart Device', 'description': 'Innovative features promise to change how we interact with technology.', 'url': '#', 'publishedAt': current_date},
-                    {'title': 'Scientists Make Breakthrough in Cancer Research', 'description': 'New treatment approach shows promising results in clinical trials.', 'url': '#', 'publishedAt': current_date}
-                ],
-                'technology': [
-                    {'title': 'AI Development Reaches New Milestone', 'description': 'Recent advancements in machine learning are reshaping multiple industries.', 'url': '#', 'publishedAt': current_date},
-                    {'title': 'Cybersecurity Concerns Rise with Remote Work', 'description': 'Experts warn about new threats as work-from-home continues.', 'url': '#', 'publishedAt': current_date},
-                    {'title': 'New Programming Language Gains Popularity', 'description': 'Developers are switching to this language for its efficiency and flexibility.', 'url': '#', 'publishedAt': current_date}
-                ],
-                'business': [
-                    {'title': 'Stock Market Reaches All-Time High', 'description': 'Investors optimistic about economic recovery and growth.', 'url': '#', 'publishedAt': current_date},
-                    {'title': 'Major Merger Announced Between Industry Giants', 'description': 'The deal is expected to reshape the competitive landscape.', 'url': '#', 'publishedAt': current_date},
-                    {'title': 'Startup Secures Record Funding Round', 'description': 'Innovative business model attracts significant venture capital.', 'url': '#', 'publishedAt': current_date}
-                ],
-                'health': [
-                    {'title': 'New Study Reveals Benefits of Mediterranean Diet', 'description': 'Research confirms positive effects on heart health and longevity.', 'url': '#', 'publishedAt': current_date},
-                    {'title': 'Mental Health Awareness Campaigns Show Impact', 'description': 'More people seeking help as stigma decreases.', 'url': '#', 'publishedAt': current_date},
-                    {'title': 'Breakthrough in Vaccine Development', 'description': 'New technology could speed up response to future pandemics.', 'url': '#', 'publishedAt': current_date}
-                ]
-            }
-            
-            # Return mock news for the requested topic or general if topic not found
-            return mock_news.get(topic.lower(), mock_news['general'])
-        
-        # Make the actual API request if an API key is provided
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+    return get_news_payload(topic)[0]
+
+def normalize_news_topic(topic):
+    """
+    Map a requested topic to a GNews category
+    
+    Args:
+        topic (str): The topic as requested
         
-        # Extract and format articles
-        articles = []
-        for article in data.get('articles', []):
-            articles.append({
-                'title': article.get('title'),
-                'description': article.get('description'),
-                'url': article.get('url'),
-                'publishedAt': article.get('publishedAt')
-            })
+    Returns:
+        str: The lowercased topic, or None if it is not one of NEWS_TOPICS
+    """
+    key = (topic or '').strip().lower()
+    return key if key in NEWS_TOPICS else None
+
+def get_news_payload(topic='general'):
+    """
+    Get news for a topic along with its pre-serialized JSON
+    
+    Topics that are not GNews categories get the general headlines. Without a
+    GNEWS_API_KEY this is a lookup in the mock fixtures. Otherwise headlines
+    are cached per topic for NEWS_CACHE_TTL seconds, and topics requested
+    within that time are refreshed in the background every
+    NEWS_REFRESH_INTERVAL seconds, so requests are served from memory.
+    
+    Args:
+        topic (str): The topic to get news for
         
-        return articles
+    Returns:
+        tuple: (list of articles, JSON array of the articles as a str). The
+        list is a copy the caller may modify.
+    """
+    key = normalize_news_topic(topic) or 'general'
     
+    # If no API key is provided, use a mock response
+    if os.environ.get('GNEWS_API_KEY', '') == '':
+        # Return mock news for the requested topic or general if topic not found
+        if key not in MOCK_NEWS:
+            key = 'general'
+        return [dict(article) for article in MOCK_NEWS[key]], _MOCK_NEWS_JSON[key]
+    
+    _start_news_refresher()
+    with _news_state_lock:
+        _news_requested[key] = time.monotonic()
+    try:
+        articles, articles_json = news_cache.get_or_load(key, lambda: _fetch_news_payload(key))
+        return [dict(article) for article in articles], articles_json
     except Exception as e:
         logger.error(f"Error fetching news data: {str(e)}")
-        # Return a minimal fallback response
-        return [
-            {
-                'title': 'News temporarily unavailable',
-                'description': f'Could not retrieve news data: {str(e)}',
-                'url': '#',
-                'publishedAt': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-        ]
+        return _news_error(str(e))
+
+def cached_news_payload(topic, message):
+    """
+    Get the last headlines fetched for a topic, even if they have expired,
+    without calling the upstream
+    
+    Args:
+        topic (str): The topic to get news for
+        message (str): Why the upstream was not used, for the fallback article
+        
+    Returns:
+        tuple: (list of articles, JSON array of the articles as a str), as
+        from get_news_payload
+    """
+    if os.environ.get('GNEWS_API_KEY', '') == '':
+        return get_news_payload(topic)
+    
+    payload = news_cache.get_stale(normalize_news_topic(topic) or 'general')
+    if payload is None:
+        return _news_error(message)
+    articles, articles_json = payload
+    return [dict(article) for article in articles], articles_json
+
+def _news_error(message):
+    """A single placeholder article explaining why there is no news"""
+    articles = [
+        {
+            'title': 'News temporarily unavailable',
+            'description': f'Could not retrieve news data: {message}',
+            'url': '#',
+            'publishedAt': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+    ]
+    return articles, json.dumps(articles)
+
+def refresh_news(topic=None):
+    """
+    Reload cached headlines from GNews, bypassing the TTL
+    
+    Args:
+        topic (str): The topic to reload, or None for every cached topic
+            that was requested within the last NEWS_CACHE_TTL seconds.
+            Topics nobody asked for in that time are left to expire.
+    """
+    if os.environ.get('GNEWS_API_KEY', '') == '':
+        return
+    
+    if topic:
+        topics = [topic]
+    else:
+        cutoff = time.monotonic() - news_cache.ttl
+        with _news_state_lock:
+            for key, requested_at in list(_news_requested.items()):
+                if requested_at < cutoff:
+                    del _news_requested[key]
+            active = set(_news_requested)
+        topics = [key for key in news_cache.keys() if key in active]
+    
+    for key in topics:
+        try:
+            news_cache.get_or_load(key, lambda: _fetch_news_payload(key), force=True)
+        except Exception as e:
+            logger.error(f"Error refreshing news for {key}: {str(e)}")
+
+def refresh_news_now(topic=None):
+    """
+    Refresh headlines on request, at most once per NEWS_MANUAL_REFRESH_INTERVAL
+    
+    Args:
+        topic (str): A topic from NEWS_TOPICS, or None for every active topic
+        
+    Returns:
+        int: 0 if the refresh ran, otherwise the seconds until it is allowed
+    """
+    now = time.monotonic()
+    with _news_state_lock:
+        last = _news_manual_refreshes.get(topic)
+        if last is not None and now - last < NEWS_MANUAL_REFRESH_INTERVAL:
+            return math.ceil(NEWS_MANUAL_REFRESH_INTERVAL - (now - last))
+        _news_manual_refreshes[topic] = now
+    
+    refresh_news(topic)
+    return 0
+
+@timed_external('news')
+def _fetch_news_payload(topic):
+    """Fetch headlines for a category from GNews, raising on failure"""
+    params = {
+        'category': topic,
+        'lang': 'en',
+        'max': 10,
+        'apikey': os.environ.get('GNEWS_API_KEY', '')
+    }
+    response = http_get(f"{NEWS_API_URL}/api/v4/top-headlines", params=params)
+    response.raise_for_status()
+    data = response.json()
+    
+    # Extract and format articles
+    articles = []
+    for article in data.get('articles', []):
+        articles.append({
+            'title': article.get('title'),
+            'description': article.get('description'),
+            'url': article.get('url'),
+            'publishedAt': article.get('publishedAt')
+        })
+    
+    return articles, json.dumps(articles)
+
+def _start_news_refresher():
+    """Start the background thread that keeps cached headlines fresh"""
+    global _news_refresher
+    if _news_refresher is not None or NEWS_REFRESH_INTERVAL <= 0:
+        return
+    
+    with _news_refresher_lock:
+        if _news_refresher is None:
+            _news_refresher = threading.Thread(target=_refresh_news_forever, name='news-refresher', daemon=True)
+            _news_refresher.start()
+
+def _refresh_news_forever():
+    while True:
+        time.sleep(NEWS_REFRESH_INTERVAL)
+        refresh_news()
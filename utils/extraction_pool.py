@@ -0,0 +1,59 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.file_processor import extract_and_index_file
+
+# Worker processes for text extraction; defaults to one per core
+EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS', 0)) or os.cpu_count() or 1
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # forkserver children start from a clean interpreter instead of
+                # forking a threaded web worker mid-request
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                _executor = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS, mp_context=context)
+    return _executor
+
+def _replace_executor(broken):
+    """Drop a broken pool so the next _get_executor starts a new one"""
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False)
+
+def submit_extraction(path, content_type, max_bytes, blob_store, callback):
+    """
+    Extract a spooled upload's text and build its index in the process pool
+    
+    Args:
+        path (str): Path of the spooled file
+        content_type (str): The file's MIME type
+        max_bytes (int): Maximum number of bytes to read
+        blob_store (BlobStore): Where the worker stores the extracted text
+        callback (callable): Called with the finished Future, in a thread of
+            this process
+        
+    Returns:
+        concurrent.futures.Future: The job, whose result is the
+            (blob key, serialized index, passage vectors) from extract_and_index_file
+    """
+    executor = _get_executor()
+    try:
+        future = executor.submit(extract_and_index_file, path, content_type, max_bytes, blob_store)
+    except BrokenProcessPool:
+        # A worker died, which breaks the whole pool for good; start another
+        _replace_executor(executor)
+        future = _get_executor().submit(extract_and_index_file, path, content_type, max_bytes, blob_store)
+    future.add_done_callback(callback)
+    return future
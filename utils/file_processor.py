@@ -0,0 +1,147 @@
+import codecs
+import os
+import tempfile
+
+from utils.text_index import build_index, serialize_index
+from utils.vector_index import embed_passages
+
+# Bytes read from an upload stream at a time
+CHUNK_SIZE = 64 * 1024
+
+class UploadTooLarge(Exception):
+    """Raised when an upload stream exceeds the configured size limit"""
+
+def iter_text_chunks(stream, max_bytes, chunk_size=CHUNK_SIZE, encoding='utf-8'):
+    """
+    Decode a binary stream as text, one chunk at a time
+    
+    Multi-byte characters split across chunks are handled by an incremental
+    decoder, so only one chunk of the upload is held in memory at a time.
+    
+    Args:
+        stream: A binary file-like object
+        max_bytes (int): Maximum number of bytes to read
+        chunk_size (int): Number of bytes to read per chunk
+        encoding (str): The text encoding
+        
+    Yields:
+        str: Decoded text
+        
+    Raises:
+        UploadTooLarge: If the stream is longer than max_bytes
+        UnicodeDecodeError: If the stream is not valid text in the encoding
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    total = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+def extract_text(stream, content_type, max_bytes):
+    """
+    Extract the text content of an uploaded file
+    
+    Args:
+        stream: A binary file-like object with the file's contents
+        content_type (str): The file's MIME type
+        max_bytes (int): Maximum number of bytes to read
+        
+    Returns:
+        str: The extracted text, or '' for types other than text/plain
+    """
+    if content_type == 'text/plain':
+        return ''.join(iter_text_chunks(stream, max_bytes))
+    
+    return ''
+
+def spool_upload(stream, directory, max_bytes, chunk_size=CHUNK_SIZE):
+    """
+    Copy an upload stream to a file for background extraction
+    
+    Args:
+        stream: A binary file-like object
+        directory (str): Directory to write the file in
+        max_bytes (int): Maximum number of bytes to copy
+        chunk_size (int): Number of bytes to copy per chunk
+        
+    Returns:
+        str: Path of the written file; the caller must delete it
+        
+    Raises:
+        UploadTooLarge: If the stream is longer than max_bytes
+    """
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as spool:
+        total = 0
+        try:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                total += len(chunk)
+                if total > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                spool.write(chunk)
+        except BaseException:
+            spool.close()
+            os.unlink(spool.name)
+            raise
+    return spool.name
+
+def extract_file(path, content_type, max_bytes):
+    """
+    Extract the text content of a spooled upload
+    
+    Runs in the extraction process pool, so it only uses its arguments and
+    never the app or database.
+    
+    Args:
+        path (str): Path of the spooled file
+        content_type (str): The file's MIME type
+        max_bytes (int): Maximum number of bytes to read
+        
+    Returns:
+        str: The extracted text
+    """
+    if content_type == 'application/pdf':
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise RuntimeError("PDF extraction requires the pypdf package")
+        
+        reader = PdfReader(path)
+        return '\n\n'.join(page.extract_text() or '' for page in reader.pages)
+    
+    with open(path, 'rb') as stream:
+        return extract_text(stream, content_type, max_bytes)
+
+def extract_and_index_file(path, content_type, max_bytes, blob_store):
+    """
+    Extract a spooled upload's text into the blob store and build its search indexes
+    
+    Args:
+        path (str): Path of the spooled file
+        content_type (str): The file's MIME type
+        max_bytes (int): Maximum number of bytes to read
+        blob_store (BlobStore): Where the extracted text is stored
+        
+    Returns:
+        tuple: (blob key of the text, or None if there was no text,
+            serialized index from serialize_index, passage vectors from
+            embed_passages)
+    """
+    text = extract_file(path, content_type, max_bytes)
+    index = build_index(text)
+    content_hash = blob_store.put(text) if text else None
+    return content_hash, serialize_index(index), embed_passages(text, index['passages'])
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# Connection pool and timeout settings for calls to external APIs
+POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 10))  # hosts kept pooled
+POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 20))  # connections, and requests in flight, per host
+POOL_TIMEOUT = float(os.environ.get('HTTP_POOL_TIMEOUT', 2))  # wait for a host's request slot
+CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 10))
+TOTAL_TIMEOUT = float(os.environ.get('HTTP_TOTAL_TIMEOUT', 12))  # across all attempts
+MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))
+BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR', 0.3))
+
+# Responses worth retrying; anything else is returned as it is
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+class PoolTimeout(requests.exceptions.ConnectionError):
+    """Raised when a host already has POOL_MAXSIZE requests in flight for POOL_TIMEOUT seconds"""
+    pass
+
+_session = None
+_session_lock = threading.Lock()
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+def create_session():
+    """
+    Create a requests session with pooled keep-alive connections
+    
+    Retries are left to http_get, which can tell connect failures from
+    read timeouts and stop at a deadline.
+    
+    Returns:
+        requests.Session: A session configured from the HTTP_* settings
+    """
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        # http_get never has more than POOL_MAXSIZE requests to a host in
+        # flight, so the pool itself never has to block
+        pool_block=False
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_session():
+    """Return the process-wide session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def _host_slot(url):
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    with _host_slots_lock:
+        slot = _host_slots.get(key)
+        if slot is None:
+            slot = _host_slots[key] = threading.BoundedSemaphore(POOL_MAXSIZE)
+    return slot
+
+def _is_connect_error(error):
+    """Whether a request failed before reaching the server, so retrying it can't repeat work"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(error, requests.exceptions.ConnectionError) and isinstance(reason, NewConnectionError)
+
+def _retry_delay(attempt, response=None):
+    """Exponential backoff, or the server's Retry-After seconds if longer"""
+    delay = BACKOFF_FACTOR * 2 ** attempt
+    retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+    if retry_after.isdigit():
+        delay = max(delay, int(retry_after))
+    return delay
+
+def http_get(url, **kwargs):
+    """
+    Send a GET request through the shared session
+    
+    Connect failures and RETRY_STATUSES responses are retried up to
+    MAX_RETRIES times with backoff. Read timeouts are not retried, since a
+    slow upstream would only be asked again, and no retry starts once it
+    would run past TOTAL_TIMEOUT seconds from the first attempt. At most
+    POOL_MAXSIZE requests per host are in flight at once.
+    
+    Args:
+        url (str): The URL to fetch
+        **kwargs: Passed to requests, except timeout, which is
+            (CONNECT_TIMEOUT, READ_TIMEOUT) capped by the time left
+        
+    Returns:
+        requests.Response: The last response
+        
+    Raises:
+        PoolTimeout: If no request slot for the host frees up within
+            POOL_TIMEOUT seconds
+        requests.RequestException: If the last attempt failed
+    """
+    deadline = time.monotonic() + TOTAL_TIMEOUT
+    slot = _host_slot(url)
+    if not slot.acquire(timeout=POOL_TIMEOUT):
+        raise PoolTimeout(f"{POOL_MAXSIZE} requests to {urlsplit(url).netloc} already in flight")
+    try:
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                response = get_session().get(
+                    url, timeout=(min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining)), **kwargs
+                )
+            except requests.exceptions.RequestException as e:
+                delay = _retry_delay(attempt)
+                if (attempt == MAX_RETRIES or not _is_connect_error(e)
+                        or time.monotonic() + delay >= deadline):
+                    raise
+            else:
+                delay = _retry_delay(attempt, response)
+                if (attempt == MAX_RETRIES or response.status_code not in RETRY_STATUSES
+                        or time.monotonic() + delay >= deadline):
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+    finally:
+        slot.release()
@@ -0,0 +1,33 @@
+import json
+
+def stream_json_object(fields, key, items, chunk_size=500):
+    """
+    Serialize a JSON object with one list member incrementally
+    
+    Produces the same document as json.dumps({**fields, key: list(items)}),
+    as a sequence of string chunks, without holding the list in memory.
+    
+    Args:
+        fields (dict): The object's other members, written first
+        key (str): The name of the list member
+        items (iterable): JSON-serializable list items, consumed lazily
+        chunk_size (int): Number of items serialized per chunk
+        
+    Yields:
+        str: Successive pieces of the JSON document
+    """
+    head = json.dumps(fields)[:-1]
+    yield f"{head}{', ' if fields else ''}{json.dumps(key)}: ["
+    
+    encode = json.JSONEncoder().encode
+    batch = []
+    separator = ''
+    for item in items:
+        batch.append(encode(item))
+        if len(batch) >= chunk_size:
+            yield separator + ', '.join(batch)
+            separator = ', '
+            batch = []
+    if batch:
+        yield separator + ', '.join(batch)
+    yield ']}'
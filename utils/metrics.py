@@ -0,0 +1,400 @@
+import cProfile
+import hmac
+import io
+import ipaddress
+import pstats
+import random
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from urllib.parse import parse_qsl
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.wsgi import ClosingIterator
+
+METRICS_PATH = '/metrics'
+PROFILE_PATH = '/metrics/profile'
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+# Anything else is reported as OTHER, to bound the number of series
+HTTP_METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+
+# WSGI environ key the matched URL rule is stored under
+ROUTE_ENVIRON_KEY = 'metrics.route'
+UNMATCHED_ROUTE = '<unmatched>'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """A monotonically increasing value per combination of label values"""
+    
+    type = 'counter'
+    
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in sorted(values):
+            yield self.name + _format_labels(self.labels, label_values), value
+
+class Gauge(Counter):
+    """A value that can go up and down"""
+    
+    type = 'gauge'
+    
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+class Histogram:
+    """Observations counted into fixed buckets per combination of label values"""
+    
+    type = 'histogram'
+    
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [count per bucket..., count above the last, sum]
+        self._lock = threading.Lock()
+    
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+    
+    def samples(self):
+        with self._lock:
+            series = [(label_values, list(counts)) for label_values, counts in self._series.items()]
+        names = self.labels + ('le',)
+        for label_values, counts in sorted(series):
+            total = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                total += count
+                yield self.name + '_bucket' + _format_labels(names, label_values + (bound,)), total
+            yield self.name + '_sum' + _format_labels(self.labels, label_values), counts[-1]
+            yield self.name + '_count' + _format_labels(self.labels, label_values), total
+
+class Registry:
+    """
+    Metrics of one process, rendered in the Prometheus text format
+    
+    Each worker process keeps its own registry, so Prometheus should scrape
+    every worker (or the app should run one process per scrape target).
+    """
+    
+    def __init__(self):
+        self._metrics = {}
+        self._caches = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+    
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+    
+    def register_cache(self, name, cache):
+        """Report a TTLCache's stats() under a cache label"""
+        with self._lock:
+            self._caches[name] = cache
+    
+    def _cache_metrics(self):
+        with self._lock:
+            caches = sorted(self._caches.items())
+        entries = Gauge('app_cache_entries', 'Entries held by in-process caches', ('cache',))
+        events = Counter('app_cache_events_total', 'In-process cache lookups by outcome', ('cache', 'event'))
+        for name, cache in caches:
+            stats = cache.stats()
+            entries.set(stats.pop('size'), name)
+            for outcome, count in stats.items():
+                events.inc(name, outcome, amount=count)
+        return [entries, events]
+    
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics + self._cache_metrics():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(f'{sample} {_format_value(value)}' for sample, value in metric.samples())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    'app_request_duration_seconds', 'Time to serve a request, including streaming the body',
+    ('method', 'route')
+)
+REQUESTS = registry.counter('app_requests_total', 'Requests served', ('method', 'route', 'status'))
+REQUEST_QUERIES = registry.histogram(
+    'app_request_sql_queries', 'SQL statements executed per request', ('route',), QUERY_COUNT_BUCKETS
+)
+REQUEST_SQL_SECONDS = registry.histogram('app_request_sql_seconds', 'Time spent in SQL per request', ('route',))
+SQL_QUERIES = registry.counter('app_sql_queries_total', 'SQL statements executed, including outside requests')
+SQL_SECONDS = registry.counter('app_sql_seconds_total', 'Time spent in SQL, including outside requests')
+EXTERNAL_SECONDS = registry.histogram(
+    'app_external_api_seconds', 'Time spent calling external APIs', ('api', 'outcome')
+)
+
+# SQL totals of the request the current thread is serving
+_local = threading.local()
+
+class _RequestStats:
+    __slots__ = ('queries', 'sql_seconds')
+    
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['metrics_query_start'].pop()
+    SQL_QUERIES.inc()
+    SQL_SECONDS.inc(amount=elapsed)
+    stats = getattr(_local, 'request', None)
+    if stats is not None:
+        stats.queries += 1
+        stats.sql_seconds += elapsed
+
+def _handle_error(context):
+    starts = context.connection.info.get('metrics_query_start') if context.connection else None
+    if starts:
+        starts.pop()
+
+def instrument_sql():
+    """Time every statement run by any SQLAlchemy engine"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+
+def timed_external(api):
+    """Decorate a function that calls an external API to record its duration"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = func(*args, **kwargs)
+                outcome = 'ok'
+                return result
+            finally:
+                EXTERNAL_SECONDS.observe(time.perf_counter() - start, api, outcome)
+        return wrapper
+    return decorator
+
+class SamplingProfiler:
+    """
+    Runs cProfile on a random fraction of requests and accumulates the results
+    
+    Only one request is profiled at a time; others are never delayed by it.
+    """
+    
+    def __init__(self, rate, top_n=30):
+        self.rate = rate
+        self.top_n = top_n
+        self.samples = 0
+        self._active = threading.Lock()
+        self._stats = None
+        self._stats_lock = threading.Lock()
+    
+    def start(self):
+        """Return a running profiler if this request is sampled, else None"""
+        if self.rate <= 0 or random.random() >= self.rate or not self._active.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool is active
+            self._active.release()
+            return None
+        return profiler
+    
+    def stop(self, profiler):
+        profiler.disable()
+        self._active.release()
+        with self._stats_lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profiler)
+            else:
+                self._stats.add(profiler)
+            self.samples += 1
+    
+    def report(self, limit=None, sort='tottime'):
+        """Return the top functions over every sampled request as text"""
+        out = io.StringIO()
+        with self._stats_lock:
+            if self._stats is None:
+                return f'No requests profiled (sample rate {self.rate})\n'
+            out.write(f'{self.samples} requests profiled\n')
+            self._stats.stream = out
+            self._stats.sort_stats(sort).print_stats(limit or self.top_n)
+        return out.getvalue()
+    
+    def reset(self):
+        with self._stats_lock:
+            self._stats = None
+            self.samples = 0
+
+class InstrumentationMiddleware:
+    """
+    WSGI middleware that records request metrics and serves /metrics
+    
+    Latency and SQL are measured until the server closes the response body,
+    so streamed responses count their full duration; sampled profiles cover
+    the view up to the point the body starts streaming.
+    
+    /metrics and /metrics/profile are only served to requests with an
+    "Authorization: Bearer <token>" header matching token, or from a client
+    address in allowed_networks; with neither configured they are refused.
+    The address is the direct peer's, so behind a reverse proxy on the same
+    host use the token rather than allowing loopback.
+    """
+    
+    def __init__(self, wsgi_app, metrics_registry=registry, profiler=None, token='', allowed_networks=()):
+        self.wsgi_app = wsgi_app
+        self.registry = metrics_registry
+        self.profiler = profiler
+        self.token = token
+        self.allowed_networks = allowed_networks
+    
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO')
+        if path == METRICS_PATH or (path == PROFILE_PATH and self.profiler is not None):
+            if not self._authorized(environ):
+                return self._respond(start_response, 'Forbidden\n', 'text/plain; charset=utf-8', '403 Forbidden')
+            if path == METRICS_PATH:
+                return self._respond(start_response, self.registry.render(), 'text/plain; version=0.0.4; charset=utf-8')
+            return self._serve_profile(environ, start_response)
+        
+        stats = _local.request = _RequestStats()
+        status = []
+        
+        def capture_status(status_line, headers, exc_info=None):
+            status[:] = [status_line.split(' ', 1)[0]]
+            return start_response(status_line, headers, exc_info)
+        
+        profiler = self.profiler.start() if self.profiler is not None else None
+        start = time.perf_counter()
+        try:
+            body = self.wsgi_app(environ, capture_status)
+        except BaseException:
+            self._finish(environ, '500', start, stats)
+            raise
+        finally:
+            # Stop before the body is streamed, so a server that never
+            # closes the body can't keep the profiler busy
+            if profiler is not None:
+                self.profiler.stop(profiler)
+        return ClosingIterator(body, lambda: self._finish(environ, status[0] if status else '500', start, stats))
+    
+    def _finish(self, environ, status, start, stats):
+        elapsed = time.perf_counter() - start
+        if getattr(_local, 'request', None) is stats:
+            _local.request = None
+        
+        method = environ.get('REQUEST_METHOD', '')
+        method = method if method in HTTP_METHODS else 'OTHER'
+        route = environ.get(ROUTE_ENVIRON_KEY) or UNMATCHED_ROUTE
+        REQUEST_SECONDS.observe(elapsed, method, route)
+        REQUESTS.inc(method, route, status)
+        REQUEST_QUERIES.observe(stats.queries, route)
+        REQUEST_SQL_SECONDS.observe(stats.sql_seconds, route)
+    
+    def _authorized(self, environ):
+        if self.token:
+            supplied = environ.get('HTTP_AUTHORIZATION', '').encode('latin-1')
+            if hmac.compare_digest(supplied, f'Bearer {self.token}'.encode('utf-8')):
+                return True
+        try:
+            address = ipaddress.ip_address(environ.get('REMOTE_ADDR', ''))
+        except ValueError:
+            return False
+        return any(address in network for network in self.allowed_networks)
+    
+    def _serve_profile(self, environ, start_response):
+        params = dict(parse_qsl(environ.get('QUERY_STRING', '')))
+        try:
+            limit = int(params.get('limit', 0)) or None
+        except ValueError:
+            limit = None
+        sort = params.get('sort', 'tottime')
+        if sort not in ('tottime', 'cumtime', 'ncalls'):
+            sort = 'tottime'
+        body = self.profiler.report(limit, sort)
+        if params.get('reset') == '1':
+            self.profiler.reset()
+        return self._respond(start_response, body, 'text/plain; charset=utf-8')
+    
+    @staticmethod
+    def _respond(start_response, body, content_type, status='200 OK'):
+        data = body.encode('utf-8')
+        start_response(status, [('Content-Type', content_type), ('Content-Length', str(len(data)))])
+        return [data]
+
+def _record_route():
+    request.environ[ROUTE_ENVIRON_KEY] = request.url_rule.rule if request.url_rule else None
+
+def instrument_app(app, profile_sample_rate=0, profile_top_n=30, token='', allowed_networks=()):
+    """
+    Wrap a Flask app's WSGI callable with InstrumentationMiddleware
+    
+    Args:
+        app (Flask): The app to instrument
+        profile_sample_rate (float): Fraction of requests to run under
+            cProfile; 0 disables profiling and /metrics/profile
+        profile_top_n (int): Functions listed by /metrics/profile by default
+        token (str): Bearer token that may read the metrics; '' for none
+        allowed_networks (iterable): Addresses or CIDR networks, as
+            strings, whose clients may read the metrics without the token
+        
+    Returns:
+        InstrumentationMiddleware: The installed middleware
+    """
+    instrument_sql()
+    app.before_request(_record_route)
+    profiler = SamplingProfiler(profile_sample_rate, profile_top_n) if profile_sample_rate > 0 else None
+    networks = [ipaddress.ip_network(network, strict=False) for network in allowed_networks]
+    app.wsgi_app = InstrumentationMiddleware(app.wsgi_app, registry, profiler, token, networks)
+    return app.wsgi_app
@@ -0,0 +1,90 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+def encode_cursor(value, row_id):
+    """
+    Encode the sort value and id of the last row on a page as an opaque token
+    
+    Args:
+        value: The row's sort column value (datetime, int, str or None)
+        row_id (int): The row's primary key
+        
+    Returns:
+        str: A URL-safe cursor token
+    """
+    if isinstance(value, datetime):
+        value = {'dt': value.isoformat()}
+    raw = json.dumps([value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(token):
+    """
+    Decode a token from encode_cursor
+    
+    Args:
+        token (str): The cursor token
+        
+    Returns:
+        tuple: (sort value, row id)
+        
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        value, row_id = json.loads(raw)
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value['dt'])
+    except (TypeError, KeyError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+    # Anything else, such as a list, would fail in the row-value comparison
+    if not isinstance(row_id, int) or not isinstance(value, (str, int, float, datetime, type(None))):
+        raise ValueError(f"Invalid cursor: {token}")
+    return value, row_id
+
+def keyset_page(query, column, id_column, limit, cursor=None, descending=False):
+    """
+    Return up to limit rows of a query ordered by (column, id), after a cursor
+    
+    Rows with a NULL sort value come last in both directions. They are read
+    as a separate segment ordered by id, after the non-NULL rows run out and
+    only if the column is nullable, so each segment is a range scan of an
+    index on (..., column) in index order, continued from the cursor with a
+    row-value comparison, rather than a sort of every matching row.
+    
+    Args:
+        query: The SQLAlchemy query to page
+        column: The sort column
+        id_column: The primary key column, used as a tie-breaker
+        limit (int): Maximum number of rows to return
+        cursor (tuple): (sort value, id) of the last row already returned
+        descending (bool): Sort in descending order
+        
+    Returns:
+        list: The page's rows
+    """
+    value, row_id = cursor if cursor else (None, None)
+    nullable = column.expression.nullable
+    rows = []
+    if cursor is None or value is not None:
+        if column is id_column:
+            ordered, key, bound = (id_column,), id_column, row_id
+        else:
+            ordered, key, bound = (column, id_column), tuple_(column, id_column), tuple_(value, row_id)
+        segment = query.order_by(*(c.desc() if descending else c.asc() for c in ordered))
+        if nullable:
+            segment = segment.filter(column.isnot(None))
+        if cursor is not None:
+            segment = segment.filter(key < bound if descending else key > bound)
+        rows = segment.limit(limit).all()
+        if len(rows) == limit or not nullable:
+            return rows
+        row_id = None
+    
+    nulls = query.filter(column.is_(None)).order_by(id_column.desc() if descending else id_column.asc())
+    if row_id is not None:
+        nulls = nulls.filter(id_column < row_id if descending else id_column > row_id)
+    return rows + nulls.limit(limit - len(rows)).all()
@@ -0,0 +1,71 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Method for new and upgraded password hashes, in werkzeug's syntax such as
+# "scrypt", "scrypt:16384:8:1" or "pbkdf2:sha256:600000". Stored hashes made
+# with any other method keep working and are rehashed on the next login.
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+# Threads that hash passwords. hashlib releases the GIL while hashing, so
+# this caps how many cores logins can take from API requests.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0)) or max(1, (os.cpu_count() or 2) // 2)
+# Hashes that may wait for a worker before further logins are turned away
+PASSWORD_HASH_BACKLOG = int(os.environ.get('PASSWORD_HASH_BACKLOG', 32))
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool's backlog is full"""
+    pass
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_BACKLOG)
+
+def _run(func, *args):
+    """Run func in the hashing pool and wait for its result"""
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        return _executor.submit(func, *args).result()
+    finally:
+        _slots.release()
+
+@lru_cache(maxsize=None)
+def _method_prefix(method):
+    """The method part of hashes werkzeug makes with a method, e.g. scrypt:32768:8:1 for scrypt"""
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+def hash_password(password):
+    """
+    Hash a password with PASSWORD_HASH_METHOD in the hashing pool
+    
+    Raises:
+        HashingBusy: If too many hashes are already waiting
+    """
+    return _run(generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+def _verify(pwhash, password):
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if pwhash.split('$', 1)[0] == _method_prefix(PASSWORD_HASH_METHOD):
+        return True, None
+    return True, generate_password_hash(password, PASSWORD_HASH_METHOD)
+
+def verify_password(pwhash, password):
+    """
+    Check a password against a stored hash in the hashing pool
+    
+    Args:
+        pwhash (str): The stored hash
+        password (str): The password to check
+        
+    Returns:
+        tuple: (whether the password matches, a new hash made with
+            PASSWORD_HASH_METHOD if it matches but pwhash used a different
+            method, else None)
+            
+    Raises:
+        HashingBusy: If too many hashes are already waiting
+    """
+    return _run(_verify, pwhash, password)
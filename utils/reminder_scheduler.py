@@ -0,0 +1,152 @@
+import heapq
+import json
+import logging
+import queue
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+class ReminderScheduler:
+    """
+    In-memory schedule of upcoming reminders that pushes them to subscribers
+    when they fall due
+
+    Reminders are kept in a min-heap ordered by reminder time. Routes call
+    add/remove when reminders are created or deleted, so the database is
+    only read by load_upcoming when the scheduler starts and then every
+    resync_interval seconds, which picks up changes made by other worker
+    processes.
+    """
+    
+    def __init__(self, load_upcoming, resync_interval=300, lead_time=0):
+        """
+        Args:
+            load_upcoming (callable): Called with a datetime; returns the
+                reminders due at or after it as (id, user_id, reminder_time,
+                payload) tuples, where payload is the reminder's to_dict()
+            resync_interval (int): Seconds between full reloads
+            lead_time (int): Seconds before its time that a reminder is pushed
+        """
+        self._load_upcoming = load_upcoming
+        self.resync_interval = resync_interval
+        self.lead_time = timedelta(seconds=lead_time)
+        self._heap = []  # (reminder_time, reminder_id)
+        self._reminders = {}  # reminder_id -> (user_id, reminder_time, payload)
+        self._delivered = {}  # reminder_id -> reminder_time, for reminders a resync may load again
+        self._subscribers = defaultdict(set)  # user_id -> set of queues
+        self._condition = threading.Condition()
+        self._thread = None
+        self._start_lock = threading.Lock()
+    
+    def start(self):
+        """
+        Load upcoming reminders and start the delivery thread
+        
+        Called on first use, so processes that import the routes without
+        serving requests (e.g. pool workers) never start it.
+        """
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+                self._thread.start()
+    
+    def add(self, reminder):
+        """Schedule a reminder, replacing any earlier schedule for its id"""
+        self.start()
+        with self._condition:
+            self._schedule(reminder.id, reminder.user_id, reminder.reminder_time, reminder.to_dict())
+            self._condition.notify()
+    
+    def remove(self, reminder_id):
+        """Unschedule a reminder; its heap entry is skipped when popped"""
+        with self._condition:
+            self._reminders.pop(reminder_id, None)
+    
+    def subscribe(self, user_id):
+        """
+        Return a queue that receives the user's reminders as they fall due,
+        as (reminder_time, JSON payload) tuples
+        """
+        self.start()
+        subscription = queue.Queue()
+        with self._condition:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+    
+    def unsubscribe(self, user_id, subscription):
+        with self._condition:
+            self._subscribers[user_id].discard(subscription)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+    
+    def _schedule(self, reminder_id, user_id, reminder_time, payload):
+        self._reminders[reminder_id] = (user_id, reminder_time, payload)
+        heapq.heappush(self._heap, (reminder_time, reminder_id))
+    
+    def _resync(self, since):
+        """
+        Reload the reminders due at or after since, skipping those already
+        delivered; returns False if they could not be loaded
+        """
+        try:
+            upcoming = self._load_upcoming(since)
+        except Exception as e:
+            logger.error(f"Error loading reminders: {str(e)}")
+            return False
+        
+        with self._condition:
+            self._heap = []
+            self._reminders = {}
+            for reminder_id, user_id, reminder_time, payload in upcoming:
+                if self._delivered.get(reminder_id) != reminder_time:
+                    self._schedule(reminder_id, user_id, reminder_time, payload)
+            # Later resyncs load from after since, so older deliveries can't come back
+            self._delivered = {reminder_id: reminder_time for reminder_id, reminder_time in self._delivered.items()
+                               if reminder_time >= since}
+        return True
+    
+    def _pop_due(self, now):
+        """Pop every reminder due by now; caller holds the lock"""
+        due = []
+        while self._heap and self._heap[0][0] - self.lead_time <= now:
+            reminder_time, reminder_id = heapq.heappop(self._heap)
+            scheduled = self._reminders.get(reminder_id)
+            # Skip deleted reminders and entries superseded by a later add
+            if scheduled is None or scheduled[1] != reminder_time:
+                continue
+            del self._reminders[reminder_id]
+            self._delivered[reminder_id] = reminder_time
+            due.append(scheduled)
+        return due
+    
+    def _run(self):
+        # Reminders from the last minute are still delivered after a restart
+        since = datetime.now() - timedelta(minutes=1)
+        if self._resync(since):
+            since = datetime.now()
+        next_resync = datetime.now() + timedelta(seconds=self.resync_interval)
+        
+        while True:
+            now = datetime.now()
+            if now >= next_resync:
+                # Reload from the previous resync rather than from now, so
+                # reminders that fell due in between, including ones another
+                # worker created, are delivered late instead of dropped
+                if self._resync(since):
+                    since = now
+                next_resync = now + timedelta(seconds=self.resync_interval)
+            
+            with self._condition:
+                for user_id, reminder_time, payload in self._pop_due(now):
+                    message = json.dumps(payload)
+                    for subscription in self._subscribers.get(user_id, ()):
+                        subscription.put((reminder_time, message))
+                
+                timeout = (next_resync - now).total_seconds()
+                if self._heap:
+                    timeout = min(timeout, (self._heap[0][0] - self.lead_time - now).total_seconds())
+                self._condition.wait(timeout=max(timeout, 0))
@@ -0,0 +1,145 @@
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from werkzeug.datastructures import CallbackDict
+
+from utils.cache import TTLCache
+
+# Seconds between sweeps of expired sessions from the SQLite store
+SESSION_PRUNE_INTERVAL = int(os.environ.get('SESSION_PRUNE_INTERVAL', 3600))
+
+class SQLiteSessionStore:
+    """
+    Session records in a SQLite file shared by every worker process on a host
+    
+    Each thread keeps its own connection. The database runs in WAL mode so
+    session reads never wait on another worker's write.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._next_prune = 0
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS session ('
+            'id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)'
+        )
+    
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+    
+    def get(self, sid):
+        """Return (data, expires) for an unexpired session, or None"""
+        return self._connection().execute(
+            'SELECT data, expires FROM session WHERE id = ? AND expires > ?', (sid, time.time())
+        ).fetchone()
+    
+    def set(self, sid, data, expires):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO session (id, data, expires) VALUES (?, ?, ?)', (sid, data, expires)
+        )
+        if time.monotonic() >= self._next_prune:
+            self._next_prune = time.monotonic() + SESSION_PRUNE_INTERVAL
+            self.prune()
+    
+    def delete(self, sid):
+        self._connection().execute('DELETE FROM session WHERE id = ?', (sid,))
+    
+    def prune(self):
+        """Delete expired sessions"""
+        self._connection().execute('DELETE FROM session WHERE expires <= ?', (time.time(),))
+
+class ServerSession(CallbackDict, SessionMixin):
+    """A session whose contents live in a store, with only its id in the cookie"""
+    
+    def __init__(self, initial=None, sid=None, expires=None):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+        
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires = expires
+        self.new = sid is None
+        self.modified = False
+        # The login the session was opened with, to spot logins and logouts
+        self.opened_user_id = self.get('_user_id')
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Server-side sessions behind a per-process LRU cache
+    
+    A store is any object with get(sid) -> (data, expires) or None,
+    set(sid, data, expires) and delete(sid), such as SQLiteSessionStore.
+    Reads are served from the cache for up to cache_ttl seconds, so a
+    session ended by another worker process can stay valid there for that
+    long; sessions ended by the same process end immediately. Records are
+    only written when the session changes or has used up half its lifetime,
+    and the session id is replaced whenever the logged-in user changes.
+    """
+    
+    serializer = session_json_serializer
+    
+    def __init__(self, store, cache_ttl=10, cache_size=10000):
+        self.store = store
+        self.cache = TTLCache(ttl=cache_ttl, maxsize=cache_size)
+    
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            record = self.cache.get_or_load(sid, lambda: self.store.get(sid))
+            if record and record[1] > time.time():
+                return ServerSession(self.serializer.loads(record[0]), sid, record[1])
+        return ServerSession()
+    
+    def _forget(self, session):
+        self.store.delete(session.sid)
+        self.cache.invalidate(session.sid)
+    
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+        
+        if not session:
+            if session.sid and session.modified:
+                self._forget(session)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+        
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        now = time.time()
+        if session.sid and session.get('_user_id') != session.opened_user_id:
+            # New id on login and logout, so a planted id can't be logged into
+            self._forget(session)
+            session.sid = None
+        elif session.sid and not session.modified and session.expires - now > lifetime / 2:
+            return
+        
+        session.sid = session.sid or secrets.token_urlsafe(32)
+        session.expires = now + lifetime
+        data = self.serializer.dumps(dict(session))
+        self.store.set(session.sid, data, session.expires)
+        self.cache.put(session.sid, (data, session.expires))
+        response.set_cookie(name, session.sid,
+                            expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app),
+                            domain=domain, path=path,
+                            secure=self.get_cookie_secure(app),
+                            samesite=self.get_cookie_samesite(app))
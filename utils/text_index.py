@@ -0,0 +1,192 @@
+import json
+import math
+import re
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter
+
+# Words per passage; queries are answered with the best-matching passages
+PASSAGE_WORDS = 80
+
+# Stored in serialized indexes; indexes from an older version must be rebuilt.
+# Version 2 switched passage offsets from characters to UTF-8 bytes.
+INDEX_VERSION = 2
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+TOKEN_REGEX = re.compile(r"\w+")
+
+STOPWORDS = frozenset("""
+a about an and are as at be but by can do does for from had has have how i if in is it its
+me my not of on or our so that the their them then there these they this to was we were what
+when where which who why will with you your
+""".split())
+
+def tokenize(text):
+    """Split text into lowercase index terms, dropping stopwords"""
+    return [t for t in TOKEN_REGEX.findall(text.lower()) if t not in STOPWORDS]
+
+def build_index(text, passage_words=PASSAGE_WORDS):
+    """
+    Build an inverted index over fixed-size passages of a document
+    
+    Args:
+        text (str): The document text
+        passage_words (int): Number of words per passage
+        
+    Returns:
+        dict: {'version': INDEX_VERSION, 'passages': [[start, end, length],
+        ...] as UTF-8 byte offsets into text and indexed term count,
+        'postings': {term: [[passage, tf], ...]}}
+    """
+    passages = []
+    postings = {}
+    words = []
+    start = None
+    end = 0
+    ascii_only = text.isascii()
+    # Last offset converted to bytes; offsets only ever move forward
+    converted_chars = converted_bytes = 0
+    
+    def byte_offset(offset):
+        nonlocal converted_chars, converted_bytes
+        if ascii_only:
+            return offset
+        converted_bytes += len(text[converted_chars:offset].encode('utf-8'))
+        converted_chars = offset
+        return converted_bytes
+    
+    def flush():
+        counts = Counter(t for t in words if t not in STOPWORDS)
+        number = len(passages)
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append([number, tf])
+        passages.append([start, byte_offset(end), sum(counts.values())])
+    
+    for match in TOKEN_REGEX.finditer(text):
+        if start is None:
+            start = byte_offset(match.start())
+        words.append(match.group().lower())
+        end = match.end()
+        if len(words) == passage_words:
+            flush()
+            words = []
+            start = None
+    if words:
+        flush()
+    
+    return {'version': INDEX_VERSION, 'passages': passages, 'postings': postings}
+
+def serialize_index(index):
+    """
+    Encode an index from build_index as compressed bytes
+    
+    The layout is a JSON header with the terms and their posting counts,
+    followed by the passage table and all postings as packed uint32 arrays,
+    so loading it does not create a Python object per posting.
+    """
+    terms = list(index['postings'])
+    numbers = array('I')
+    for term in terms:
+        for pair in index['postings'][term]:
+            numbers.extend(pair)
+    passages = array('I', (value for passage in index['passages'] for value in passage))
+    if sys.byteorder == 'big':
+        numbers.byteswap()
+        passages.byteswap()
+    
+    header = json.dumps({
+        'version': index.get('version', INDEX_VERSION),
+        'terms': terms,
+        'counts': [len(index['postings'][term]) for term in terms],
+        'passages': len(index['passages'])
+    }, separators=(',', ':')).encode()
+    return zlib.compress(struct.pack('<I', len(header)) + header + passages.tobytes() + numbers.tobytes(), 6)
+
+def deserialize_index(data):
+    """Decode bytes from serialize_index into an index like build_index returns"""
+    data = zlib.decompress(data)
+    (header_length,) = struct.unpack_from('<I', data)
+    header = json.loads(data[4:4 + header_length])
+    body = array('I')
+    body.frombytes(data[4 + header_length:])
+    if sys.byteorder == 'big':
+        body.byteswap()
+    
+    passage_values = 3 * header['passages']
+    passages = [tuple(body[i:i + 3]) for i in range(0, passage_values, 3)]
+    return {
+        'version': header.get('version', 1),
+        'passages': passages,
+        'postings': _PackedPostings(header, body, passage_values)
+    }
+
+class _PackedPostings:
+    """Read-only term -> postings mapping over a packed uint32 array"""
+    
+    def __init__(self, header, numbers, offset):
+        self._numbers = numbers
+        self._spans = {}
+        for term, count in zip(header['terms'], header['counts']):
+            self._spans[term] = (offset, count)
+            offset += 2 * count
+    
+    def get(self, term, default=None):
+        span = self._spans.get(term)
+        if span is None:
+            return default
+        offset, count = span
+        values = self._numbers[offset:offset + 2 * count]
+        return list(zip(values[::2], values[1::2]))
+    
+    def __len__(self):
+        return len(self._spans)
+    
+    def __iter__(self):
+        return iter(self._spans)
+
+def score_passages(indexes, query, top_k=5):
+    """
+    Rank passages from one or more indexed documents against a query with BM25
+    
+    Term statistics are pooled over all the given indexes, so scores are
+    comparable across documents.
+    
+    Args:
+        indexes (dict): Document key -> index from build_index
+        query (str): The query text
+        top_k (int): Maximum number of passages to return
+        
+    Returns:
+        list: (score, document key, passage number) tuples, best first
+    """
+    terms = set(tokenize(query))
+    if not terms or not indexes:
+        return []
+    
+    passage_count = sum(len(index['passages']) for index in indexes.values())
+    if not passage_count:
+        return []
+    total_length = sum(p[2] for index in indexes.values() for p in index['passages'])
+    average_length = total_length / passage_count or 1
+    
+    scores = Counter()
+    for term in terms:
+        term_postings = [(key, index, index['postings'].get(term)) for key, index in indexes.items()]
+        df = sum(len(p) for _, _, p in term_postings if p)
+        if not df:
+            continue
+        idf = math.log(1 + (passage_count - df + 0.5) / (df + 0.5))
+        for key, index, postings in term_postings:
+            if not postings:
+                continue
+            passages = index['passages']
+            for number, tf in postings:
+                length = passages[number][2]
+                scores[key, number] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average_length))
+    
+    return [(score, key, number) for (key, number), score in scores.most_common(top_k)]
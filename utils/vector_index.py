@@ -0,0 +1,238 @@
+import fcntl
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.text_index import STOPWORDS, TOKEN_REGEX
+
+# Dimensions of passage vectors; stored indexes must be deleted if it changes
+VECTOR_DIM = 512
+
+# Relative weights of the hashed n-gram features
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.5
+CHAR_WEIGHT = 0.25
+CHAR_NGRAM = 3
+
+# Fixed .npy header size, so the row count can be rewritten in place on append
+_HEADER_BYTES = 128
+_MAGIC = b'\x93NUMPY\x01\x00'
+
+VECTOR_DTYPE = np.dtype('<f4')
+# Per row: file id, passage number, start and end offsets (UTF-8 bytes since
+# text_index INDEX_VERSION 2, characters in rows stored before it)
+KEY_DTYPE = np.dtype('<i8')
+KEY_COLUMNS = 4
+
+_WEIGHTS = {'w': WORD_WEIGHT, 'b': BIGRAM_WEIGHT, 'c': CHAR_WEIGHT}
+
+def _bucket(feature, dim):
+    """Map a feature to a stable (column, sign) pair; hash() is salted per process"""
+    h = zlib.crc32(':'.join(feature).encode())
+    return h % dim, 1.0 if h & 0x80000000 else -1.0
+
+def embed_texts(texts, dim=VECTOR_DIM):
+    """
+    Project texts into dense vectors with signed feature hashing
+    
+    Features are words, word bigrams and character trigrams of words. Each
+    is weighted by its kind, a sublinear term frequency and its inverse
+    document frequency among the given texts, then hashed into one of dim
+    columns with a random sign, so similar wording (including shared word
+    stems, via the trigrams) lands on similar vectors without a vocabulary
+    or any network access. IDF is taken over the passages of one upload, so
+    stored vectors stay valid as other uploads are appended.
+    
+    Args:
+        texts (list): The texts to embed
+        dim (int): Number of dimensions
+        
+    Returns:
+        numpy.ndarray: float32 array of shape (len(texts), dim) with
+            L2-normalized rows; texts with no features give zero rows
+    """
+    # Python only assigns ids to feature occurrences; counting and
+    # projection are done by NumPy over the flat id array
+    ids = {}
+    word_features = {}
+    occurrences = []
+    lengths = []
+    for text in texts:
+        words = [w for w in TOKEN_REGEX.findall(text.lower()) if w not in STOPWORDS]
+        start = len(occurrences)
+        for word in words:
+            features = word_features.get(word)
+            if features is None:
+                padded = f'<{word}>'
+                features = word_features[word] = [ids.setdefault(('w', word), len(ids))] + [
+                    ids.setdefault(('c', padded[i:i + CHAR_NGRAM]), len(ids))
+                    for i in range(len(padded) - CHAR_NGRAM + 1)
+                ]
+            occurrences.extend(features)
+        occurrences.extend(ids.setdefault(('b', a, b), len(ids)) for a, b in zip(words, words[1:]))
+        lengths.append(len(occurrences) - start)
+    
+    matrix = np.zeros(len(texts) * dim, dtype=np.float64)
+    if occurrences:
+        buckets = [_bucket(feature, dim) for feature in ids]
+        columns = np.array([column for column, _ in buckets], dtype=np.int64)
+        scales = np.array([sign * _WEIGHTS[feature[0]] for (_, sign), feature in zip(buckets, ids)])
+        
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        pairs, counts = np.unique(rows * len(ids) + np.array(occurrences, dtype=np.int64), return_counts=True)
+        rows, features = np.divmod(pairs, len(ids))
+        idf = np.log((1 + len(texts)) / (1 + np.bincount(features, minlength=len(ids)))) + 1
+        weights = scales[features] * idf[features] * (1 + np.log(counts))
+        matrix += np.bincount(rows * dim + columns[features], weights=weights, minlength=len(matrix))
+    
+    matrix = matrix.reshape(len(texts), dim).astype(VECTOR_DTYPE)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+def embed_passages(text, passages, dim=VECTOR_DIM):
+    """Embed the passages of a document, given as (start, end, ...) byte offsets from build_index"""
+    data = text.encode('utf-8')
+    return embed_texts([str(data[p[0]:p[1]], 'utf-8') for p in passages], dim)
+
+def _write_header(f, dtype, rows, columns):
+    header = repr({
+        'descr': np.lib.format.dtype_to_descr(dtype),
+        'fortran_order': False,
+        'shape': (rows, columns)
+    })
+    length = _HEADER_BYTES - len(_MAGIC) - 2
+    f.seek(0)
+    f.write(_MAGIC + length.to_bytes(2, 'little') + header.ljust(length - 1).encode('latin1') + b'\n')
+
+class VectorStore:
+    """
+    Per-user passage vectors in append-only, memory-mapped .npy files
+    
+    Each user has one float32 matrix of passage vectors and a matching int64
+    matrix of (file id, passage number, start, end) keys. Searches map the
+    files read-only, so the OS page cache is shared between worker processes
+    instead of each one loading the corpus. New uploads append rows and then
+    rewrite the fixed-size header's row count, so readers never see a
+    partially written row. At most max_open users' maps are kept open, least
+    recently used first out.
+    """
+    
+    def __init__(self, directory, dim=VECTOR_DIM, max_open=64):
+        self.directory = directory
+        self.dim = dim
+        self.max_open = max_open
+        self._lock = threading.Lock()
+        self._maps = OrderedDict()  # user id -> (file signature, (vectors, keys))
+    
+    def _paths(self, user_id):
+        base = os.path.join(self.directory, str(int(user_id)))
+        return base + '.vectors.npy', base + '.keys.npy', base + '.lock'
+    
+    def _open(self, user_id):
+        """Return (vectors, keys) memory maps for a user, or None if they have no vectors"""
+        vectors_path, keys_path, _ = self._paths(user_id)
+        try:
+            signature = tuple((s.st_size, s.st_mtime_ns) for s in map(os.stat, (vectors_path, keys_path)))
+        except FileNotFoundError:
+            return None
+        
+        with self._lock:
+            cached = self._maps.get(user_id)
+            if cached and cached[0] == signature:
+                self._maps.move_to_end(user_id)
+                return cached[1]
+            vectors = np.load(vectors_path, mmap_mode='r')
+            keys = np.load(keys_path, mmap_mode='r')
+            # The two headers are rewritten one after the other
+            rows = min(len(vectors), len(keys))
+            maps = (vectors[:rows], keys[:rows])
+            self._maps[user_id] = (signature, maps)
+            self._maps.move_to_end(user_id)
+            # Evicted maps are unmapped once searches still using them finish
+            while len(self._maps) > self.max_open:
+                self._maps.popitem(last=False)
+            return maps
+    
+    def file_ids(self, user_id):
+        """Return the set of file ids that have vectors stored for a user"""
+        maps = self._open(user_id)
+        if maps is None:
+            return set()
+        return set(np.unique(maps[1][:, 0]).tolist())
+    
+    def append(self, user_id, file_id, vectors, passages):
+        """
+        Add a file's passage vectors to a user's matrix
+        
+        Args:
+            user_id (int): Owner of the file
+            file_id (int): The file's id
+            vectors (numpy.ndarray): Passage vectors from embed_passages
+            passages (list): The passages' (start, end, ...) offsets
+            
+        Returns:
+            bool: False if the file was already stored
+        """
+        if len(vectors) != len(passages):
+            raise ValueError('Expected one vector per passage')
+        keys = np.array([(file_id, number, p[0], p[1]) for number, p in enumerate(passages)],
+                        dtype=KEY_DTYPE).reshape(-1, KEY_COLUMNS)
+        vectors = np.ascontiguousarray(vectors, dtype=VECTOR_DTYPE)
+        
+        os.makedirs(self.directory, exist_ok=True)
+        vectors_path, keys_path, lock_path = self._paths(user_id)
+        # Serializes appends from every thread and worker process
+        with open(lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            maps = self._open(user_id)
+            rows = 0
+            if maps is not None:
+                if np.any(maps[1][:, 0] == file_id):
+                    return False
+                rows = len(maps[1])
+            self._append_rows(vectors_path, vectors, rows, self.dim)
+            self._append_rows(keys_path, keys, rows, KEY_COLUMNS)
+        return True
+    
+    @staticmethod
+    def _append_rows(path, rows, existing, columns):
+        mode = 'r+b' if os.path.exists(path) else 'w+b'
+        with open(path, mode) as f:
+            # Write after the last committed row, overwriting anything left
+            # by an append that died before updating the header
+            f.seek(_HEADER_BYTES + existing * columns * rows.dtype.itemsize)
+            f.write(rows.tobytes())
+            f.truncate()
+            _write_header(f, rows.dtype, existing + len(rows), columns)
+    
+    def search(self, user_id, query_vector, top_k=5, file_ids=None):
+        """
+        Rank a user's passages by cosine similarity to a query vector
+        
+        Args:
+            user_id (int): The user whose files are searched
+            query_vector (numpy.ndarray): Vector from embed_texts
+            top_k (int): Maximum number of passages to return
+            file_ids (list): Restrict results to these files
+            
+        Returns:
+            list: (score, file id, passage number, start, end) tuples, best first
+        """
+        maps = self._open(user_id)
+        if maps is None:
+            return []
+        vectors, keys = maps
+        
+        scores = vectors @ np.asarray(query_vector, dtype=VECTOR_DTYPE)
+        if file_ids is not None:
+            scores[~np.isin(keys[:, 0], list(file_ids))] = -np.inf
+        top_k = min(top_k, len(scores))
+        if not top_k:
+            return []
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(float(scores[i]), *map(int, keys[i])) for i in best if scores[i] > 0]